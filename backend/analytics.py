@@ -0,0 +1,105 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+
+import models
+import tallies
+import terms
+
+# How many open-ended answers are inlined per question in the analytics payload.
+# The rest are available through the paged answers endpoint.
+OPEN_ENDED_PAGE_SIZE = 50
+
+
+def load_questions(db: Session, survey_id: int):
+    return (
+        db.query(models.Question)
+        .options(selectinload(models.Question.options))
+        .filter(models.Question.survey_id == survey_id)
+        .order_by(models.Question.order, models.Question.id)
+        .all()
+    )
+
+
+def open_ended_answers(db: Session, question_ids, limit: int = OPEN_ENDED_PAGE_SIZE):
+    """Return the first `limit` answers and the total answer count for each open-ended question."""
+    answers = {question_id: ([], 0) for question_id in question_ids}
+    if not question_ids:
+        return answers
+    ranked = (
+        select(
+            models.Answer.question_id,
+            models.Answer.text,
+            func.row_number().over(
+                partition_by=models.Answer.question_id, order_by=models.Answer.id
+            ).label("position"),
+            func.count().over(partition_by=models.Answer.question_id).label("total"),
+        )
+        .where(
+            models.Answer.question_id.in_(question_ids),
+            models.Answer.option_id.is_(None),
+        )
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked.c.question_id, ranked.c.text, ranked.c.total)
+        .where(ranked.c.position <= limit)
+        .order_by(ranked.c.question_id, ranked.c.position)
+    )
+    for question_id, answer, total in rows:
+        page, _ = answers[question_id]
+        page.append(answer)
+        answers[question_id] = (page, total)
+    return answers
+
+
+def answers_page(db: Session, survey_id: int, question_id: int, offset: int, limit: int):
+    base = (
+        db.query(models.Answer.text)
+        .join(models.Question, models.Question.id == models.Answer.question_id)
+        .filter(
+            models.Question.survey_id == survey_id,
+            models.Answer.question_id == question_id,
+            models.Answer.option_id.is_(None),
+        )
+    )
+    total = base.count()
+    page = [row.text for row in base.order_by(models.Answer.id).offset(offset).limit(limit)]
+    return {
+        "question_id": question_id,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "answers": page,
+    }
+
+
+def survey_analytics(db: Session, survey_id: int, answers_limit: int = OPEN_ENDED_PAGE_SIZE):
+    questions = load_questions(db, survey_id)
+    open_ids = [q.id for q in questions if q.is_open_ended]
+
+    counts = tallies.read_tallies(db, survey_id)
+    open_answers = open_ended_answers(db, open_ids, answers_limit)
+    open_terms = terms.top_terms(db, open_ids)
+
+    analytics = []
+    for question in questions:
+        if question.is_open_ended:
+            page, total = open_answers[question.id]
+            analytics.append({
+                "question_id": question.id,
+                "question_text": question.text,
+                "type": "open_ended",
+                "answers": page,
+                "answer_count": total,
+                "top_terms": open_terms[question.id]["terms"],
+                "top_bigrams": open_terms[question.id]["bigrams"],
+            })
+        else:
+            question_counts = counts.get(question.id, {})
+            analytics.append({
+                "question_id": question.id,
+                "question_text": question.text,
+                "type": "multiple_choice",
+                "options": {option.text: question_counts.get(option.id, 0) for option in question.options},
+            })
+    return {"survey_id": survey_id, "analytics": analytics}
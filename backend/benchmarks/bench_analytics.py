@@ -0,0 +1,114 @@
+"""Compare SQL round trips and latency of the survey analytics computation.
+
+Run from the backend directory:
+
+    python benchmarks/bench_analytics.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import analytics  # noqa: E402
+import models  # noqa: E402
+import tallies  # noqa: E402
+from database import Base  # noqa: E402
+
+RESPONSES_PER_QUESTION = 200
+
+
+def legacy_analytics(db, survey_id):
+    # The per-option COUNT implementation this benchmark replaces
+    survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
+    result = []
+    for question in survey.questions:
+        if question.is_open_ended:
+            answers = [a.text for a in db.query(models.Answer).filter(models.Answer.question_id == question.id).all()]
+            result.append({"question_id": question.id, "answers": answers})
+        else:
+            option_counts = {}
+            for option in question.options:
+                option_counts[option.text] = db.query(models.Answer).filter(
+                    models.Answer.question_id == question.id,
+                    models.Answer.option_id == option.id).count()
+            result.append({"question_id": question.id, "options": option_counts})
+    return result
+
+
+def new_analytics(db, survey_id):
+    db.query(models.Survey).filter(models.Survey.id == survey_id).first()
+    return analytics.survey_analytics(db, survey_id)
+
+
+def seed(db, questions, options):
+    survey = models.Survey(title=f"{questions}x{options}", user_id=1)
+    db.add(survey)
+    db.flush()
+    submissions = [models.Response(survey_id=survey.id) for _ in range(RESPONSES_PER_QUESTION)]
+    db.add_all(submissions)
+    db.flush()
+    for idx in range(questions):
+        open_ended = idx % 4 == 3
+        question = models.Question(text=f"Q{idx}", is_open_ended=open_ended, order=idx + 1, survey_id=survey.id)
+        db.add(question)
+        db.flush()
+        question_options = [models.QuestionOption(text=f"Option {j}", question_id=question.id) for j in range(options)]
+        if not open_ended:
+            db.add_all(question_options)
+            db.flush()
+        db.add_all(
+            models.Answer(
+                response_id=response.id,
+                question_id=question.id,
+                text=f"free text {n}" if open_ended else None,
+                option_id=None if open_ended else random.choice(question_options).id,
+            )
+            for n, response in enumerate(submissions)
+        )
+    db.flush()
+    tallies.rebuild_tallies(db, survey.id)
+    db.commit()
+    return survey.id
+
+
+def measure(engine, Session, fn, survey_id):
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = Session()
+    try:
+        start = time.perf_counter()
+        fn(db, survey_id)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+    return len(statements), elapsed
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"{'questions x options':>20} {'legacy queries':>15} {'new queries':>12} {'legacy ms':>10} {'new ms':>8}")
+    for questions, options in [(4, 3), (10, 5), (40, 5), (40, 10)]:
+        db = Session()
+        survey_id = seed(db, questions, options)
+        db.close()
+        legacy_queries, legacy_time = measure(engine, Session, legacy_analytics, survey_id)
+        new_queries, new_time = measure(engine, Session, new_analytics, survey_id)
+        print(f"{f'{questions} x {options}':>20} {legacy_queries:>15} {new_queries:>12} "
+              f"{legacy_time * 1000:>10.1f} {new_time * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
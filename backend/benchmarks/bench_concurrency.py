@@ -0,0 +1,118 @@
+"""Latency percentiles of the API under many concurrent clients.
+
+Starts the app with uvicorn on a scratch database, then fires --clients
+concurrent requests at each hot endpoint. The threadpool-bound sync
+get_survey endpoint is included as a baseline.
+
+Run from the backend directory:
+
+    python benchmarks/bench_concurrency.py [--clients 1000] [--rounds 3]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/bench_concurrency.db")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "120", "--backlog", "4096"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def seed(base):
+    credentials = {"email": "bench@example.com", "password": "benchpassword"}
+    httpx.post(f"{base}/api/auth/signup", json=credentials)
+    token = httpx.post(f"{base}/api/auth/login", data={
+        "username": credentials["email"], "password": credentials["password"],
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    survey = httpx.post(f"{base}/api/survey/", headers=headers, json={
+        "title": "Bench",
+        "questions": [
+            {"text": f"Q{i}", "is_open_ended": False, "options": [{"text": "Yes"}, {"text": "No"}]}
+            for i in range(10)
+        ],
+    }).json()
+    share_token = httpx.post(f"{base}/api/survey/{survey['id']}/share", headers=headers).json()["share_token"]
+    return survey, share_token, headers
+
+
+async def fire(client, method, url, clients, **kwargs):
+    async def one():
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one() for _ in range(clients)))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(base, clients, rounds):
+    survey, share_token, headers = seed(base)
+    payload = [{"question_id": q["id"], "answer": "Yes"} for q in survey["questions"]]
+    scenarios = [
+        ("GET /api/survey/{id} (sync baseline)", "GET", f"/api/survey/{survey['id']}", {"headers": headers}),
+        ("GET /api/surveys/shared/{token}", "GET", f"/api/surveys/shared/{share_token}", {}),
+        ("POST /api/responses/{id}", "POST", f"/api/responses/{survey['id']}", {"json": payload}),
+        ("GET /api/survey/{id}/analytics", "GET", f"/api/survey/{survey['id']}/analytics", {"headers": headers}),
+    ]
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as client:
+        print(f"{clients} concurrent clients, {rounds} rounds")
+        print(f"{'endpoint':>38} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, method, url, kwargs in scenarios:
+            latencies = []
+            for _ in range(rounds):
+                latencies.extend(await fire(client, method, url, clients, **kwargs))
+            print(f"{name:>38} {percentile(latencies, 50) * 1000:>8.0f} "
+                  f"{percentile(latencies, 95) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port)
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{port}", args.clients, args.rounds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Measure concurrent read/write throughput for different database configurations.
+
+Run from the backend directory:
+
+    python benchmarks/bench_database.py [--threads 16] [--seconds 5]
+
+Set BENCH_POSTGRES_URL=postgresql+psycopg2://... to include a PostgreSQL run.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import database  # noqa: E402
+import models  # noqa: E402
+import schemas  # noqa: E402
+import submissions  # noqa: E402
+import tallies  # noqa: E402
+
+
+def configurations():
+    sqlite_dir = tempfile.mkdtemp()
+    yield "sqlite rollback journal, synchronous=FULL", f"sqlite:///{sqlite_dir}/default.db", {
+        "SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL",
+    }
+    yield "sqlite WAL, synchronous=NORMAL", f"sqlite:///{sqlite_dir}/wal.db", {
+        "SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "NORMAL",
+    }
+    if os.getenv("BENCH_POSTGRES_URL"):
+        yield "postgresql", os.environ["BENCH_POSTGRES_URL"], {}
+
+
+def seed(Session):
+    db = Session()
+    survey = models.Survey(title="bench", user_id=1)
+    db.add(survey)
+    db.flush()
+    question = models.Question(text="Q", is_open_ended=False, order=1, survey_id=survey.id)
+    db.add(question)
+    db.flush()
+    db.add_all(models.QuestionOption(text=t, question_id=question.id) for t in ("Yes", "No"))
+    db.commit()
+    ids = survey.id, question.id
+    db.close()
+    return ids
+
+
+def worker(Session, survey_id, question_id, write_ratio, deadline, stats, lock):
+    reads = writes = errors = 0
+    questions = None
+    while time.perf_counter() < deadline:
+        db = Session()
+        try:
+            if random.random() < write_ratio:
+                questions = questions or submissions.survey_questions(db, survey_id)
+                answer = schemas.ResponseCreate(question_id=question_id, answer=random.choice(("Yes", "No")))
+                submissions.insert_submissions(db, survey_id, [submissions.resolve_answers([answer], questions)])
+                db.commit()
+                writes += 1
+            else:
+                db.execute(select(models.Survey).where(models.Survey.id == survey_id)).first()
+                tallies.read_tallies(db, survey_id)
+                reads += 1
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    with lock:
+        stats["reads"] += reads
+        stats["writes"] += writes
+        stats["errors"] += errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.seconds:.0f}s, {args.write_ratio:.0%} writes")
+    print(f"{'configuration':>42} {'reads/s':>9} {'writes/s':>9} {'errors':>7}")
+    for name, url, settings in configurations():
+        for key, value in settings.items():
+            setattr(database, key, value)
+        database.DB_POOL_SIZE = args.threads
+        engine = database.create_db_engine(url)
+        database.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        survey_id, question_id = seed(Session)
+
+        stats = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=worker, args=(Session, survey_id, question_id, args.write_ratio, deadline, stats, lock))
+            for _ in range(args.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+        print(f"{name:>42} {stats['reads'] / args.seconds:>9.0f} {stats['writes'] / args.seconds:>9.0f} {stats['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
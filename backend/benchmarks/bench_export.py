@@ -0,0 +1,73 @@
+"""Measure time-to-first-chunk and peak Python memory of the CSV export.
+
+Run from the backend directory:
+
+    python benchmarks/bench_export.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+
+import database  # noqa: E402
+import exports  # noqa: E402
+import models  # noqa: E402
+
+
+def seed(engine, responses):
+    with engine.begin() as conn:
+        survey_id = conn.execute(insert(models.Survey).values(title=f"{responses} responses", user_id=1)).inserted_primary_key[0]
+        question_ids = [
+            conn.execute(insert(models.Question).values(text=f"Q{i}", order=i, survey_id=survey_id)).inserted_primary_key[0]
+            for i in range(10)
+        ]
+        first_id = None
+        for start in range(0, responses, 50000):
+            count = min(50000, responses - start)
+            conn.execute(insert(models.Response), [{"survey_id": survey_id}] * count)
+        first_id = conn.execute(
+            select(func.min(models.Response.id)).where(models.Response.survey_id == survey_id)
+        ).scalar()
+        # Ten answers per submission
+        for start in range(0, responses, 5000):
+            conn.execute(insert(models.Answer), [
+                {"response_id": first_id + n, "question_id": question_id, "text": f"answer {n}"}
+                for n in range(start, min(start + 5000, responses))
+                for question_id in question_ids
+            ])
+    return survey_id
+
+
+async def consume(stream, start):
+    size = len(await stream.__anext__())
+    first = time.perf_counter() - start
+    async for chunk in stream:
+        size += len(chunk)
+    return first, time.perf_counter() - start, size
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench_export.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    database.Base.metadata.create_all(bind=engine)
+    database.AsyncSessionLocal.configure(bind=database.create_async_db_engine(f"sqlite+aiosqlite:///{path}"))
+
+    print(f"{'responses':>10} {'first chunk ms':>15} {'total s':>8} {'peak MiB':>9} {'bytes':>12}")
+    for responses in (10_000, 100_000, 500_000):
+        survey_id = seed(engine, responses)
+        tracemalloc.start()
+        start = time.perf_counter()
+        first, total, size = asyncio.run(consume(exports.iter_survey_csv(survey_id), start))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{responses:>10} {first * 1000:>15.2f} {total:>8.2f} {peak / 2**20:>9.2f} {size:>12}")
+
+
+if __name__ == "__main__":
+    main()
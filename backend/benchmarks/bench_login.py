@@ -0,0 +1,57 @@
+"""Report password verification (login) throughput per core for bcrypt cost factors.
+
+Run from the backend directory:
+
+    python benchmarks/bench_login.py [--seconds 5] [--rounds 10 12]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException  # noqa: E402
+
+import auth  # noqa: E402
+
+
+async def storm(hashed, seconds, concurrency):
+    done = rejected = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal done, rejected
+        while time.perf_counter() < deadline:
+            try:
+                await auth.verify_password_async("password123", hashed)
+                done += 1
+            except HTTPException:
+                rejected += 1
+                await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return done, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    # Twice as many clients as the pool admits, so back-pressure kicks in
+    concurrency = 2 * (auth.PASSWORD_HASH_WORKERS + auth.PASSWORD_HASH_MAX_QUEUE)
+    print(f"{cores} cores, {auth.PASSWORD_HASH_WORKERS} hash workers, {concurrency} concurrent clients")
+    print(f"{'rounds':>7} {'logins/s':>9} {'per core':>9} {'503s/s':>8}")
+    for rounds in args.rounds:
+        hashed = auth.pwd_context.hash("password123", rounds=rounds)
+        done, rejected = asyncio.run(storm(hashed, args.seconds, concurrency))
+        rate = done / args.seconds
+        print(f"{rounds:>7} {rate:>9.1f} {rate / cores:>9.1f} {rejected / args.seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Upgrade a large pre-migrations database while a writer keeps submitting.
+
+Seeds a SQLite database in the shape the first release created (no
+surveys.is_active, no option_tallies, no secondary indexes, one responses
+row per answered question) with --rows responses, then runs every migration
+while a background thread inserts responses. Reports how long each
+migration took and how long the writer was stalled, which is what users
+would notice during an online upgrade, and the database size before and
+after.
+
+Run from the backend directory:
+
+    python benchmarks/bench_migrations.py [--rows 2000000] [--chunk-size 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import migrations  # noqa: E402
+
+
+# The schema as the first release created it: no is_active, tallies or indexes,
+# and one responses row per answered question
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR UNIQUE, hashed_password VARCHAR,
+                    is_active BOOLEAN, is_superuser BOOLEAN);
+CREATE TABLE surveys (id INTEGER PRIMARY KEY, title VARCHAR, description TEXT,
+                      created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                      user_id INTEGER REFERENCES users (id), share_token VARCHAR UNIQUE);
+CREATE TABLE questions (id INTEGER PRIMARY KEY, text TEXT, is_open_ended BOOLEAN, "order" INTEGER,
+                        survey_id INTEGER REFERENCES surveys (id));
+CREATE TABLE question_options (id INTEGER PRIMARY KEY, text TEXT, question_id INTEGER REFERENCES questions (id));
+CREATE TABLE responses (id INTEGER PRIMARY KEY, survey_id INTEGER REFERENCES surveys (id),
+                        question_id INTEGER REFERENCES questions (id), answer TEXT,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE answers (id INTEGER PRIMARY KEY, response_id INTEGER REFERENCES responses (id),
+                      question_id INTEGER REFERENCES questions (id), text TEXT);
+"""
+
+
+def legacy_database(path, rows):
+    engine = database.create_db_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA.split(";"):
+            if statement.strip():
+                conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO users (id, email) VALUES (1, 'bench@example.com')")
+        conn.exec_driver_sql("INSERT INTO surveys (id, title, user_id) VALUES (1, 'bench', 1)")
+        conn.exec_driver_sql(
+            "INSERT INTO questions (id, text, is_open_ended, \"order\", survey_id) "
+            "VALUES (1, 'Pick', 0, 0, 1), (2, 'Why', 1, 1, 1)"
+        )
+        conn.exec_driver_sql("INSERT INTO question_options (id, text, question_id) VALUES (1, 'Yes', 1), (2, 'No', 1)")
+    with engine.begin() as conn:
+        for start in range(0, rows, 100_000):
+            conn.exec_driver_sql(
+                "INSERT INTO responses (survey_id, question_id, answer) VALUES (?, ?, ?)",
+                [(1, 1 + i % 2, ("Yes", "No", "Maybe")[i % 3]) for i in range(start, min(start + 100_000, rows))],
+            )
+        # The first release also copied every answer into answers
+        conn.exec_driver_sql(
+            "INSERT INTO answers (response_id, question_id, text) SELECT id, question_id, answer FROM responses"
+        )
+    return engine
+
+
+def database_size(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA page_count").scalar() * conn.exec_driver_sql("PRAGMA page_size").scalar()
+
+
+def writer(engine, stop, stalls):
+    while not stop.is_set():
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            # Valid in both the legacy and the current responses shape
+            conn.exec_driver_sql("INSERT INTO responses (survey_id) VALUES (1)")
+        stalls.append(time.perf_counter() - start)
+        time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=migrations.MIGRATION_CHUNK_SIZE)
+    args = parser.parse_args()
+    migrations.MIGRATION_CHUNK_SIZE = args.chunk_size
+
+    started = time.perf_counter()
+    engine = legacy_database(os.path.join(tempfile.mkdtemp(), "legacy.db"), args.rows)
+    print(f"seeded {args.rows} responses in {time.perf_counter() - started:.1f}s")
+    legacy_size = database_size(engine)
+
+    stop, stalls = threading.Event(), []
+    thread = threading.Thread(target=writer, args=(engine, stop, stalls))
+    thread.start()
+    try:
+        for version, name, fn in migrations.pending_migrations(engine):
+            started = time.perf_counter()
+            migrations.migrate(engine, target=version)
+            print(f"{version:>4} {name:<28} {time.perf_counter() - started:>7.2f}s")
+    finally:
+        stop.set()
+        thread.join()
+
+    stalls.sort()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+    print(f"database: {legacy_size / 2**20:.1f} MiB before, {database_size(engine) / 2**20:.1f} MiB after VACUUM")
+    print(f"writer: {len(stalls)} inserts, p50 {stalls[len(stalls) // 2] * 1000:.1f} ms, "
+          f"p99 {stalls[int(len(stalls) * 0.99)] * 1000:.1f} ms, max {stalls[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare searching open-ended answers through the full-text index with loading and scanning them.
+
+Also reports what keeping the index in sync costs when inserting answers.
+
+Run from the backend directory:
+
+    python benchmarks/bench_search.py [--answers 200000] [--searches 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import analytics  # noqa: E402
+import database  # noqa: E402
+import migrations  # noqa: E402
+import models  # noqa: E402
+import search  # noqa: E402
+
+WORDS = [f"word{i}" for i in range(5000)]
+
+
+def sentence(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))
+
+
+def seed(engine, count, rng):
+    with engine.begin() as conn:
+        conn.execute(insert(models.Survey).values(id=1, title="bench", user_id=1))
+        conn.execute(insert(models.Question).values(id=1, text="Why?", is_open_ended=True, order=1, survey_id=1))
+        conn.execute(insert(models.Response).values(id=1, survey_id=1))
+    started = time.perf_counter()
+    for start in range(0, count, 10_000):
+        with engine.begin() as conn:
+            conn.execute(insert(models.Answer), [
+                {"response_id": 1, "question_id": 1, "text": sentence(rng)} for _ in range(min(10_000, count - start))
+            ])
+    return count / (time.perf_counter() - started)
+
+
+def scan(db, word):
+    # Load every answer and filter in Python, as the analytics page did
+    page = analytics.answers_page(db, 1, 1, 0, 10**9)
+    return [answer for answer in page["answers"] if word in answer.split()][:50]
+
+
+def timed(fn, queries):
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=200_000)
+    parser.add_argument("--searches", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    directory = tempfile.mkdtemp()
+    rates = {}
+    for name, indexed in (("unindexed", False), ("indexed", True)):
+        engine = database.create_db_engine(f"sqlite:///{os.path.join(directory, name)}.db")
+        migrations.migrate(engine)
+        if not indexed:
+            with engine.begin() as conn:
+                for trigger in ("insert", "delete", "update"):
+                    conn.exec_driver_sql(f"DROP TRIGGER answers_search_{trigger}")
+        rates[name] = seed(engine, args.answers, rng)
+    print(f"insert: {rates['unindexed']:.0f} answers/s without the index, {rates['indexed']:.0f} answers/s with it")
+
+    db = sessionmaker(bind=engine)()
+    queries = rng.sample(WORDS, args.searches)
+    print(f"{args.answers} answers, {args.searches} single-word searches, first page of 50")
+    print(f"{'path':>8} {'ms/search':>10}")
+    print(f"{'scan':>8} {timed(lambda word: scan(db, word), queries[:5]):>10.1f}")
+    print(f"{'fts':>8} {timed(lambda word: search.search_answers(db, 1, 1, word, 0, 50), queries):>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
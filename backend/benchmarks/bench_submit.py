@@ -0,0 +1,120 @@
+"""Compare submissions per second of the per-row, bulk and batched submission paths.
+
+Run from the backend directory:
+
+    python benchmarks/bench_submit.py [--submissions 300] [--questions 50] [--batch-size 100]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models  # noqa: E402
+import schemas  # noqa: E402
+import submissions  # noqa: E402
+from database import Base  # noqa: E402
+
+
+def legacy_submit(db, survey_id, responses):
+    # The flush-per-answer ORM implementation this benchmark replaces
+    survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
+    options = {(q.id, o.text): o.id for q in survey.questions for o in q.options}
+    db_response = models.Response(survey_id=survey_id, created_at=func.now())
+    db.add(db_response)
+    db.flush()
+    for response in responses:
+        db.add(models.Answer(
+            response_id=db_response.id,
+            question_id=response.question_id,
+            option_id=options[(response.question_id, response.answer)],
+        ))
+        db.flush()
+    db.commit()
+    db.refresh(db_response)
+    return db_response
+
+
+def bulk_submit(db, survey_id, responses):
+    answers = submissions.resolve_answers(responses, submissions.survey_questions(db, survey_id))
+    rows = submissions.insert_submissions(db, survey_id, [answers])
+    db.commit()
+    return rows
+
+
+def batch_submit(db, survey_id, batch):
+    # Many submissions in one transaction, as the submitResponses mutation does
+    questions = submissions.cached_survey_questions(db, survey_id)
+    rows = submissions.insert_submissions(db, survey_id, [submissions.resolve_answers(r, questions) for r in batch])
+    db.commit()
+    return rows
+
+
+def seed(Session, questions):
+    db = Session()
+    survey = models.Survey(title="bench", user_id=1)
+    db.add(survey)
+    db.flush()
+    for idx in range(questions):
+        question = models.Question(text=f"Q{idx}", is_open_ended=False, order=idx + 1, survey_id=survey.id)
+        db.add(question)
+        db.flush()
+        db.add_all(models.QuestionOption(text=t, question_id=question.id) for t in ("Yes", "No"))
+    db.commit()
+    payload = [
+        schemas.ResponseCreate(question_id=q.id, answer="Yes" if q.id % 2 else "No") for q in survey.questions
+    ]
+    survey_id = survey.id
+    db.close()
+    return survey_id, payload
+
+
+def run(engine, Session, fn, survey_id, payload, count):
+    statements = []
+
+    def counter(*args):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", counter)
+    start = time.perf_counter()
+    for _ in range(count):
+        db = Session()
+        try:
+            fn(db, survey_id, payload)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", counter)
+    return count / elapsed, len(statements) / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_submit.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    survey_id, payload = seed(Session, args.questions)
+
+    print(f"{args.submissions} submissions x {args.questions} answers")
+    print(f"{'path':>8} {'submissions/s':>14} {'statements/submission':>22}")
+    for name, fn in (("legacy", legacy_submit), ("bulk", bulk_submit)):
+        rate, statements = run(engine, Session, fn, survey_id, payload, args.submissions)
+        print(f"{name:>8} {rate:>14.1f} {statements:>22.1f}")
+    batch = [payload] * args.batch_size
+    rate, statements = run(engine, Session, batch_submit, survey_id, batch, max(1, args.submissions // args.batch_size))
+    print(f"{'batch':>8} {rate * args.batch_size:>14.1f} {statements / args.batch_size:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
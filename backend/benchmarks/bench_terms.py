@@ -0,0 +1,95 @@
+"""Compare reading a question's top terms from term_counts with counting them from the answers on each request.
+
+Also reports what counting terms costs at submission time.
+
+Run from the backend directory:
+
+    python benchmarks/bench_terms.py [--answers 100000] [--reads 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import database  # noqa: E402
+import migrations  # noqa: E402
+import models  # noqa: E402
+import submissions  # noqa: E402
+import terms  # noqa: E402
+
+# A Zipf-like vocabulary, so some terms are much more common than others
+WORDS = [f"word{i}" for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+def recount(db, question_id):
+    # Tokenize every answer on each request, as a word cloud without term_counts would
+    counts = Counter()
+    for text in db.execute(select(models.Answer.text).where(models.Answer.question_id == question_id)).scalars():
+        counts.update(term for n, term in terms.answer_terms(text) if n == 1)
+    return counts.most_common(terms.TOP_TERMS)
+
+
+def timed(fn, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - started) / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=100_000)
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_terms.db')}")
+    migrations.migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Survey).values(id=1, title="bench", user_id=1))
+        conn.execute(insert(models.Question).values(id=1, text="Why?", is_open_ended=True, order=1, survey_id=1))
+    Session = sessionmaker(bind=engine)
+
+    rates = {}
+    for name, counting in (("without counts", False), ("with counts", True)):
+        count_terms = terms.count_terms
+        if not counting:
+            terms.count_terms = lambda db, survey_id, answers: None
+        started = time.perf_counter()
+        with Session() as db:
+            for start in range(0, args.answers // 2, 100):
+                batch = [
+                    [{"question_id": 1, "option_id": None, "answer": None,
+                      "text": " ".join(rng.choices(WORDS, WEIGHTS, k=rng.randint(5, 30)))}]
+                    for _ in range(100)
+                ]
+                submissions.insert_submissions(db, 1, batch)
+                db.commit()
+        rates[name] = args.answers // 2 / (time.perf_counter() - started)
+        terms.count_terms = count_terms
+    print(f"submit: {rates['without counts']:.0f} answers/s without term counts, "
+          f"{rates['with counts']:.0f} answers/s with them")
+
+    with Session() as db:
+        # Only the second half of the answers was counted; recount from scratch
+        db.execute(models.TermCount.__table__.delete())
+        terms.add_answer_range(db, 1, args.answers)
+        db.commit()
+        print(f"{args.answers} answers, top {terms.TOP_TERMS} terms")
+        print(f"{'path':>8} {'ms/read':>10}")
+        print(f"{'recount':>8} {timed(lambda: recount(db, 1), max(1, args.reads // 10)):>10.1f}")
+        print(f"{'counts':>8} {timed(lambda: terms.top_terms(db, [1]), args.reads):>10.1f}")
+        assert [term for term, _ in recount(db, 1)] == [row["term"] for row in terms.top_terms(db, [1])[1]["terms"]]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare a daily trend chart read from response_rollups with one aggregated from raw answers.
+
+Seeds --days of submissions spread over time, then times both ways of
+building the same per-option daily series.
+
+Run from the backend directory:
+
+    python benchmarks/bench_timeseries.py [--submissions 100000] [--days 90] [--questions 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import database  # noqa: E402
+import migrations  # noqa: E402
+import models  # noqa: E402
+import rollups  # noqa: E402
+
+
+def seed(engine, submissions, days, questions, rng):
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Survey).values(id=1, title="bench", user_id=1))
+        conn.execute(insert(models.Question), [
+            {"id": q, "text": f"Q{q}", "is_open_ended": False, "order": q, "survey_id": 1} for q in range(1, questions + 1)
+        ])
+        conn.execute(insert(models.QuestionOption), [
+            {"id": q * 10 + o, "text": f"Option {o}", "question_id": q} for q in range(1, questions + 1) for o in range(4)
+        ])
+    for start in range(0, submissions, 10_000):
+        ids = range(start + 1, min(start + 10_000, submissions) + 1)
+        with engine.begin() as conn:
+            conn.execute(insert(models.Response), [
+                {"id": i, "survey_id": 1, "created_at": now - timedelta(seconds=rng.randrange(days * 86400))} for i in ids
+            ])
+            conn.execute(insert(models.Answer), [
+                {"response_id": i, "question_id": q, "option_id": q * 10 + rng.randrange(4)}
+                for i in ids for q in range(1, questions + 1)
+            ])
+    return now
+
+
+def raw_daily(db, start, end):
+    # What a chart has to do without rollups: group every answer in range by day
+    day = func.date(models.Response.created_at)
+    return db.execute(
+        select(day, models.Answer.option_id, func.count())
+        .join(models.Answer, models.Answer.response_id == models.Response.id)
+        .where(models.Response.survey_id == 1, models.Response.created_at >= start, models.Response.created_at < end)
+        .group_by(day, models.Answer.option_id)
+    ).all()
+
+
+def timed(fn, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        result = fn()
+    return (time.perf_counter() - started) / count * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--questions", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_timeseries.db')}")
+    migrations.migrate(engine)
+    now = seed(engine, args.submissions, args.days, args.questions, random.Random(0))
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        started = time.perf_counter()
+        rollups.add_response_range(db, 1, args.submissions)
+        db.commit()
+        print(f"backfilled rollups for {args.submissions} submissions in {time.perf_counter() - started:.1f}s")
+
+        start, end = rollups.resolve_range("day", now - timedelta(days=args.days), now)
+        rows = db.execute(
+            select(func.count()).select_from(models.ResponseRollup)
+            .where(models.ResponseRollup.granularity == "day")
+        ).scalar()
+        raw_ms, _ = timed(lambda: raw_daily(db, start, end), 3)
+        rollup_ms, series = timed(lambda: rollups.timeseries(db, 1, "day", start, end), 20)
+        assert sum(series["responses"]) == args.submissions
+        print(f"{args.days} days, {args.questions} questions x 4 options: {rows} daily rollup rows")
+        print(f"{'path':>8} {'ms/chart':>10}")
+        print(f"{'raw':>8} {raw_ms:>10.1f}")
+        print(f"{'rollups':>8} {rollup_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
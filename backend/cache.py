@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SHARED_SURVEY_CACHE_SIZE = int(os.getenv("SHARED_SURVEY_CACHE_SIZE", "1024"))
+SHARED_SURVEY_CACHE_TTL = float(os.getenv("SHARED_SURVEY_CACHE_TTL", "60"))
+SURVEY_QUESTIONS_CACHE_SIZE = int(os.getenv("SURVEY_QUESTIONS_CACHE_SIZE", "1024"))
+SURVEY_QUESTIONS_CACHE_TTL = float(os.getenv("SURVEY_QUESTIONS_CACHE_TTL", "60"))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose value matches `predicate`; O(size), for rare events."""
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# share_token -> (is_active, serialized schemas.Survey JSON)
+shared_survey_cache = TTLCache(SHARED_SURVEY_CACHE_SIZE, SHARED_SURVEY_CACHE_TTL)
+# survey_id -> submissions.survey_questions() map, to validate submissions without a query
+survey_questions_cache = TTLCache(SURVEY_QUESTIONS_CACHE_SIZE, SURVEY_QUESTIONS_CACHE_TTL)
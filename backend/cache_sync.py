@@ -0,0 +1,67 @@
+"""Cache invalidation across worker processes.
+
+Every worker process keeps its own caches (cache.py, auth.principal_cache),
+so an entry dropped in one process would otherwise live on in the others
+until it expires. invalidate() drops the entry locally and, with CACHE_SYNC
+on, records it in the cache_invalidations table; each process's
+CacheSyncWorker (see table_log) replays the recorded rows, so every
+worker follows within CACHE_SYNC_INTERVAL seconds.
+"""
+import os
+
+from sqlalchemy import insert
+
+from cache import shared_survey_cache, survey_questions_cache
+from database import engine
+from table_log import TableFollower
+import models
+
+# Off for a single process, which has nobody to tell; serve.py turns it on
+CACHE_SYNC = os.getenv("CACHE_SYNC", "false").lower() in ("1", "true", "yes")
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL", "0.5"))
+# Recorded invalidations are deleted after this many seconds
+CACHE_SYNC_RETENTION = float(os.getenv("CACHE_SYNC_RETENTION", "3600"))
+
+_handlers = {}
+
+
+def enabled() -> bool:
+    return CACHE_SYNC
+
+
+def register(cache: str, handler):
+    """Have handler(key) drop entries of `cache`; replayed keys arrive as strings."""
+    _handlers[cache] = handler
+
+
+def invalidate(cache: str, key, connection=None):
+    """Drop `key` from `cache` in this process and, with CACHE_SYNC, in all others.
+
+    Call once the change has committed, or pass the connection of the
+    transaction making it so the invalidation commits along with it.
+    """
+    _handlers[cache](key)
+    if not CACHE_SYNC:
+        return
+    stmt = insert(models.CacheInvalidation).values(cache=cache, key=str(key))
+    if connection is not None:
+        connection.execute(stmt)
+    else:
+        with engine.begin() as conn:
+            conn.execute(stmt)
+
+
+class CacheSyncWorker(TableFollower):
+    def __init__(self, interval: float = CACHE_SYNC_INTERVAL, retention: float = CACHE_SYNC_RETENTION):
+        super().__init__(models.CacheInvalidation, interval, retention, name="cache-sync")
+
+    def handle(self, row):
+        handler = _handlers.get(row.cache)
+        if handler is not None:
+            handler(row.key)
+
+
+worker = CacheSyncWorker()
+
+register("shared_survey", shared_survey_cache.invalidate)
+register("survey_questions", lambda survey_id: survey_questions_cache.invalidate(int(survey_id)))
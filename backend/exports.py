@@ -0,0 +1,67 @@
+import csv
+from io import StringIO
+
+from sqlalchemy import func, select
+
+from database import AsyncSessionLocal
+import models
+
+# Rows fetched from the database (and written to the client) per chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def _drain(output: StringIO) -> str:
+    chunk = output.getvalue()
+    output.seek(0)
+    output.truncate(0)
+    return chunk
+
+
+async def iter_survey_csv(survey_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield the survey's responses as CSV text, one chunk per batch of rows.
+
+    The generator owns its session so it stays open for as long as the
+    response is streaming, independent of the request's session.
+    """
+    async with AsyncSessionLocal() as db:
+        output = StringIO()
+        writer = csv.writer(output)
+
+        questions = (await db.execute(
+            select(models.Question.id, models.Question.text)
+            .where(models.Question.survey_id == survey_id)
+            .order_by(models.Question.order, models.Question.id)
+        )).all()
+        columns = {question_id: idx for idx, (question_id, _) in enumerate(questions)}
+
+        writer.writerow(['Response ID', 'Submitted At'] + [text for _, text in questions])
+        yield _drain(output)
+
+        # One CSV row per submission; answers arrive grouped by response and
+        # a response's answers may straddle two batches
+        result = await db.stream(
+            select(
+                models.Response.id,
+                models.Response.created_at,
+                models.Answer.question_id,
+                func.coalesce(models.QuestionOption.text, models.Answer.text),
+            )
+            .outerjoin(models.Answer, models.Answer.response_id == models.Response.id)
+            .outerjoin(models.QuestionOption, models.QuestionOption.id == models.Answer.option_id)
+            .where(models.Response.survey_id == survey_id)
+            .order_by(models.Response.created_at, models.Response.id)
+            .execution_options(yield_per=batch_size)
+        )
+        row = None
+        async for batch in result.partitions():
+            for response_id, created_at, question_id, answer in batch:
+                if row is None or row[0] != response_id:
+                    if row is not None:
+                        writer.writerow(row)
+                    row = [response_id, created_at] + [''] * len(questions)
+                if question_id in columns:
+                    row[2 + columns[question_id]] = answer
+            yield _drain(output)
+        if row is not None:
+            writer.writerow(row)
+            yield _drain(output)
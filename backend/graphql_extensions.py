@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    get_named_type,
+    get_nullable_type,
+    value_from_ast_untyped,
+)
+from graphql.execution import ExecutionResult
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http.exceptions import HTTPException
+
+import pagination
+
+GRAPHQL_MAX_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "8"))
+# Roughly the number of objects a query may ask for; see query_cost()
+GRAPHQL_MAX_COST = int(os.getenv("GRAPHQL_MAX_COST", "50000"))
+# Assumed length of a list field that isn't paged by a `first` argument
+GRAPHQL_LIST_SIZE_ESTIMATE = int(os.getenv("GRAPHQL_LIST_SIZE_ESTIMATE", "10"))
+# Parsed documents, validation results and registered persisted queries kept per process
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.getenv("GRAPHQL_DOCUMENT_CACHE_SIZE", "256"))
+# JSON object of sha256 hash -> query text: queries known ahead of time
+GRAPHQL_PERSISTED_QUERIES = os.getenv(
+    "GRAPHQL_PERSISTED_QUERIES", os.path.join(os.path.dirname(__file__), "persisted_queries.json")
+)
+# With false, only the queries in GRAPHQL_PERSISTED_QUERIES can run
+GRAPHQL_ALLOW_ADHOC_QUERIES = os.getenv("GRAPHQL_ALLOW_ADHOC_QUERIES", "true").lower() == "true"
+
+
+def _field_cost(schema, parent_type, node: FieldNode, fragments, variables, multiplier: int, page):
+    field = parent_type.fields.get(node.name.value)
+    if field is None or node.selection_set is None:
+        # Scalars come with the object that holds them
+        return 0
+    size = None
+    if "first" in field.args:
+        first = next((arg for arg in node.arguments if arg.name.value == "first"), None)
+        size = pagination.page_size(value_from_ast_untyped(first.value, variables) if first else None)
+    count = multiplier
+    if isinstance(get_nullable_type(field.type), GraphQLList):
+        count *= size or page or GRAPHQL_LIST_SIZE_ESTIMATE
+        size = None
+    # A paged field that returns a page object passes its size on to the page's list
+    return count + _selection_cost(
+        schema, get_named_type(field.type), node.selection_set, fragments, variables, count, size
+    )
+
+
+def _selection_cost(schema, parent_type, selection_set, fragments, variables, multiplier: int, page=None):
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            if not selection.name.value.startswith("__"):
+                cost += _field_cost(schema, parent_type, selection, fragments, variables, multiplier, page)
+            continue
+        if isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is None:
+                continue
+            type_condition, selections = fragment.type_condition, fragment.selection_set
+        elif isinstance(selection, InlineFragmentNode):
+            type_condition, selections = selection.type_condition, selection.selection_set
+        else:
+            continue
+        fragment_type = schema.get_type(type_condition.name.value) if type_condition else parent_type
+        cost += _selection_cost(schema, fragment_type, selections, fragments, variables, multiplier, page)
+    return cost
+
+
+def query_cost(schema, document, variables=None, operation_name: Optional[str] = None) -> int:
+    """Estimate how many objects an operation would load.
+
+    Every object-typed field counts once per parent object. List fields
+    multiply by their `first` page size (or the page size of the paged field
+    above them) and otherwise by GRAPHQL_LIST_SIZE_ESTIMATE. Scalar fields
+    are free, so the cost tracks rows fetched rather than bytes returned.
+    """
+    variables = variables or {}
+    fragments = {}
+    operations = []
+    for definition in document.definitions:
+        if isinstance(definition, FragmentDefinitionNode):
+            fragments[definition.name.value] = definition
+        elif isinstance(definition, OperationDefinitionNode):
+            if operation_name is None or (definition.name and definition.name.value == operation_name):
+                operations.append(definition)
+    return sum(
+        _selection_cost(schema, schema.get_root_type(operation.operation), operation.selection_set,
+                        fragments, variables, 1)
+        for operation in operations
+    )
+
+
+class QueryCostLimiter(SchemaExtension):
+    """Refuse to execute operations whose query_cost() exceeds GRAPHQL_MAX_COST.
+
+    Runs after validation, once variables are known, so `first: $n` is
+    costed with the value actually sent.
+    """
+
+    def on_execute(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        cost = query_cost(
+            execution_context.schema._schema,
+            execution_context.graphql_document,
+            execution_context.variables,
+            execution_context.operation_name,
+        )
+        if cost > GRAPHQL_MAX_COST:
+            # A result set before executing makes Strawberry skip execution
+            execution_context.result = ExecutionResult(data=None, errors=[
+                GraphQLError(f"Query cost {cost} exceeds the maximum of {GRAPHQL_MAX_COST}")
+            ])
+        yield
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueries:
+    """Queries addressable by their sha256 hash, as in Apollo's persisted query protocol.
+
+    `known` is the allow-list loaded at startup. When ad-hoc queries are
+    allowed, clients may also register a query by sending it with its hash;
+    those are kept in a bounded LRU.
+    """
+
+    def __init__(self, known=None, allow_adhoc: bool = True, maxsize: int = GRAPHQL_DOCUMENT_CACHE_SIZE):
+        self.known = dict(known or {})
+        self.allow_adhoc = allow_adhoc
+        self.maxsize = maxsize
+        self.registered = OrderedDict()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs):
+        known = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                known = json.load(f)
+        return cls(known, **kwargs)
+
+    def lookup(self, sha256: str) -> Optional[str]:
+        query = self.known.get(sha256)
+        if query is None and sha256 in self.registered:
+            self.registered.move_to_end(sha256)
+            query = self.registered[sha256]
+        return query
+
+    def resolve(self, query: Optional[str], sha256: Optional[str]) -> Optional[str]:
+        """Return the query text to run, or raise a 400 for requests that can't run."""
+        if sha256 is None:
+            if query is not None and not self.allow_adhoc and query_hash(query) not in self.known:
+                raise HTTPException(400, "PersistedQueryNotAllowed")
+            return query
+        if query is None:
+            query = self.lookup(sha256)
+            if query is None:
+                raise HTTPException(400, "PersistedQueryNotFound")
+            return query
+        if query_hash(query) != sha256:
+            raise HTTPException(400, "provided sha does not match query")
+        if self.lookup(sha256) is None:
+            if not self.allow_adhoc:
+                raise HTTPException(400, "PersistedQueryNotAllowed")
+            self.registered[sha256] = query
+            if len(self.registered) > self.maxsize:
+                self.registered.popitem(last=False)
+        return query
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter that accepts `extensions.persistedQuery.sha256Hash` in place of the query text."""
+
+    def __init__(self, schema, persisted_queries: PersistedQueries, **kwargs):
+        super().__init__(schema, **kwargs)
+        self.persisted_queries = persisted_queries
+
+    def should_render_graphiql(self, request) -> bool:
+        # A GET carrying only a hash is a query, not a visit to GraphiQL
+        return "extensions" not in request.query_params and super().should_render_graphiql(request)
+
+    async def parse_http_body(self, request):
+        request_data = await super().parse_http_body(request)
+        if request.method == "GET":
+            extensions = request.query_params.get("extensions")
+        elif "application/json" in (request.content_type or ""):
+            body = self.parse_json(await request.get_body())
+            extensions = body.get("extensions") if isinstance(body, dict) else None
+        else:
+            extensions = None
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HTTPException(400, "Unable to parse extensions as JSON")
+        persisted = (extensions or {}).get("persistedQuery") or {}
+        request_data.query = self.persisted_queries.resolve(request_data.query, persisted.get("sha256Hash"))
+        return request_data
@@ -1,8 +1,65 @@
 import strawberry
+from collections import defaultdict
+from types import SimpleNamespace
+from fastapi import Depends
 from typing import List, Optional
 from datetime import datetime
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from strawberry.dataloader import DataLoader
+from strawberry.extensions import ParserCache, QueryDepthLimiter, ValidationCache
+from strawberry.types import Info
+from database import get_async_db
+from graphql_extensions import GRAPHQL_DOCUMENT_CACHE_SIZE, GRAPHQL_MAX_DEPTH, QueryCostLimiter
+import live
 import models
+import pagination
+import submissions as submissions_module
+
+# Nested fields are resolved through per-request DataLoaders rather than
+# relationship loads, so a page of surveys costs one query per level no matter
+# how many surveys, questions or responses it holds
+
+def _group_by(rows, attribute: str, keys):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[getattr(row, attribute)].append(row)
+    return [groups[key] for key in keys]
+
+async def _load_questions(db: AsyncSession, survey_ids):
+    rows = await db.scalars(
+        select(models.Question)
+        .where(models.Question.survey_id.in_(survey_ids))
+        .order_by(models.Question.order, models.Question.id)
+    )
+    return _group_by(rows, "survey_id", survey_ids)
+
+async def _load_options(db: AsyncSession, question_ids):
+    rows = await db.scalars(
+        select(models.QuestionOption)
+        .where(models.QuestionOption.question_id.in_(question_ids))
+        .order_by(models.QuestionOption.id)
+    )
+    return _group_by(rows, "question_id", question_ids)
+
+async def _load_answers(db: AsyncSession, response_ids):
+    rows = await db.scalars(
+        select(models.Answer)
+        .options(selectinload(models.Answer.option))
+        .where(models.Answer.response_id.in_(response_ids))
+        .order_by(models.Answer.id)
+    )
+    return _group_by(rows, "response_id", response_ids)
+
+async def get_context(db: AsyncSession = Depends(get_async_db)):
+    """Request-scoped session and loaders; FastAPI closes the session after the response."""
+    return {
+        "db": db,
+        "questions_by_survey": DataLoader(load_fn=lambda keys: _load_questions(db, keys)),
+        "options_by_question": DataLoader(load_fn=lambda keys: _load_options(db, keys)),
+        "answers_by_response": DataLoader(load_fn=lambda keys: _load_answers(db, keys)),
+    }
 
 @strawberry.type
 class QuestionOption:
@@ -16,7 +73,10 @@ class Question:
     text: str
     is_open_ended: bool
     survey_id: int
-    options: List[QuestionOption]
+
+    @strawberry.field
+    async def options(self, info: Info) -> List[QuestionOption]:
+        return await info.context["options_by_question"].load(self.id)
 
 @strawberry.type
 class Survey:
@@ -24,64 +84,135 @@ class Survey:
     title: str
     description: Optional[str]
     is_active: bool
-    questions: List[Question]
+    updated_at: Optional[datetime]
+
+    @strawberry.field
+    async def questions(self, info: Info) -> List[Question]:
+        return await info.context["questions_by_survey"].load(self.id)
 
 @strawberry.type
 class Answer:
     id: int
-    text: str
     question_id: int
     response_id: int
+    option_id: Optional[int]
+
+    @strawberry.field
+    def text(self) -> Optional[str]:
+        # The chosen option's text for choice questions
+        return self.answer
 
 @strawberry.type
 class Response:
     id: int
     survey_id: int
-    submitted_at: str
-    answers: List[Answer]
+
+    @strawberry.field
+    def submitted_at(self) -> Optional[datetime]:
+        return self.created_at
+
+    @strawberry.field
+    async def answers(self, info: Info) -> List[Answer]:
+        # Freshly submitted responses come with their answers; stored ones go through the loader
+        answers = vars(self).get("answers")
+        if answers is None:
+            answers = await info.context["answers_by_response"].load(self.id)
+        return answers
+
+@strawberry.type
+class SurveyPage:
+    items: List[Survey]
+    next_cursor: Optional[str]
+
+@strawberry.type
+class ResponsePage:
+    items: List[Response]
+    next_cursor: Optional[str]
+
+async def surveys_page(db: AsyncSession, first: Optional[int], after: Optional[str]):
+    limit = pagination.page_size(first)
+    stmt = pagination.keyset(select(models.Survey), models.Survey, after, limit)
+    return pagination.page(await db.execute(stmt), limit)
+
+async def responses_page(db: AsyncSession, survey_id: int, first: Optional[int], after: Optional[str]):
+    limit = pagination.page_size(first)
+    stmt = select(models.Response).where(models.Response.survey_id == survey_id)
+    return pagination.page(await db.execute(pagination.keyset(stmt, models.Response, after, limit)), limit)
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def get_surveys(self) -> List[Survey]:
-        db = next(get_db())
-        surveys = db.query(models.Survey).all()
+    async def get_surveys(self, info: Info, first: Optional[int] = None, after: Optional[str] = None) -> List[Survey]:
+        surveys, _ = await surveys_page(info.context["db"], first, after)
         return surveys
 
     @strawberry.field
-    def get_survey(self, id: int) -> Optional[Survey]:
-        db = next(get_db())
-        survey = db.query(models.Survey).filter(models.Survey.id == id).first()
-        return survey
+    async def surveys_page(self, info: Info, first: Optional[int] = None, after: Optional[str] = None) -> SurveyPage:
+        surveys, next_cursor = await surveys_page(info.context["db"], first, after)
+        return SurveyPage(items=surveys, next_cursor=next_cursor)
+
+    @strawberry.field
+    async def get_survey(self, info: Info, id: int) -> Optional[Survey]:
+        return await info.context["db"].get(models.Survey, id)
 
     @strawberry.field
-    def get_survey_responses(self, survey_id: int) -> List[Response]:
-        db = next(get_db())
-        responses = db.query(models.Response).filter(models.Response.survey_id == survey_id).all()
+    async def get_survey_responses(
+        self, info: Info, survey_id: int, first: Optional[int] = None, after: Optional[str] = None
+    ) -> List[Response]:
+        responses, _ = await responses_page(info.context["db"], survey_id, first, after)
         return responses
 
+    @strawberry.field
+    async def survey_responses_page(
+        self, info: Info, survey_id: int, first: Optional[int] = None, after: Optional[str] = None
+    ) -> ResponsePage:
+        responses, next_cursor = await responses_page(info.context["db"], survey_id, first, after)
+        return ResponsePage(items=responses, next_cursor=next_cursor)
+
+@strawberry.input
+class AnswerInput:
+    question_id: int
+    answer: str
+
+@strawberry.input
+class SubmissionInput:
+    answers: List[AnswerInput]
+
+def _submitted(rows):
+    # insert_submissions() returns plain dicts; give them the attributes the types resolve
+    return [
+        SimpleNamespace(**{**row, "answers": [SimpleNamespace(**answer, response_id=row["id"]) for answer in row["answers"]]})
+        for row in rows
+    ]
+
+async def submit(db: AsyncSession, survey_id: int, submissions: List[SubmissionInput]):
+    if len(submissions) > submissions_module.MAX_SUBMISSIONS_PER_BATCH:
+        raise ValueError(f"At most {submissions_module.MAX_SUBMISSIONS_PER_BATCH} submissions per request")
+    questions = await db.run_sync(submissions_module.cached_survey_questions, survey_id)
+    if questions is None:
+        raise ValueError("Survey not found")
+    # Validate everything first so one bad submission rejects the whole batch
+    resolved = [submissions_module.resolve_answers(submission.answers, questions) for submission in submissions]
+    rows = await db.run_sync(submissions_module.insert_submissions, survey_id, resolved)
+    await db.commit()
+    live.publish_submissions(survey_id, resolved)
+    return _submitted(rows)
+
 @strawberry.type
 class Mutation:
     @strawberry.mutation
-    def submit_response(self, survey_id: int, answers: List[str]) -> Response:
-        db = next(get_db())
-        response = models.Response(
-            survey_id=survey_id,
-            submitted_at=datetime.utcnow().isoformat()
-        )
-        db.add(response)
-        db.flush()
-
-        for i, answer_text in enumerate(answers):
-            answer = models.Answer(
-                response_id=response.id,
-                question_id=i + 1,  # Assuming question IDs are sequential
-                text=answer_text
-            )
-            db.add(answer)
-
-        db.commit()
-        db.refresh(response)
+    async def submit_responses(self, info: Info, survey_id: int, submissions: List[SubmissionInput]) -> List[Response]:
+        """Store many submissions of one survey in a single transaction, e.g. an offline kiosk syncing its queue."""
+        return await submit(info.context["db"], survey_id, submissions)
+
+    @strawberry.mutation
+    async def submit_response(self, info: Info, survey_id: int, answers: List[AnswerInput]) -> Response:
+        [response] = await submit(info.context["db"], survey_id, [SubmissionInput(answers=answers)])
         return response
 
-schema = strawberry.Schema(query=Query, mutation=Mutation) 
\ No newline at end of file
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[
+    QueryDepthLimiter(max_depth=GRAPHQL_MAX_DEPTH),
+    ParserCache(maxsize=GRAPHQL_DOCUMENT_CACHE_SIZE),
+    ValidationCache(maxsize=GRAPHQL_DOCUMENT_CACHE_SIZE),
+    QueryCostLimiter,
+]) 
\ No newline at end of file
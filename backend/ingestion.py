@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import threading
+from itertools import groupby
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+import live
+import models
+import schemas
+import submissions
+
+logger = logging.getLogger(__name__)
+
+# "sync" writes submissions inside the request, "queue" acknowledges with 202
+# and lets the background worker group-commit them
+INGESTION_MODE = os.getenv("INGESTION_MODE", "sync")
+INGESTION_FLUSH_INTERVAL = float(os.getenv("INGESTION_FLUSH_INTERVAL", "0.5"))
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", "200"))
+
+
+def queue_enabled() -> bool:
+    return INGESTION_MODE == "queue"
+
+
+def enqueue(db: Session, survey_id: int, responses) -> int:
+    """Queue a validated submission and return its queue id; durable once the caller commits."""
+    payload = json.dumps([{"question_id": r.question_id, "answer": r.answer} for r in responses])
+    result = db.execute(insert(models.PendingSubmission).values(survey_id=survey_id, payload=payload))
+    return result.inserted_primary_key[0]
+
+
+def flush_pending(batch_size: int = None) -> int:
+    """Ingest up to batch_size queued submissions in a single transaction.
+
+    Returns the number of queue entries consumed.
+    """
+    db = SessionLocal()
+    try:
+        # Claim the entries by deleting them first: with several worker
+        # processes flushing, each entry goes to exactly one transaction
+        pending = db.execute(
+            delete(models.PendingSubmission)
+            .where(models.PendingSubmission.id.in_(
+                select(models.PendingSubmission.id)
+                .order_by(models.PendingSubmission.id)
+                .limit(batch_size or INGESTION_BATCH_SIZE)
+            ))
+            .returning(models.PendingSubmission.id, models.PendingSubmission.survey_id, models.PendingSubmission.payload)
+        ).all()
+        if not pending:
+            return 0
+
+        by_survey = sorted(pending, key=lambda entry: (entry.survey_id, entry.id))
+        ingested = []
+        for survey_id, entries in groupby(by_survey, key=lambda entry: entry.survey_id):
+            questions = submissions.survey_questions(db, survey_id)
+            if questions is None:
+                # The survey was deleted while the submission was queued
+                continue
+            # Answers whose question or option changed while queued are dropped
+            batch = [
+                submissions.resolve_answers(
+                    [schemas.ResponseCreate(**answer) for answer in json.loads(entry.payload)], questions, strict=False
+                )
+                for entry in entries
+            ]
+            submissions.insert_submissions(db, survey_id, batch)
+            ingested.append((survey_id, batch))
+
+        db.commit()
+        for survey_id, batch in ingested:
+            live.publish_submissions(survey_id, batch)
+        return len(pending)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class IngestionWorker:
+    def __init__(self, flush_interval: float = INGESTION_FLUSH_INTERVAL, batch_size: int = INGESTION_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ingestion-worker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # Keep flushing while full batches are waiting, then sleep
+                while flush_pending(self.batch_size) == self.batch_size:
+                    pass
+            except Exception:
+                logger.exception("Failed to ingest queued submissions")
+            self._stop.wait(self.flush_interval)
+
+    def drain(self):
+        while flush_pending(self.batch_size):
+            pass
+
+    def stop(self):
+        """Stop the worker and ingest everything still in the queue."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.drain()
+
+
+worker = IngestionWorker()
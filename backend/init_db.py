@@ -1,13 +1,14 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from database import Base, engine
+from database import engine
+import migrations
 import models
 from auth import get_password_hash
 
 def init_db():
     print("Creating database tables...")
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade the schema
+    migrations.migrate(engine, log=print)
     
     # Create a session
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -37,7 +38,7 @@ def init_db():
     finally:
         db.close()
 
-# NOTE: If you have an existing database, you may need to delete it and re-run this script to add the is_active column to the Survey table.
+# NOTE: Re-running this script upgrades an existing database in place; see migrate.py.
 
 if __name__ == "__main__":
     init_db() 
\ No newline at end of file
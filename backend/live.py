@@ -0,0 +1,101 @@
+"""Live analytics over Server-Sent Events.
+
+Every committed batch of submissions publishes its tally delta on the
+survey's pubsub channel. A stream coalesces the deltas that arrive within
+SSE_MIN_INTERVAL of its last event into one, so a burst of submissions
+costs each subscriber at most one event per interval.
+
+A stream sends:
+- `ready` once subscribed: (re)load the analytics, then apply deltas
+- `tallies` with {"responses": n, "options": {question_id: {option text: n}},
+  "answers": {question_id: n}} to add to the loaded analytics
+- `resync` after falling too far behind: reload the analytics
+"""
+import asyncio
+import json
+import os
+import time
+
+import pubsub
+
+# Shortest gap between two tally events of one stream, in seconds
+SSE_MIN_INTERVAL = float(os.getenv("SSE_MIN_INTERVAL", "1.0"))
+# Comment line sent when nothing happens, so proxies keep the connection open
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+# Streams end after this long; EventSource reconnects, which re-checks the token
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "600"))
+# Reconnect delay suggested to clients, in milliseconds
+SSE_RETRY_MS = 3000
+
+
+def channel(survey_id: int) -> str:
+    return f"survey:{survey_id}:tallies"
+
+
+def tally_delta(submissions):
+    """Sum resolved submissions (see submissions.resolve_answers) into one delta."""
+    options, answers = {}, {}
+    for submission in submissions:
+        for answer in submission:
+            question_id = str(answer["question_id"])
+            if answer["option_id"] is not None:
+                counts = options.setdefault(question_id, {})
+                counts[answer["answer"]] = counts.get(answer["answer"], 0) + 1
+            else:
+                answers[question_id] = answers.get(question_id, 0) + 1
+    return {"responses": len(submissions), "options": options, "answers": answers}
+
+
+def merge(total, delta):
+    total["responses"] += delta["responses"]
+    for question_id, counts in delta["options"].items():
+        merged = total["options"].setdefault(question_id, {})
+        for option, count in counts.items():
+            merged[option] = merged.get(option, 0) + count
+    for question_id, count in delta["answers"].items():
+        total["answers"][question_id] = total["answers"].get(question_id, 0) + count
+    return total
+
+
+def publish_submissions(survey_id: int, submissions):
+    """Announce committed submissions; call only after the transaction commits."""
+    if submissions:
+        pubsub.broker.publish(channel(survey_id), tally_delta(submissions))
+
+
+def _event(name: str, data) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream(subscription, min_interval: float = None, heartbeat: float = None, max_seconds: float = None):
+    """Yield the Server-Sent Events text of a subscription until max_seconds pass."""
+    min_interval = SSE_MIN_INTERVAL if min_interval is None else min_interval
+    heartbeat = SSE_HEARTBEAT_INTERVAL if heartbeat is None else heartbeat
+    deadline = time.monotonic() + (SSE_MAX_STREAM_SECONDS if max_seconds is None else max_seconds)
+    last_sent = float("-inf")
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n" + _event("ready", {})
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = await subscription.get(timeout=min(heartbeat, remaining))
+            if message is None and not subscription.overflowed:
+                yield ": keepalive\n\n"
+                continue
+            # Let the rest of a burst arrive, then send it as one event
+            wait = min(last_sent + min_interval - time.monotonic(), deadline - time.monotonic())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            pending = ([message] if message is not None else []) + subscription.drain()
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield _event("resync", {})
+            else:
+                total = tally_delta([])
+                for delta in pending:
+                    merge(total, delta)
+                yield _event("tallies", total)
+            last_sent = time.monotonic()
+    finally:
+        subscription.close()
@@ -1,15 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import strawberry
-from strawberry.fastapi import GraphQLRouter
 from typing import List, Optional
 import uvicorn
-from database import engine, Base
 from routes import router
-from graphql_schema import schema
+from graphql_extensions import GRAPHQL_ALLOW_ADHOC_QUERIES, GRAPHQL_PERSISTED_QUERIES, PersistedQueries, PersistedQueryRouter
+from graphql_schema import get_context, schema
+import cache_sync
+import ingestion
+import migrations
+import pubsub
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Bring the database schema up to date; serve.py does this once for all its workers
+if migrations.MIGRATE_ON_STARTUP:
+    migrations.migrate()
 
 app = FastAPI(title="Customer Feedback System API")
 
@@ -27,19 +31,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"],
 )
 
 # Include REST API routes
 app.include_router(router, prefix="/api")
 
 # Include GraphQL routes
-graphql_app = GraphQLRouter(schema)
+graphql_app = PersistedQueryRouter(
+    schema,
+    persisted_queries=PersistedQueries.from_file(
+        GRAPHQL_PERSISTED_QUERIES, allow_adhoc=GRAPHQL_ALLOW_ADHOC_QUERIES
+    ),
+    context_getter=get_context,
+)
 app.include_router(graphql_app, prefix="/graphql")
 
+# Write-behind ingestion worker for queued survey submissions
+@app.on_event("startup")
+def start_ingestion_worker():
+    if ingestion.queue_enabled():
+        ingestion.worker.start()
+
+@app.on_event("shutdown")
+def drain_ingestion_queue():
+    if ingestion.queue_enabled():
+        ingestion.worker.stop()
+
+# Replay cache invalidations made by other worker processes
+@app.on_event("startup")
+def start_cache_sync():
+    if cache_sync.enabled():
+        cache_sync.worker.start()
+
+@app.on_event("shutdown")
+def stop_cache_sync():
+    if cache_sync.enabled():
+        cache_sync.worker.stop()
+
+# Deliver live analytics published by other worker processes
+@app.on_event("startup")
+def start_pubsub():
+    pubsub.broker.start()
+
+@app.on_event("shutdown")
+def stop_pubsub():
+    pubsub.broker.stop()
+
 # Basic health check endpoint
 @app.get("/")
 async def root():
     return {"message": "Customer Feedback System API is running"}
 
 if __name__ == "__main__":
+    # Development server; run serve.py in production
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,22 @@
+import argparse
+
+import migrations
+
+
+def status():
+    applied = migrations.applied_versions()
+    for version, name, _ in migrations.MIGRATIONS:
+        state = "applied" if version in applied else "pending"
+        print(f"{version:>4}  {state:<8} {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending database schema migrations")
+    parser.add_argument("--target", type=int, default=None, help="Stop after this migration version")
+    parser.add_argument("--status", action="store_true", help="List migrations and exit")
+    args = parser.parse_args()
+    if args.status:
+        status()
+    else:
+        applied = migrations.migrate(target=args.target, log=print)
+        print(f"Applied {len(applied)} migration(s)." if applied else "Database is up to date.")
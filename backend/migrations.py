@@ -0,0 +1,301 @@
+"""Versioned schema migrations.
+
+Each migration is a function of the engine, registered in order with
+@migration(version, name). Applied versions are recorded in the
+schema_migrations table, so `migrate()` only runs what a database is
+missing. Migrations check the live schema before changing it, which lets
+them run against databases created by any earlier version of the app,
+including ones that were built with plain create_all.
+
+Migrations are written to stay online: each step commits on its own,
+backfills work through the data in MIGRATION_CHUNK_SIZE-row transactions,
+and PostgreSQL indexes are built CONCURRENTLY so writes keep flowing.
+"""
+import os
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, bindparam, delete, func, insert, inspect, select, text,
+)
+from sqlalchemy.schema import CreateIndex
+
+from database import Base, SessionLocal, engine as default_engine
+import models
+import rollups
+import search
+import tallies
+import terms
+
+MIGRATION_CHUNK_SIZE = int(os.getenv("MIGRATION_CHUNK_SIZE", "10000"))
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+MIGRATIONS = []
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        assert not MIGRATIONS or version > MIGRATIONS[-1][0], "migrations must be registered in order"
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+
+def _has_column(engine, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def _add_column(engine, table: str, column: str, ddl: str):
+    if _has_column(engine, table, column):
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _create_index(engine, index):
+    schema = inspect(engine)
+    if index.name in {ix["name"] for ix in schema.get_indexes(index.table.name)}:
+        return
+    if not {column.name for column in index.columns} <= {c["name"] for c in schema.get_columns(index.table.name)}:
+        # Its columns are added by a later migration, which creates it then
+        return
+    ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+    if engine.dialect.name == "postgresql":
+        # Build without blocking writes; CONCURRENTLY can't run inside a transaction
+        ddl = ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(ddl)
+    else:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(ddl)
+
+
+@migration(1, "create tables")
+def create_tables(engine):
+    # Only creates tables that don't exist yet; fresh databases get the full schema here
+    Base.metadata.create_all(bind=engine)
+
+
+@migration(2, "add surveys.is_active")
+def add_survey_is_active(engine):
+    # A constant default is a metadata-only change on SQLite and PostgreSQL 11+
+    default = "true" if engine.dialect.name == "postgresql" else "1"
+    _add_column(engine, "surveys", "is_active", f"BOOLEAN NOT NULL DEFAULT {default}")
+
+
+@migration(3, "create missing indexes")
+def create_missing_indexes(engine):
+    # create_all only builds indexes together with a new table
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            _create_index(engine, index)
+
+
+@migration(4, "backfill option tallies")
+def backfill_option_tallies(engine, chunk_size: int = None):
+    chunk_size = chunk_size or MIGRATION_CHUNK_SIZE
+    if not _has_column(engine, "answers", "option_id"):
+        # Legacy answers only reference options from migration 5 on, which
+        # rebuilds the tallies once it has folded them
+        return
+    with SessionLocal(bind=engine) as db:
+        # Tallies are maintained on submit; only databases that predate them need a backfill
+        if db.execute(select(models.OptionTally.survey_id).limit(1)).first() is not None:
+            return
+        first_id, last_id = db.execute(select(func.min(models.Answer.id), func.max(models.Answer.id))).one()
+        if first_id is None:
+            return
+        # Answers submitted after this point are tallied by the running app
+        for start in range(first_id, last_id + 1, chunk_size):
+            tallies.add_answer_range(db, start, min(start + chunk_size - 1, last_id))
+            db.commit()
+
+
+def _submissions(rows):
+    """Split legacy one-answer-per-row responses, in id order, into submissions.
+
+    Answers saved by one request share survey and timestamp and never repeat
+    a question, so a change in either or a repeated question starts the next
+    submission.
+    """
+    groups = []
+    for row in rows:
+        group = groups[-1] if groups else None
+        if (group is None or row.survey_id != group[0].survey_id or row.created_at != group[0].created_at
+                or row.question_id in {r.question_id for r in group}):
+            groups.append([row])
+        else:
+            group.append(row)
+    return groups
+
+
+def _fold_legacy_responses(engine, chunk_size: int):
+    """Rewrite legacy responses into one row per submission, chunk by chunk.
+
+    The first row of each submission becomes the submission; its siblings'
+    answers move to it as Answer rows (by option id for choices) and the
+    siblings are deleted. Folded rows have question_id cleared, which is what
+    marks them done.
+    """
+    with engine.connect() as conn:
+        open_ended = set(conn.execute(
+            select(models.Question.id).where(models.Question.is_open_ended == True)  # noqa: E712
+        ).scalars())
+        options = {
+            (question_id, option_text): option_id
+            for option_id, question_id, option_text in conn.execute(
+                select(models.QuestionOption.id, models.QuestionOption.question_id, models.QuestionOption.text)
+            )
+        }
+    ids = bindparam("ids", expanding=True)
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT id, survey_id, question_id, answer, created_at FROM responses "
+                    "WHERE question_id IS NOT NULL AND id > :last_id ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": chunk_size},
+            ).all()
+            if not rows:
+                return
+            groups = _submissions(rows)
+            if len(rows) == chunk_size and len(groups) > 1:
+                # The last submission may continue in the next chunk
+                groups.pop()
+            folded = [row.id for group in groups for row in group]
+            answers = []
+            for group in groups:
+                for row in group:
+                    option_id = None if row.question_id in open_ended else options.get((row.question_id, row.answer))
+                    answers.append({
+                        "response_id": group[0].id,
+                        "question_id": row.question_id,
+                        "option_id": option_id,
+                        # Answers that match no option keep their text
+                        "text": row.answer if option_id is None else None,
+                    })
+            conn.execute(delete(models.Answer).where(models.Answer.response_id.in_(folded)))
+            conn.execute(insert(models.Answer), answers)
+            conn.execute(
+                text("UPDATE responses SET question_id = NULL, answer = NULL WHERE id IN :ids").bindparams(ids),
+                {"ids": [group[0].id for group in groups]},
+            )
+            siblings = [row.id for group in groups for row in group[1:]]
+            if siblings:
+                conn.execute(delete(models.Response).where(models.Response.id.in_(siblings)))
+            last_id = folded[-1]
+
+
+def _rebuild_tallies(engine, chunk_size: int):
+    with engine.begin() as conn:
+        if _has_column(engine, "option_tallies", "option_text"):
+            # Tallies used to be keyed by option text; they're derived data, so start over
+            conn.exec_driver_sql("DROP TABLE option_tallies")
+            models.OptionTally.__table__.create(bind=conn)
+        else:
+            conn.execute(delete(models.OptionTally))
+        # Answers submitted after this point are tallied by the running app
+        first_id, last_id = conn.execute(select(func.min(models.Answer.id), func.max(models.Answer.id))).one()
+    if first_id is None:
+        return
+    with SessionLocal(bind=engine) as db:
+        for start in range(first_id, last_id + 1, chunk_size):
+            tallies.add_answer_range(db, start, min(start + chunk_size - 1, last_id))
+            db.commit()
+
+
+@migration(5, "one response per submission")
+def normalize_responses(engine):
+    _add_column(engine, "answers", "option_id", "INTEGER REFERENCES question_options (id)")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_responses_survey_question_answer")
+    # The legacy responses.question_id and answer columns stay behind, unused
+    # and cleared, since SQLite can't drop a foreign key column in place
+    if _has_column(engine, "responses", "question_id"):
+        _fold_legacy_responses(engine, MIGRATION_CHUNK_SIZE)
+        _rebuild_tallies(engine, MIGRATION_CHUNK_SIZE)
+    create_missing_indexes(engine)
+
+
+@migration(6, "full-text search over answers")
+def create_answer_search(engine):
+    search.create_search_index(engine, MIGRATION_CHUNK_SIZE)
+
+
+@migration(7, "count answer terms")
+def count_answer_terms(engine):
+    models.TermCount.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        # Start over after an interrupted backfill; answers submitted after
+        # this point are counted by the running app
+        conn.execute(delete(models.TermCount))
+        first_id, last_id = conn.execute(select(func.min(models.Answer.id), func.max(models.Answer.id))).one()
+    if first_id is None:
+        return
+    with SessionLocal(bind=engine) as db:
+        for start in range(first_id, last_id + 1, MIGRATION_CHUNK_SIZE):
+            terms.add_answer_range(db, start, min(start + MIGRATION_CHUNK_SIZE - 1, last_id))
+            db.commit()
+
+
+@migration(8, "response rollups")
+def backfill_response_rollups(engine):
+    models.ResponseRollup.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        # As in migration 7: start over, and leave new responses to the running app
+        conn.execute(delete(models.ResponseRollup))
+        first_id, last_id = conn.execute(select(func.min(models.Response.id), func.max(models.Response.id))).one()
+    if first_id is None:
+        return
+    with SessionLocal(bind=engine) as db:
+        for start in range(first_id, last_id + 1, MIGRATION_CHUNK_SIZE):
+            rollups.add_response_range(db, start, min(start + MIGRATION_CHUNK_SIZE - 1, last_id))
+            db.commit()
+
+
+@migration(9, "cache invalidations")
+def create_cache_invalidations(engine):
+    # Rows are only kept for CACHE_SYNC_RETENTION, so a table from before
+    # AUTOINCREMENT was declared can simply be replaced
+    models.CacheInvalidation.__table__.drop(bind=engine, checkfirst=True)
+    models.CacheInvalidation.__table__.create(bind=engine)
+
+
+@migration(10, "pubsub messages")
+def create_pubsub_messages(engine):
+    models.PubsubMessage.__table__.create(bind=engine, checkfirst=True)
+
+
+def applied_versions(engine=default_engine):
+    schema_migrations.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine=default_engine, target: int = None):
+    applied = applied_versions(engine)
+    return [
+        (version, name, fn) for version, name, fn in MIGRATIONS
+        if version not in applied and (target is None or version <= target)
+    ]
+
+
+def migrate(engine=default_engine, target: int = None, log=None):
+    """Apply pending migrations up to `target` (default: all); return the versions applied."""
+    done = []
+    for version, name, fn in pending_migrations(engine, target):
+        if log:
+            log(f"Applying migration {version}: {name}")
+        fn(engine)
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(version=version, name=name))
+        done.append(version)
+    return done
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, DateTime, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -15,6 +15,10 @@ class User(Base):
 
 class Survey(Base):
     __tablename__ = "surveys"
+    __table_args__ = (
+        # Keyset pagination of a user's surveys by (created_at, id)
+        Index("ix_surveys_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -36,7 +40,7 @@ class Question(Base):
     text = Column(Text)
     is_open_ended = Column(Boolean, default=False)
     order = Column(Integer)
-    survey_id = Column(Integer, ForeignKey("surveys.id"))
+    survey_id = Column(Integer, ForeignKey("surveys.id"), index=True)
     
     survey = relationship("Survey", back_populates="questions")
     options = relationship("QuestionOption", back_populates="question", cascade="all, delete-orphan")
@@ -47,29 +51,116 @@ class QuestionOption(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text)
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id"), index=True)
     
     question = relationship("Question", back_populates="options")
 
 class Response(Base):
     __tablename__ = "responses"
+    __table_args__ = (
+        # Keyset pagination and CSV export of a survey's responses by (created_at, id)
+        Index("ix_responses_survey_created", "survey_id", "created_at", "id"),
+    )
 
+    # One row per submission; the answers themselves are Answer rows
     id = Column(Integer, primary_key=True, index=True)
     survey_id = Column(Integer, ForeignKey("surveys.id"))
-    question_id = Column(Integer, ForeignKey("questions.id"))
-    answer = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     survey = relationship("Survey", back_populates="responses")
-    answers = relationship("Answer", back_populates="response")
+    answers = relationship("Answer", back_populates="response", cascade="all, delete-orphan")
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        # Option counts and open-ended answers per question
+        Index("ix_answers_question_option", "question_id", "option_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    response_id = Column(Integer, ForeignKey("responses.id"))
+    response_id = Column(Integer, ForeignKey("responses.id"), index=True)
     question_id = Column(Integer, ForeignKey("questions.id"))
-    text = Column(Text)  # For both open-ended and multiple choice answers
+    option_id = Column(Integer, ForeignKey("question_options.id"))  # Choice questions
+    text = Column(Text)  # Open-ended questions
     
     response = relationship("Response", back_populates="answers")
-    question = relationship("Question", back_populates="answers") 
\ No newline at end of file
+    question = relationship("Question", back_populates="answers")
+    option = relationship("QuestionOption")
+
+    @property
+    def answer(self):
+        if self.option_id is None:
+            return self.text
+        # Only missing if an edit removed it while the answer was being stored
+        return self.option.text if self.option is not None else ""
+
+class OptionTally(Base):
+    __tablename__ = "option_tallies"
+
+    # Running count of answers per option, maintained on submission
+    option_id = Column(Integer, ForeignKey("question_options.id"), primary_key=True)
+    survey_id = Column(Integer, ForeignKey("surveys.id"), index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"))
+    count = Column(Integer, nullable=False, default=0) 
+
+class TermCount(Base):
+    __tablename__ = "term_counts"
+    __table_args__ = (
+        # Top terms of a question, most frequent first
+        Index("ix_term_counts_top", "question_id", "n", "count", "term"),
+    )
+
+    # Number of open-ended answers to a question containing a word (n=1) or
+    # word pair (n=2), maintained on submission
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    term = Column(String, primary_key=True)
+    n = Column(Integer, nullable=False)
+    survey_id = Column(Integer, ForeignKey("surveys.id"), index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ResponseRollup(Base):
+    __tablename__ = "response_rollups"
+
+    # Answers per hour or day bucket (its UTC start), maintained on submission.
+    # question_id 0 counts submissions and option_id 0 a question's text
+    # answers, so neither references a row
+    survey_id = Column(Integer, ForeignKey("surveys.id"), primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    question_id = Column(Integer, primary_key=True)
+    option_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class PendingSubmission(Base):
+    __tablename__ = "pending_submissions"
+
+    # Write-behind queue for accepted but not yet ingested submissions
+    id = Column(Integer, primary_key=True, index=True)
+    survey_id = Column(Integer, ForeignKey("surveys.id"))
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+
+    # Cache entries dropped by one worker process, replayed by the others
+    # (see cache_sync); pruned after CACHE_SYNC_RETENTION. AUTOINCREMENT so
+    # SQLite never hands out an id again after pruning empties the table
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    cache = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class PubsubMessage(Base):
+    __tablename__ = "pubsub_messages"
+
+    # Messages of pubsub.DatabaseBroker, delivered by every worker process to
+    # its own subscribers; pruned after PUBSUB_RETENTION
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
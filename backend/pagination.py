@@ -0,0 +1,67 @@
+import base64
+import json
+import os
+
+from sqlalchemy import String, literal, tuple_, type_coerce
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def page_size(first) -> int:
+    """Clamp a GraphQL `first` argument to [1, MAX_PAGE_SIZE]; None means the default."""
+    if first is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(first, MAX_PAGE_SIZE))
+
+
+def encode_cursor(created_at, row_id: int) -> str:
+    raw = json.dumps([str(created_at), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return str(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset(stmt, model, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Page `stmt` over `model` by (created_at, id), starting after `cursor`.
+
+    The cursor keeps created_at exactly as the database stored it (the
+    column is read back through type_coerce), so equality on the sort key
+    still holds on SQLite, where CURRENT_TIMESTAMP text and bound Python
+    datetimes are formatted differently. One extra row is fetched to tell
+    whether there is a next page.
+    """
+    stmt = (
+        stmt.add_columns(type_coerce(model.created_at, String).label("cursor_created_at"))
+        .order_by(model.created_at, model.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(model.created_at, model.id) > tuple_(literal(created_at, String), literal(row_id))
+        )
+    return stmt
+
+
+def page(rows, limit: int):
+    """Split keyset() result rows into (objects, next_cursor)."""
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.cursor_created_at, last[0].id)
+    return [row[0] for row in rows], next_cursor
@@ -0,0 +1,29 @@
+import argparse
+import json
+import os
+import re
+
+from graphql_extensions import GRAPHQL_PERSISTED_QUERIES, query_hash
+
+FRONTEND_QUERIES = os.path.join(os.path.dirname(__file__), "..", "frontend", "src", "lib", "graphql.ts")
+# export const NAME = `...`; the text must hash the same on both sides, so no ${} interpolation
+QUERY_CONSTANT = re.compile(r"export const \w+ = `([^`]*)`;")
+
+
+def collect(source_path: str):
+    with open(source_path) as f:
+        queries = [query for query in QUERY_CONSTANT.findall(f.read()) if "${" not in query]
+    return {query_hash(query): query for query in queries}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the frontend's GraphQL queries to the persisted query allow-list")
+    parser.add_argument("--source", default=FRONTEND_QUERIES)
+    parser.add_argument("--output", default=GRAPHQL_PERSISTED_QUERIES)
+    args = parser.parse_args()
+
+    queries = collect(args.source)
+    with open(args.output, "w") as f:
+        json.dump(queries, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {len(queries)} persisted queries to {args.output}")
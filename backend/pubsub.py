@@ -0,0 +1,197 @@
+"""Publish/subscribe by channel name.
+
+`broker` is the process-wide instance, chosen by PUBSUB_BACKEND. The
+default InProcessBroker reaches subscribers in the same process only, which
+is what a single worker needs; DatabaseBroker reaches every worker process
+sharing the database. Any other Broker implementation (for example one
+backed by Redis) can be assigned at startup.
+"""
+import asyncio
+import json
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from sqlalchemy import insert
+
+from database import engine
+from table_log import TableFollower
+import models
+
+# "memory": this process only; "database": every worker process, through the
+# pubsub_messages table (serve.py's default with several workers)
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "memory")
+# Messages a subscriber may fall behind by before it is told to resync
+PUBSUB_QUEUE_SIZE = int(os.getenv("PUBSUB_QUEUE_SIZE", "1000"))
+# How often DatabaseBroker looks for new messages, and how long it keeps them
+PUBSUB_POLL_INTERVAL = float(os.getenv("PUBSUB_POLL_INTERVAL", "0.5"))
+PUBSUB_RETENTION = float(os.getenv("PUBSUB_RETENTION", "300"))
+
+
+class Subscription:
+    """Messages of one channel for one subscriber, in publish order.
+
+    When more than `maxsize` messages pile up unread, the backlog is dropped
+    and `overflowed` is set, so the subscriber knows to reload its state
+    rather than apply an incomplete set of messages.
+    """
+
+    def __init__(self, broker, channel: str, maxsize: int = None):
+        self.broker = broker
+        self.channel = channel
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(PUBSUB_QUEUE_SIZE if maxsize is None else maxsize)
+
+    def _put(self, message):
+        # Always runs on the subscriber's event loop
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.drain()
+
+    def deliver(self, message):
+        """Queue a message; safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    async def get(self, timeout: Optional[float] = None):
+        """Wait for the next message; None if `timeout` passes first."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        """Return and remove every message already queued."""
+        messages = []
+        while not self._queue.empty():
+            messages.append(self._queue.get_nowait())
+        return messages
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Broker(ABC):
+    @abstractmethod
+    def publish(self, channel: str, message) -> None:
+        """Send `message` to the channel's current subscribers. Callable from any thread."""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        """Start receiving a channel's messages; call from the event loop that will read them."""
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        pass
+
+    def start(self) -> None:
+        """Start any background delivery; called on app startup."""
+
+    def stop(self) -> None:
+        """Stop background delivery; called on app shutdown."""
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, channel: str, message) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(message)
+            except RuntimeError:
+                # Its event loop has closed; the subscriber is gone
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+
+class _MessageFollower(TableFollower):
+    def __init__(self, broker, interval: float, retention: float):
+        super().__init__(models.PubsubMessage, interval, retention, name="pubsub")
+        self.broker = broker
+
+    def poll(self) -> int:
+        # Write this process's messages first, so they go out with this poll
+        self.broker.flush()
+        return super().poll()
+
+    def handle(self, row):
+        self.broker.deliver(row.channel, json.loads(row.payload))
+
+
+class DatabaseBroker(InProcessBroker):
+    """Publishes through the pubsub_messages table to subscribers in every worker process.
+
+    publish() only queues the message: it is mostly called on the event
+    loop, which must not wait on a database write. Each process's follower
+    thread writes its queued messages in one transaction, then polls the
+    table (see table_log) and delivers new messages to its own subscribers,
+    including the ones it published itself. Either step takes up to
+    PUBSUB_POLL_INTERVAL. Messages must be JSON-serializable.
+    """
+
+    def __init__(self, interval: float = PUBSUB_POLL_INTERVAL, retention: float = PUBSUB_RETENTION):
+        super().__init__()
+        self._outbox = queue.SimpleQueue()
+        self.follower = _MessageFollower(self, interval, retention)
+
+    def publish(self, channel: str, message) -> None:
+        self._outbox.put((channel, json.dumps(message)))
+
+    def flush(self) -> int:
+        """Write the queued messages to the table; return how many."""
+        messages = []
+        while True:
+            try:
+                channel, payload = self._outbox.get_nowait()
+            except queue.Empty:
+                break
+            messages.append({"channel": channel, "payload": payload})
+        if messages:
+            with engine.begin() as conn:
+                conn.execute(insert(models.PubsubMessage), messages)
+        return len(messages)
+
+    def deliver(self, channel: str, message) -> None:
+        """Hand a message to this process's subscribers."""
+        super().publish(channel, message)
+
+    def start(self) -> None:
+        self.follower.start()
+
+    def stop(self) -> None:
+        self.follower.stop()
+        self.flush()
+
+
+broker: Broker = DatabaseBroker() if PUBSUB_BACKEND == "database" else InProcessBroker()
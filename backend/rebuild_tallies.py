@@ -0,0 +1,32 @@
+import argparse
+
+from database import SessionLocal
+import migrations
+import models
+from tallies import rebuild_tallies
+
+
+def rebuild(survey_id=None):
+    # Make sure the option_tallies table exists on older databases
+    migrations.migrate()
+
+    db = SessionLocal()
+    try:
+        target = f"survey {survey_id}" if survey_id is not None else "all surveys"
+        print(f"Rebuilding option tallies for {target}...")
+        rebuild_tallies(db, survey_id)
+        db.commit()
+        total = db.query(models.OptionTally).count()
+        print(f"Option tallies rebuilt successfully! ({total} rows)")
+    except Exception as e:
+        print(f"Error rebuilding option tallies: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill option tallies from existing responses")
+    parser.add_argument("--survey-id", type=int, default=None, help="Only rebuild this survey")
+    args = parser.parse_args()
+    rebuild(args.survey_id)
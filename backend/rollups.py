@@ -0,0 +1,179 @@
+"""Hourly and daily answer counts for trend charts.
+
+Every submission adds to the rollup rows of the hour and the day it was
+stored in: one for the submission itself, one per chosen option and one
+per question answered in text. A chart of months of daily data then reads
+a few hundred rollup rows instead of every response.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import analytics
+import models
+from tallies import upsert_insert
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Range served when a request doesn't give one, ending with the current bucket
+DEFAULT_SPAN = {"hour": timedelta(days=2), "day": timedelta(days=30)}
+# Most buckets one request may ask for
+MAX_BUCKETS = 1000
+
+# Sentinel ids, see models.ResponseRollup
+SUBMISSIONS = 0
+TEXT_ANSWERS = 0
+
+
+class InvalidRange(ValueError):
+    pass
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive UTC timestamps
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    value = _utc(value).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def _count(counts: Counter, survey_id: int, created_at: datetime, answers):
+    for granularity in GRANULARITIES:
+        bucket = bucket_start(created_at, granularity)
+        counts[survey_id, granularity, bucket, SUBMISSIONS, 0] += 1
+        for question_id, option_id in answers:
+            counts[survey_id, granularity, bucket, question_id, option_id or TEXT_ANSWERS] += 1
+
+
+def _add_counts(db: Session, counts: Counter):
+    if not counts:
+        return
+    stmt = upsert_insert(db)(models.ResponseRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["survey_id", "granularity", "bucket", "question_id", "option_id"],
+        set_={"count": models.ResponseRollup.count + stmt.excluded["count"]},
+    )
+    db.execute(stmt, [
+        {"survey_id": survey_id, "granularity": granularity, "bucket": bucket,
+         "question_id": question_id, "option_id": option_id, "count": count}
+        for (survey_id, granularity, bucket, question_id, option_id), count in counts.items()
+    ])
+
+
+def add_submissions(db: Session, survey_id: int, responses, submissions):
+    """Count inserted responses (with their created_at) and their resolved answers.
+
+    Runs inside the caller's transaction, like tallies.increment_tallies().
+    """
+    counts = Counter()
+    for response, answers in zip(responses, submissions):
+        _count(counts, survey_id, response.created_at,
+               [(answer["question_id"], answer["option_id"]) for answer in answers])
+    _add_counts(db, counts)
+
+
+def add_response_range(db: Session, first_id: int, last_id: int):
+    """Count responses with first_id <= id <= last_id and their answers, for chunked backfills."""
+    responses = db.execute(
+        select(models.Response.id, models.Response.survey_id, models.Response.created_at)
+        .where(models.Response.id.between(first_id, last_id), models.Response.survey_id.is_not(None))
+    ).all()
+    answers = {}
+    for response_id, question_id, option_id in db.execute(
+        select(models.Answer.response_id, models.Answer.question_id, models.Answer.option_id)
+        .where(models.Answer.response_id.between(first_id, last_id))
+    ):
+        answers.setdefault(response_id, []).append((question_id, option_id))
+    counts = Counter()
+    for response_id, survey_id, created_at in responses:
+        if created_at is not None:
+            _count(counts, survey_id, created_at, answers.get(response_id, []))
+    _add_counts(db, counts)
+
+
+def clear_rollups(db: Session, survey_id: int):
+    db.execute(delete(models.ResponseRollup).where(models.ResponseRollup.survey_id == survey_id))
+
+
+def resolve_range(granularity: str, start: datetime = None, end: datetime = None, now: datetime = None):
+    """Align [start, end) to whole buckets, filling in DEFAULT_SPAN up to the current bucket."""
+    step = GRANULARITIES[granularity]
+    if end is None:
+        end = bucket_start(now or datetime.now(timezone.utc), granularity) + step
+    elif bucket_start(end, granularity) != _utc(end):
+        # A partial last bucket is included whole
+        end = bucket_start(end, granularity) + step
+    end = _utc(end)
+    start = bucket_start(start, granularity) if start is not None else end - DEFAULT_SPAN[granularity]
+    if start >= end:
+        raise InvalidRange("start must be before end")
+    if (end - start) / step > MAX_BUCKETS:
+        raise InvalidRange(f"At most {MAX_BUCKETS} {granularity} buckets per request")
+    return start, end
+
+
+def timeseries(db: Session, survey_id: int, granularity: str, start: datetime, end: datetime):
+    """Per-bucket counts for a survey over an aligned [start, end) (see resolve_range()).
+
+    Every series has one value per bucket, zeros included, so they line up
+    with `buckets` as chart labels.
+    """
+    step = GRANULARITIES[granularity]
+    buckets = []
+    bucket = start
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += step
+    position = {bucket: index for index, bucket in enumerate(buckets)}
+
+    series = {}
+    rows = db.execute(
+        select(models.ResponseRollup.bucket, models.ResponseRollup.question_id,
+               models.ResponseRollup.option_id, models.ResponseRollup.count)
+        .where(
+            models.ResponseRollup.survey_id == survey_id,
+            models.ResponseRollup.granularity == granularity,
+            # Buckets are stored as UTC; SQLite keeps them without an offset
+            models.ResponseRollup.bucket >= start,
+            models.ResponseRollup.bucket < end,
+        )
+    )
+    for bucket, question_id, option_id, count in rows:
+        values = series.setdefault((question_id, option_id), [0] * len(buckets))
+        values[position[_utc(bucket)]] = count
+
+    def values(question_id, option_id):
+        return series.get((question_id, option_id), [0] * len(buckets))
+
+    questions = []
+    for question in analytics.load_questions(db, survey_id):
+        if question.is_open_ended:
+            questions.append({
+                "question_id": question.id,
+                "question_text": question.text,
+                "type": "open_ended",
+                "answers": values(question.id, TEXT_ANSWERS),
+            })
+        else:
+            questions.append({
+                "question_id": question.id,
+                "question_text": question.text,
+                "type": "multiple_choice",
+                "options": {option.text: values(question.id, option.id) for option in question.options},
+            })
+    return {
+        "survey_id": survey_id,
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": [bucket.isoformat() for bucket in buckets],
+        "responses": values(SUBMISSIONS, 0),
+        "questions": questions,
+    }
@@ -1,44 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import timedelta
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 import secrets
-from fastapi.responses import JSONResponse, StreamingResponse
-import csv
-from io import StringIO
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from database import get_db
+from cache import shared_survey_cache, survey_questions_cache
+from database import AsyncSessionLocal, get_async_db, get_db
+import analytics
+import cache_sync
+import conditional
+import exports
+import ingestion
+import live
 import models
+import pagination
+import pubsub
+import rollups
 import schemas
+import search
+import submissions
+import surveys
+import tallies
+import terms
 from auth import (
-    verify_password,
-    get_password_hash,
+    Principal,
+    get_current_active_principal,
+    get_current_principal,
+    optional_oauth2_scheme,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
-    get_current_active_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter()
 
+# Eager-load the question tree so serializing a Survey doesn't lazy-load
+# questions and options one by one (async sessions can't lazy-load at all)
+SURVEY_QUESTIONS = selectinload(models.Survey.questions).selectinload(models.Question.options)
+# Likewise for a response's answers and the options they point at
+RESPONSE_ANSWERS = selectinload(models.Response.answers).selectinload(models.Answer.option)
+
+def survey_version(survey_id: int, with_responses: bool = False):
+    """Select the cheap columns that change whenever a survey's payload does.
+
+    Used to build ETags without loading the question tree (or analytics).
+    """
+    of_survey = models.Question.survey_id == models.Survey.id
+    columns = [
+        models.Survey.user_id,
+        models.Survey.updated_at,
+        models.Survey.title,
+        models.Survey.description,
+        models.Survey.is_active,
+        models.Survey.share_token,
+        select(func.count(models.Question.id)).where(of_survey).scalar_subquery().label("question_count"),
+        select(func.max(models.Question.id)).where(of_survey).scalar_subquery().label("last_question_id"),
+    ]
+    if with_responses:
+        responses = models.Response.survey_id == models.Survey.id
+        columns += [
+            select(func.max(models.Response.id)).where(responses).scalar_subquery().label("last_response_id"),
+            select(func.max(models.Response.created_at)).where(responses).scalar_subquery().label("last_response_at"),
+        ]
+    return select(*columns).where(models.Survey.id == survey_id)
+
+def survey_list_version(user_id: int):
+    return select(
+        func.count(models.Survey.id),
+        func.max(models.Survey.id),
+        func.max(models.Survey.updated_at).label("updated_at"),
+    ).where(models.Survey.user_id == user_id)
+
+def paginate(db: Session, stmt, model, cursor: Optional[str], limit: int, response: Response):
+    """Run one keyset page of `stmt`; the next page's cursor goes in X-Next-Cursor."""
+    try:
+        stmt = pagination.keyset(stmt, model, cursor, limit)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items, next_cursor = pagination.page(db.execute(stmt), limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+def reload_survey(db: Session, survey_id: int):
+    # After a commit everything is expired; reload the survey and its question tree together
+    return (
+        db.query(models.Survey)
+        .options(SURVEY_QUESTIONS)
+        .populate_existing()
+        .filter(models.Survey.id == survey_id)
+        .one()
+    )
+
 @router.post("/auth/signup", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(select(models.User).where(models.User.email == user.email))).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/auth/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(models.User).where(models.User.email == form_data.username))).scalars().first()
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -55,7 +130,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 def create_survey(
     survey: schemas.SurveyCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     from datetime import datetime
     from sqlalchemy import func
@@ -91,28 +166,36 @@ def create_survey(
                 )
                 db.add(db_option)
 
+    survey_id = db_survey.id
     db.commit()
-    db.refresh(db_survey)
-    return db_survey
+    return reload_survey(db, survey_id)
 
 @router.get("/survey/{survey_id}", response_model=schemas.Survey)
 def get_survey(
     survey_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
-    survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
-    if not survey:
+    version = db.execute(survey_version(survey_id)).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.user_id != current_user.id:
+    if version.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this survey")
-    return survey
+
+    etag = conditional.make_etag("survey", *version)
+    headers = conditional.validator_headers(etag, version.updated_at)
+    if conditional.is_not_modified(request, etag, version.updated_at):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return db.query(models.Survey).options(SURVEY_QUESTIONS).filter(models.Survey.id == survey_id).first()
 
 @router.post("/survey/{survey_id}/share", response_model=schemas.ShareToken)
 def generate_share_link(
     survey_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
     if not survey:
@@ -121,71 +204,83 @@ def generate_share_link(
         raise HTTPException(status_code=403, detail="Not authorized to share this survey")
     
     # Generate a unique token
+    previous_token = survey.share_token
     share_token = secrets.token_urlsafe(32)
     survey.share_token = share_token
+    survey.updated_at = datetime.now(timezone.utc)
     db.commit()
+    invalidate_shared_survey(previous_token)
     
     return {"share_token": share_token}
 
-@router.get("/survey/shared/{token}", response_model=schemas.Survey)
-def get_shared_survey(token: str, db: Session = Depends(get_db)):
-    survey = db.query(models.Survey).filter(models.Survey.share_token == token).first()
+async def load_shared_survey(db: AsyncSession, token: str):
+    """Return (is_active, serialized survey JSON) for a share token, or None.
+
+    Warm hits come straight from shared_survey_cache without touching the
+    database or re-validating the schema.
+    """
+    entry = shared_survey_cache.get(token)
+    if entry is not None:
+        return entry
+    result = await db.execute(
+        select(models.Survey).options(SURVEY_QUESTIONS).where(models.Survey.share_token == token)
+    )
+    survey = result.scalars().first()
     if not survey:
+        return None
+    entry = (survey.is_active, schemas.Survey.model_validate(survey).model_dump_json().encode())
+    shared_survey_cache.set(token, entry)
+    return entry
+
+def invalidate_shared_survey(token):
+    if token:
+        cache_sync.invalidate("shared_survey", token)
+
+@router.get("/survey/shared/{token}", response_model=schemas.Survey)
+async def get_shared_survey(token: str, db: AsyncSession = Depends(get_async_db)):
+    entry = await load_shared_survey(db, token)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Survey not found or has expired")
-    return survey
+    return Response(content=entry[1], media_type="application/json")
 
-@router.post("/responses/{survey_id}", response_model=List[schemas.Response])
-def submit_responses(
+@router.post("/responses/{survey_id}", response_model=schemas.Response)
+async def submit_responses(
     survey_id: int,
     responses: List[schemas.ResponseCreate],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
-    if not survey:
+    questions = await db.run_sync(submissions.cached_survey_questions, survey_id)
+    if questions is None:
         raise HTTPException(status_code=404, detail="Survey not found")
     
-    # Validate that all questions belong to the survey
-    question_ids = {q.id for q in survey.questions}
-    for response in responses:
-        if response.question_id not in question_ids:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Question {response.question_id} does not belong to this survey"
-            )
-    
-    # Create response records
-    db_responses = []
-    for response in responses:
-        # Create the response
-        db_response = models.Response(
-            survey_id=survey_id,
-            question_id=response.question_id,
-            answer=response.answer,
-            created_at=func.now()
-        )
-        db.add(db_response)
-        db.flush()  # Flush to get the response ID
-        
-        # Create the answer
-        db_answer = models.Answer(
-            response_id=db_response.id,
-            question_id=response.question_id,
-            text=response.answer
-        )
-        db.add(db_answer)
-        db_responses.append(db_response)
+    # Validate that all questions belong to the survey and choices are options
+    try:
+        answers = submissions.resolve_answers(responses, questions)
+    except submissions.InvalidAnswer as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    db.commit()
-    for db_response in db_responses:
-        db.refresh(db_response)
-    
-    return db_responses
+    if ingestion.queue_enabled():
+        submission_id = await db.run_sync(ingestion.enqueue, survey_id, responses)
+        await db.commit()
+        return JSONResponse(status_code=202, content={"status": "queued", "submission_id": submission_id})
+
+    try:
+        [db_response] = await db.run_sync(submissions.insert_submissions, survey_id, [answers])
+    except submissions.InvalidAnswer as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    live.publish_submissions(survey_id, [answers])
+    return db_response
 
 @router.get("/responses/{survey_id}", response_model=List[schemas.Response])
 def get_survey_responses(
     survey_id: int,
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
     if not survey:
@@ -193,172 +288,242 @@ def get_survey_responses(
     if survey.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view these responses")
     
-    responses = db.query(models.Response).filter(models.Response.survey_id == survey_id).all()
-    return responses
+    stmt = select(models.Response).options(RESPONSE_ANSWERS).where(models.Response.survey_id == survey_id)
+    return paginate(db, stmt, models.Response, cursor, limit, response)
 
 @router.get("/survey/", response_model=List[schemas.Survey])
 def list_surveys(
+    request: Request,
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
-    surveys = db.query(models.Survey).filter(models.Survey.user_id == current_user.id).all()
-    return surveys
+    version = db.execute(survey_list_version(current_user.id)).first()
+    etag = conditional.make_etag("surveys", current_user.id, limit, cursor, *version)
+    headers = conditional.validator_headers(etag, version.updated_at)
+    if conditional.is_not_modified(request, etag, version.updated_at):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    stmt = select(models.Survey).options(SURVEY_QUESTIONS).where(models.Survey.user_id == current_user.id)
+    return paginate(db, stmt, models.Survey, cursor, limit, response)
 
 @router.patch("/surveys/{survey_id}/status", response_model=schemas.Survey)
-def update_survey_status(survey_id: int, is_active: bool, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
+def update_survey_status(survey_id: int, is_active: bool, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     survey = db.query(models.Survey).filter(models.Survey.id == survey_id, models.Survey.user_id == current_user.id).first()
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     survey.is_active = is_active
+    # Sub-second timestamp, as in surveys._bump, so the list ETag changes
+    # even when the previous write was in the same second
+    survey.updated_at = datetime.now(timezone.utc)
     db.commit()
-    db.refresh(survey)
-    return survey
+    invalidate_shared_survey(survey.share_token)
+    return reload_survey(db, survey_id)
 
 @router.get("/surveys/shared/{token}", response_model=schemas.Survey)
-def get_survey_by_token(token: str, db: Session = Depends(get_db)):
-    survey = db.query(models.Survey).filter(models.Survey.share_token == token, models.Survey.is_active == True).first()
-    if not survey:
+async def get_survey_by_token(token: str, db: AsyncSession = Depends(get_async_db)):
+    entry = await load_shared_survey(db, token)
+    if entry is None or not entry[0]:
         raise HTTPException(status_code=404, detail="Survey not found or inactive")
-    return survey
+    return Response(content=entry[1], media_type="application/json")
 
 @router.get("/surveys", response_model=List[schemas.Survey])
-def list_surveys(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    return db.query(models.Survey).filter(models.Survey.user_id == current_user.id).all()
+def list_surveys(
+    request: Request,
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    version = db.execute(survey_list_version(current_user.id)).first()
+    etag = conditional.make_etag("surveys", current_user.id, limit, cursor, *version)
+    headers = conditional.validator_headers(etag, version.updated_at)
+    if conditional.is_not_modified(request, etag, version.updated_at):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    stmt = select(models.Survey).options(SURVEY_QUESTIONS).where(models.Survey.user_id == current_user.id)
+    return paginate(db, stmt, models.Survey, cursor, limit, response)
 
 @router.get("/survey/{survey_id}/analytics")
-def survey_analytics(survey_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
+async def survey_analytics(
+    survey_id: int,
+    request: Request,
+    answers_limit: int = Query(analytics.OPEN_ENDED_PAGE_SIZE, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    version = (await db.execute(survey_version(survey_id, with_responses=True))).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    if version.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this survey")
+
+    etag = conditional.make_etag("analytics", answers_limit, *version)
+    last_modified = conditional.latest(version.updated_at, version.last_response_at)
+    headers = conditional.validator_headers(etag, last_modified)
+    if conditional.is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    content = await db.run_sync(analytics.survey_analytics, survey_id, answers_limit)
+    return JSONResponse(content=content, headers=headers)
+
+@router.get("/survey/{survey_id}/analytics/timeseries")
+async def survey_timeseries(
+    survey_id: int,
+    request: Request,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    version = (await db.execute(survey_version(survey_id, with_responses=True))).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    if version.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this survey")
+    try:
+        start, end = rollups.resolve_range(granularity, start, end)
+    except rollups.InvalidRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = conditional.make_etag("timeseries", granularity, start, end, *version)
+    last_modified = conditional.latest(version.updated_at, version.last_response_at)
+    headers = conditional.validator_headers(etag, last_modified)
+    if conditional.is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    content = await db.run_sync(rollups.timeseries, survey_id, granularity, start, end)
+    return JSONResponse(content=content, headers=headers)
+
+@router.get("/survey/{survey_id}/analytics/stream")
+async def stream_survey_analytics(
+    survey_id: int,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None, description="Bearer token, for clients such as EventSource that can't set headers"),
+):
+    # A session from get_async_db would stay checked out for as long as the
+    # stream is open, so authorize with a short-lived one instead
+    async with AsyncSessionLocal() as db:
+        principal = await get_current_principal(token or access_token or "", db)
+        owner_id = (await db.execute(select(models.Survey.user_id).where(models.Survey.id == survey_id))).scalar()
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    if owner_id != principal.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this survey")
+
+    subscription = pubsub.broker.subscribe(live.channel(survey_id))
+    return StreamingResponse(
+        live.stream(subscription),
+        media_type="text/event-stream",
+        # Stop proxies such as nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/survey/{survey_id}/analytics/{question_id}/answers")
+async def survey_open_ended_answers(
+    survey_id: int,
+    question_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(analytics.OPEN_ENDED_PAGE_SIZE, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    survey = (await db.execute(select(models.Survey).where(models.Survey.id == survey_id))).scalars().first()
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     if survey.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this survey")
 
-    analytics = []
-    for question in survey.questions:
-        if question.is_open_ended:
-            # Collect all open-ended answers
-            answers = [r.answer for r in db.query(models.Response).filter(models.Response.survey_id == survey_id, models.Response.question_id == question.id).all()]
-            analytics.append({
-                "question_id": question.id,
-                "question_text": question.text,
-                "type": "open_ended",
-                "answers": answers
-            })
-        else:
-            # Count each option
-            option_counts = {}
-            for option in question.options:
-                count = db.query(models.Response).filter(models.Response.survey_id == survey_id, models.Response.question_id == question.id, models.Response.answer == option.text).count()
-                option_counts[option.text] = count
-            analytics.append({
-                "question_id": question.id,
-                "question_text": question.text,
-                "type": "multiple_choice",
-                "options": option_counts
-            })
-    return JSONResponse(content={"survey_id": survey_id, "analytics": analytics})
+    return await db.run_sync(analytics.answers_page, survey_id, question_id, offset, limit)
+
+@router.get("/survey/{survey_id}/analytics/{question_id}/search")
+async def search_open_ended_answers(
+    survey_id: int,
+    question_id: int,
+    q: str = Query(..., min_length=1, max_length=500),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(analytics.OPEN_ENDED_PAGE_SIZE, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    survey = (await db.execute(select(models.Survey).where(models.Survey.id == survey_id))).scalars().first()
+    if not survey:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    if survey.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this survey")
+
+    try:
+        return await db.run_sync(search.search_answers, survey_id, question_id, q, offset, limit)
+    except search.InvalidSearch as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/surveys/{survey_id}")
-def delete_survey(survey_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
+def delete_survey(survey_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_active_principal)):
     survey = db.query(models.Survey).filter(models.Survey.id == survey_id, models.Survey.user_id == current_user.id).first()
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
+    share_token = survey.share_token
+    tallies.clear_tallies(db, survey_id)
+    terms.clear_terms(db, survey_id)
+    rollups.clear_rollups(db, survey_id)
     db.delete(survey)
     db.commit()
+    invalidate_shared_survey(share_token)
+    cache_sync.invalidate("survey_questions", survey_id)
     return {"message": "Survey deleted successfully"}
 
 @router.put("/surveys/{survey_id}", response_model=schemas.Survey)
 def update_survey(
     survey_id: int,
-    survey: schemas.SurveyCreate,
+    survey: schemas.SurveyUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     db_survey = db.query(models.Survey).filter(models.Survey.id == survey_id, models.Survey.user_id == current_user.id).first()
     if not db_survey:
         raise HTTPException(status_code=404, detail="Survey not found")
 
-    # Update survey fields
-    db_survey.title = survey.title
-    db_survey.description = survey.description
-    db_survey.updated_at = func.now()
-
-    # Delete existing questions and options
-    for question in db_survey.questions:
-        db.delete(question)
-
-    # Create new questions with order
-    for idx, question in enumerate(survey.questions):
-        db_question = models.Question(
-            text=question.text,
-            is_open_ended=question.is_open_ended,
-            order=idx + 1,  # Start from 1
-            survey_id=db_survey.id
-        )
-        db.add(db_question)
-        db.flush()
-
-        # Create options for multiple choice questions
-        if not question.is_open_ended and question.options:
-            for option in question.options:
-                db_option = models.QuestionOption(
-                    text=option.text,
-                    question_id=db_question.id
-                )
-                db.add(db_option)
+    try:
+        surveys.update_survey(db, db_survey, survey)
+    except surveys.StaleSurvey:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Survey was modified by someone else; reload and try again")
+    except surveys.InvalidEdit as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
 
     db.commit()
-    db.refresh(db_survey)
-    return db_survey
+    invalidate_shared_survey(db_survey.share_token)
+    cache_sync.invalidate("survey_questions", survey_id)
+    return reload_survey(db, survey_id)
 
 @router.get("/survey/{survey_id}/export")
-def export_survey_responses(
+async def export_survey_responses(
     survey_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
-    survey = db.query(models.Survey).filter(models.Survey.id == survey_id).first()
+    survey = (await db.execute(select(models.Survey).where(models.Survey.id == survey_id))).scalars().first()
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     if survey.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to export this survey's responses")
 
-    # Get all responses for this survey
-    responses = db.query(models.Response).filter(models.Response.survey_id == survey_id).all()
-    
-    # Create a CSV file in memory
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header row with question texts
-    header = ['Response ID', 'Submitted At']
-    for question in survey.questions:
-        header.append(question.text)
-    writer.writerow(header)
-    
-    # Group responses by response ID
-    response_groups = {}
-    for response in responses:
-        if response.id not in response_groups:
-            response_groups[response.id] = {
-                'created_at': response.created_at,
-                'answers': {}
-            }
-        response_groups[response.id]['answers'][response.question_id] = response.answer
-    
-    # Write data rows
-    for response_id, data in response_groups.items():
-        row = [response_id, data['created_at']]
-        for question in survey.questions:
-            row.append(data['answers'].get(question.id, ''))
-        writer.writerow(row)
-    
-    # Prepare the response
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        exports.iter_survey_csv(survey_id),
         media_type="text/csv",
         headers={
             'Content-Disposition': f'attachment; filename="survey_{survey_id}_responses.csv"'
         }
-    ) 
\ No newline at end of file
+    ) 
+
+@router.get("/cache/stats")
+def cache_stats(current_user: Principal = Depends(get_current_active_principal)):
+    return {"shared_survey": shared_survey_cache.stats(), "survey_questions": survey_questions_cache.stats()}
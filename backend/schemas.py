@@ -30,7 +30,8 @@ class QuestionOptionBase(BaseModel):
     text: str
 
 class QuestionOptionCreate(QuestionOptionBase):
-    pass
+    # Set when editing to keep an existing option (and the answers that chose it)
+    id: Optional[int] = None
 
 class QuestionOption(QuestionOptionBase):
     id: int
@@ -45,7 +46,9 @@ class QuestionBase(BaseModel):
     order: Optional[int] = None
 
 class QuestionCreate(QuestionBase):
-    options: List[QuestionOptionCreate]
+    # Set when editing to keep an existing question; without it questions are matched by position
+    id: Optional[int] = None
+    options: List[QuestionOptionCreate] = []
 
 class Question(QuestionBase):
     id: int
@@ -63,6 +66,10 @@ class SurveyBase(BaseModel):
 class SurveyCreate(SurveyBase):
     questions: List[QuestionCreate]
 
+class SurveyUpdate(SurveyCreate):
+    # The updated_at the edit was based on; if given, the edit fails when the survey changed since
+    updated_at: Optional[datetime] = None
+
 class Survey(SurveyBase):
     id: int
     user_id: int
@@ -73,34 +80,31 @@ class Survey(SurveyBase):
     questions: List[Question] = []
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # Response schemas
 class AnswerBase(BaseModel):
-    text: str
     question_id: int
+    answer: str
 
 class AnswerCreate(AnswerBase):
     pass
 
 class Answer(AnswerBase):
     id: int
-    response_id: int
+    option_id: Optional[int] = None
 
     class Config:
         from_attributes = True
 
-class ResponseBase(BaseModel):
-    question_id: int
-    answer: str
-
-class ResponseCreate(ResponseBase):
-    pass
+# A submission is posted as a list of answers
+ResponseCreate = AnswerCreate
 
-class Response(ResponseBase):
+class Response(BaseModel):
     id: int
     survey_id: int
     created_at: Optional[datetime] = None
+    answers: List[Answer] = []
 
     class Config:
         from_attributes = True
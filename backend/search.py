@@ -0,0 +1,150 @@
+"""Full-text search over open-ended answers.
+
+On SQLite the index is an external-content FTS5 table over answers.text
+(the text itself is not stored twice), kept in sync by triggers. On
+PostgreSQL it is a GIN index on to_tsvector(answers.text), which the
+database maintains itself. Either way every write path that touches
+answers — submissions, the ingestion worker, survey edits, migrations —
+updates the index in the same transaction.
+"""
+import os
+import re
+
+from sqlalchemy import Integer, column, func, literal_column, select, table
+from sqlalchemy.orm import Session
+
+import models
+
+# PostgreSQL text search configuration (stemming and stop words)
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+FTS_TABLE = "answer_search"
+PG_INDEX = "ix_answers_text_search"
+
+# question_id is indexed too, so a search is narrowed to one question inside
+# the FTS index rather than by filtering every match afterwards
+_SQLITE_DDL = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, question_id, content='answers', content_rowid='id');
+CREATE TRIGGER answers_search_insert AFTER INSERT ON answers WHEN new.text IS NOT NULL BEGIN
+    INSERT INTO {FTS_TABLE} (rowid, text, question_id) VALUES (new.id, new.text, new.question_id);
+END;
+CREATE TRIGGER answers_search_delete AFTER DELETE ON answers WHEN old.text IS NOT NULL BEGIN
+    INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, text, question_id) VALUES ('delete', old.id, old.text, old.question_id);
+END;
+CREATE TRIGGER answers_search_update AFTER UPDATE OF text, question_id ON answers BEGIN
+    INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, text, question_id)
+        SELECT 'delete', old.id, old.text, old.question_id WHERE old.text IS NOT NULL;
+    INSERT INTO {FTS_TABLE} (rowid, text, question_id)
+        SELECT new.id, new.text, new.question_id WHERE new.text IS NOT NULL;
+END
+"""
+_SQLITE_DROP = f"""
+DROP TRIGGER IF EXISTS answers_search_insert;
+DROP TRIGGER IF EXISTS answers_search_delete;
+DROP TRIGGER IF EXISTS answers_search_update;
+DROP TABLE IF EXISTS {FTS_TABLE}
+"""
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def _words(query: str):
+    words = re.findall(r"[^\W_]+\*?", query or "")
+    if not words:
+        raise InvalidSearch("Search query has no words to match")
+    return words
+
+
+def match_expression(question_id: int, query: str) -> str:
+    """Build an FTS5 MATCH expression for `query` within one question's answers.
+
+    Every word must match; a trailing * matches a prefix. Words are quoted,
+    so FTS5 operators and syntax in user input are searched for literally
+    instead of failing the query.
+    """
+    terms = " ".join(f'"{word.rstrip("*")}"' + ("*" if word.endswith("*") else "") for word in _words(query))
+    return f'question_id : "{question_id}" AND text : ({terms})'
+
+
+def create_search_index(engine, chunk_size: int):
+    """Build the index for a database, indexing existing answers chunk by chunk."""
+    if engine.dialect.name == "postgresql":
+        # CONCURRENTLY keeps writes flowing, and can't run inside a transaction
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {PG_INDEX} ON answers "
+                f"USING gin (to_tsvector('{SEARCH_LANGUAGE}', text))"
+            )
+        return
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        # Start over after an interrupted build rather than index rows twice
+        for statement in _SQLITE_DROP.split(";"):
+            conn.exec_driver_sql(statement)
+        for statement in re.split(r";\n(?=CREATE )", _SQLITE_DDL.strip()):
+            conn.exec_driver_sql(statement)
+        # Answers written from here on are indexed by the triggers
+        last_id = conn.execute(select(func.max(models.Answer.id))).scalar()
+    for start in range(0, last_id or 0, chunk_size):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"INSERT INTO {FTS_TABLE} (rowid, text, question_id) "
+                "SELECT id, text, question_id FROM answers WHERE id > ? AND id <= ? AND text IS NOT NULL",
+                (start, min(start + chunk_size, last_id)),
+            )
+
+
+def search_answers(db: Session, survey_id: int, question_id: int, query: str, offset: int, limit: int):
+    """Return one page of a question's open-ended answers matching `query`, best match first.
+
+    Shaped like analytics.answers_page(), with each answer's id and
+    response id so results can be traced back to their submission.
+    """
+    base = (
+        select(models.Answer.id, models.Answer.response_id, models.Answer.text)
+        .join(models.Question, models.Question.id == models.Answer.question_id)
+        .where(
+            models.Question.survey_id == survey_id,
+            models.Answer.question_id == question_id,
+            models.Answer.option_id.is_(None),
+        )
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        _words(query)
+        language = literal_column(f"'{SEARCH_LANGUAGE}'")
+        # The same expression as the index, so the planner can use it
+        vector = func.to_tsvector(language, models.Answer.text)
+        tsquery = func.websearch_to_tsquery(language, query)
+        base = base.where(vector.op("@@")(tsquery))
+        rank = func.ts_rank(vector, tsquery).desc()
+    else:
+        fts = table(FTS_TABLE, column("rowid", Integer))
+        # Materialized so the MATCH runs once; joined inline, SQLite may
+        # instead re-run it for every answer to the question
+        matches = (
+            select(
+                fts.c.rowid.label("answer_id"),
+                # bm25() is lower for better matches; question_id gets no weight
+                func.bm25(literal_column(FTS_TABLE), 1.0, 0.0).label("rank"),
+            )
+            .where(literal_column(FTS_TABLE).op("MATCH")(match_expression(question_id, query)))
+            .cte("matches")
+            .prefix_with("MATERIALIZED")
+        )
+        base = base.join(matches, matches.c.answer_id == models.Answer.id)
+        rank = matches.c.rank
+
+    total = db.execute(select(func.count()).select_from(base.subquery())).scalar()
+    rows = db.execute(base.order_by(rank, models.Answer.id).offset(offset).limit(limit)).all()
+    return {
+        "question_id": question_id,
+        "query": query,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "answers": [{"id": row.id, "response_id": row.response_id, "text": row.text} for row in rows],
+    }
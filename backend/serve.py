@@ -0,0 +1,44 @@
+"""Production server: migrate the database once, then serve from several worker processes.
+
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Workers default to WEB_CONCURRENCY, or one per CPU. They skip the
+import-time migration of main.py, and with more than one they replay each
+other's cache invalidations (see cache_sync) and deliver live analytics to
+each other's streams (pubsub.DatabaseBroker).
+"""
+import argparse
+import os
+
+import uvicorn
+
+import database
+import migrations
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args(argv)
+
+    applied = migrations.migrate(log=print)
+    print(f"Applied {len(applied)} migration(s)." if applied else "Database is up to date.")
+    # Workers are spawned processes with their own engines
+    database.engine.dispose()
+
+    # Workers inherit the environment
+    os.environ["MIGRATE_ON_STARTUP"] = "false"
+    if args.workers > 1:
+        os.environ.setdefault("CACHE_SYNC", "true")
+        os.environ.setdefault("PUBSUB_BACKEND", "database")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from cache import survey_questions_cache
+import models
+import rollups
+import tallies
+import terms
+
+# Rows per multi-row INSERT, kept well under SQLite's bound parameter limit
+INSERT_CHUNK_SIZE = 500
+# Largest batch of submissions accepted in one request
+MAX_SUBMISSIONS_PER_BATCH = int(os.getenv("MAX_SUBMISSIONS_PER_BATCH", "1000"))
+
+_RESPONSE_COLUMNS = (models.Response.id, models.Response.survey_id, models.Response.created_at)
+_ANSWER_COLUMNS = (models.Answer.id, models.Answer.response_id)
+_ANSWER_FIELDS = ("question_id", "option_id", "text")
+
+
+class InvalidAnswer(ValueError):
+    pass
+
+
+def survey_questions(db: Session, survey_id: int):
+    """Map question id -> {option text: option id} for a survey, or None if the survey doesn't exist.
+
+    Open-ended questions map to None. A single outer-joined query, so callers
+    don't have to load the survey and lazy-load its question tree just to
+    validate a submission.
+    """
+    rows = db.execute(
+        select(models.Survey.id, models.Question.id, models.Question.is_open_ended,
+               models.QuestionOption.id, models.QuestionOption.text)
+        .outerjoin(models.Question, models.Question.survey_id == models.Survey.id)
+        .outerjoin(models.QuestionOption, models.QuestionOption.question_id == models.Question.id)
+        .where(models.Survey.id == survey_id)
+    ).all()
+    if not rows:
+        return None
+    questions = {}
+    for _, question_id, is_open_ended, option_id, option_text in rows:
+        if question_id is None:
+            continue
+        if is_open_ended:
+            questions[question_id] = None
+            continue
+        options = questions.setdefault(question_id, {})
+        if option_id is not None:
+            options.setdefault(option_text, option_id)
+    return questions
+
+
+def cached_survey_questions(db: Session, survey_id: int):
+    """survey_questions(), served from survey_questions_cache when warm.
+
+    Editing or deleting a survey invalidates its entry; missing surveys are
+    not cached.
+    """
+    questions = survey_questions_cache.get(survey_id)
+    if questions is None:
+        questions = survey_questions(db, survey_id)
+        if questions is not None:
+            survey_questions_cache.set(survey_id, questions)
+    return questions
+
+
+def resolve_answers(answers, questions, strict: bool = True):
+    """Turn submitted {question_id, answer} items into Answer column values.
+
+    Choice answers are stored by option id, open-ended ones as text. With
+    `strict`, an answer to a foreign question or a choice that isn't one of
+    the question's options raises InvalidAnswer; otherwise it is dropped.
+    """
+    resolved = []
+    for item in answers:
+        if item.question_id not in questions:
+            if strict:
+                raise InvalidAnswer(f"Question {item.question_id} does not belong to this survey")
+            continue
+        options = questions[item.question_id]
+        if options is None:
+            resolved.append({"question_id": item.question_id, "option_id": None, "text": item.answer, "answer": item.answer})
+            continue
+        option_id = options.get(item.answer)
+        if option_id is None:
+            if strict:
+                raise InvalidAnswer(f"{item.answer!r} is not an option of question {item.question_id}")
+            continue
+        resolved.append({"question_id": item.question_id, "option_id": option_id, "text": None, "answer": item.answer})
+    return resolved
+
+
+def _check_still_current(db: Session, survey_id: int, submissions):
+    # Answers may have been resolved against a cached question map that an
+    # edit has since changed; make sure their questions and options still exist
+    question_ids = {answer["question_id"] for answers in submissions for answer in answers}
+    option_ids = {answer["option_id"] for answers in submissions for answer in answers if answer["option_id"] is not None}
+    if not question_ids:
+        return
+    current_questions = set(db.execute(
+        select(models.Question.id).where(models.Question.survey_id == survey_id, models.Question.id.in_(question_ids))
+    ).scalars())
+    current_options = set(db.execute(
+        select(models.QuestionOption.id).where(models.QuestionOption.id.in_(option_ids))
+        .where(models.QuestionOption.question_id.in_(current_questions))
+    ).scalars()) if option_ids else set()
+    for answers in submissions:
+        for answer in answers:
+            if answer["question_id"] not in current_questions or (
+                answer["option_id"] is not None and answer["option_id"] not in current_options
+            ):
+                survey_questions_cache.invalidate(survey_id)
+                raise InvalidAnswer(
+                    f"Question {answer['question_id']} was changed while answering; reload the survey and try again"
+                )
+
+
+def insert_returning(db: Session, model, rows, columns):
+    if not db.get_bind().dialect.insert_returning:
+        # No RETURNING: insert one by one, then read back in one query
+        ids = [db.execute(insert(model).values(**row)).inserted_primary_key[0] for row in rows]
+        by_id = {row.id: row for row in db.execute(select(*columns).where(model.id.in_(ids)))}
+        return [by_id[row_id] for row_id in ids]
+
+    inserted = []
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        stmt = insert(model).values(rows[start:start + INSERT_CHUNK_SIZE]).returning(*columns)
+        # Ids are assigned in VALUES order within one statement, but RETURNING
+        # order isn't guaranteed, so sort to line rows up with the input again
+        inserted.extend(sorted(db.execute(stmt).all(), key=lambda row: row.id))
+    return inserted
+
+
+def insert_submissions(db: Session, survey_id: int, submissions):
+    """Insert one Response per submission and an Answer row per answer.
+
+    `submissions` is a list of resolve_answers() results. Each table gets one
+    multi-row insert and the option tallies, term counts and time rollups
+    are updated in the same transaction; the caller commits. Returns schemas.Response-shaped dicts.
+
+    Raises InvalidAnswer, and the caller must roll back, if a question or
+    option the answers refer to was edited away after they were resolved.
+    """
+    if not submissions:
+        return []
+    db_responses = insert_returning(db, models.Response, [{"survey_id": survey_id} for _ in submissions], _RESPONSE_COLUMNS)
+    # Checked after the first insert: on SQLite the transaction now holds the
+    # write lock, so no edit can commit between the check and the answer rows
+    _check_still_current(db, survey_id, submissions)
+    answer_rows = [
+        {"response_id": response.id, **{field: answer[field] for field in _ANSWER_FIELDS}}
+        for response, answers in zip(db_responses, submissions)
+        for answer in answers
+    ]
+    db_answers = iter(insert_returning(db, models.Answer, answer_rows, _ANSWER_COLUMNS) if answer_rows else [])
+    all_answers = [answer for answers in submissions for answer in answers]
+    tallies.increment_tallies(db, survey_id, all_answers)
+    terms.count_terms(db, survey_id, all_answers)
+    rollups.add_submissions(db, survey_id, db_responses, submissions)
+    return [
+        {
+            "id": response.id,
+            "survey_id": response.survey_id,
+            "created_at": response.created_at,
+            "answers": [
+                {"id": next(db_answers).id, "question_id": answer["question_id"],
+                 "option_id": answer["option_id"], "answer": answer["answer"]}
+                for answer in answers
+            ],
+        }
+        for response, answers in zip(db_responses, submissions)
+    ]
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, delete, insert, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+import analytics
+import conditional
+import models
+import schemas
+from submissions import insert_returning
+
+
+class InvalidEdit(ValueError):
+    pass
+
+
+class StaleSurvey(Exception):
+    """The survey changed since the updated_at an edit was based on."""
+
+
+def _match(existing, incoming, kind: str):
+    """Pair each incoming item with an existing row, by id or else by position.
+
+    Returns [(row or None, item)] in incoming order and the existing rows
+    nothing matched. An item without an id takes the row at its position,
+    unless another item claims that row by id.
+    """
+    by_id = {row.id: row for row in existing}
+    claimed = [item.id for item in incoming if item.id is not None]
+    if len(set(claimed)) != len(claimed):
+        raise InvalidEdit(f"Duplicate {kind} id")
+    unknown = set(claimed) - by_id.keys()
+    if unknown:
+        raise InvalidEdit(f"Unknown {kind} id {min(unknown)}")
+    claimed = set(claimed)
+
+    pairs = []
+    for position, item in enumerate(incoming):
+        if item.id is not None:
+            row = by_id[item.id]
+        elif position < len(existing) and existing[position].id not in claimed:
+            row = existing[position]
+            claimed.add(row.id)
+        else:
+            row = None
+        pairs.append((row, item))
+    return pairs, [row for row in existing if row.id not in claimed]
+
+
+def _bump(db: Session, survey: models.Survey, edit: schemas.SurveyUpdate):
+    # A Python timestamp rather than func.now(): SQLite's CURRENT_TIMESTAMP only
+    # has whole seconds, too coarse to tell two quick edits (or their ETags) apart
+    stmt = (
+        update(models.Survey)
+        .where(models.Survey.id == survey.id)
+        .values(title=edit.title, description=edit.description, updated_at=datetime.now(timezone.utc))
+    )
+    if edit.updated_at is not None:
+        if not conditional.same_instant(survey.updated_at, edit.updated_at):
+            raise StaleSurvey()
+        # Compare-and-set on the stored value, so a concurrent edit that
+        # committed after we read the survey is caught as well
+        stored = db.execute(
+            select(type_coerce(models.Survey.updated_at, String)).where(models.Survey.id == survey.id)
+        ).scalar()
+        stmt = stmt.where(type_coerce(models.Survey.updated_at, String) == stored)
+    if db.execute(stmt, execution_options={"synchronize_session": False}).rowcount != 1:
+        raise StaleSurvey()
+
+
+def update_survey(db: Session, survey: models.Survey, edit: schemas.SurveyUpdate):
+    """Apply an edit by diffing it against the stored questions and options.
+
+    Questions and options keep their ids (and so their answers and tallies)
+    when matched; only changed rows are updated, in bulk, and only new ones
+    inserted. Removing an option keeps its answers as text; removing a
+    question deletes its answers. The caller commits.
+    """
+    _bump(db, survey, edit)
+    questions = analytics.load_questions(db, survey.id)
+    pairs, removed_questions = _match(questions, edit.questions, "question")
+
+    question_updates, option_updates, new_options, new_questions = [], [], [], []
+    removed_options = [option for question in removed_questions for option in question.options]
+    for order, (question, item) in enumerate(pairs, start=1):
+        values = {"text": item.text, "is_open_ended": item.is_open_ended, "order": order}
+        options = [] if item.is_open_ended else item.options
+        if question is None:
+            new_questions.append((values, options))
+            continue
+        changed = {key: value for key, value in values.items() if getattr(question, key) != value}
+        if changed:
+            question_updates.append({"id": question.id, **changed})
+        option_pairs, gone = _match(sorted(question.options, key=lambda option: option.id), options, "option")
+        removed_options.extend(gone)
+        for option, option_item in option_pairs:
+            if option is None:
+                new_options.append({"question_id": question.id, "text": option_item.text})
+            elif option.text != option_item.text:
+                option_updates.append({"id": option.id, "text": option_item.text})
+
+    if new_questions:
+        for _, options in new_questions:
+            # A new question has no options to keep yet
+            _match([], options, "option")
+        inserted = insert_returning(
+            db, models.Question, [{**values, "survey_id": survey.id} for values, _ in new_questions], (models.Question.id,)
+        )
+        new_options.extend(
+            {"question_id": row.id, "text": option.text}
+            for row, (_, options) in zip(inserted, new_questions)
+            for option in options
+        )
+    if question_updates:
+        db.execute(update(models.Question), question_updates)
+    if option_updates:
+        db.execute(update(models.QuestionOption), option_updates)
+    if new_options:
+        db.execute(insert(models.QuestionOption), new_options)
+
+    removed_question_ids = [question.id for question in removed_questions]
+    removed_option_ids = [option.id for option in removed_options]
+    if removed_question_ids:
+        db.execute(delete(models.TermCount).where(models.TermCount.question_id.in_(removed_question_ids)))
+        db.execute(delete(models.ResponseRollup).where(models.ResponseRollup.question_id.in_(removed_question_ids)))
+        db.execute(
+            delete(models.Answer).where(models.Answer.question_id.in_(removed_question_ids)),
+            execution_options={"synchronize_session": False},
+        )
+    if removed_option_ids:
+        # Keep what was chosen as text, like answers that never matched an option
+        option_text = (
+            select(models.QuestionOption.text)
+            .where(models.QuestionOption.id == models.Answer.option_id)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(models.Answer)
+            .where(models.Answer.option_id.in_(removed_option_ids))
+            .values(text=option_text, option_id=None),
+            execution_options={"synchronize_session": False},
+        )
+        db.execute(delete(models.OptionTally).where(models.OptionTally.option_id.in_(removed_option_ids)))
+        db.execute(delete(models.ResponseRollup).where(models.ResponseRollup.option_id.in_(removed_option_ids)))
+        db.execute(
+            delete(models.QuestionOption).where(models.QuestionOption.id.in_(removed_option_ids)),
+            execution_options={"synchronize_session": False},
+        )
+    if removed_question_ids:
+        db.execute(
+            delete(models.Question).where(models.Question.id.in_(removed_question_ids)),
+            execution_options={"synchronize_session": False},
+        )
@@ -0,0 +1,101 @@
+"""Append-only tables that every worker process follows.
+
+Worker processes share nothing but the database, so messages between them
+(cache invalidations, live analytics deltas) are rows in a log table with
+an autoincrement id and a created_at. Each process runs a TableFollower
+that polls for rows added since it last looked and handles each of them
+once, then deletes rows older than the retention period.
+"""
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# How long a gap in ids is watched for a transaction that commits late
+GAP_TIMEOUT = 10
+PRUNE_INTERVAL = 60
+
+
+class TableFollower(ABC):
+    def __init__(self, model, interval: float, retention: float, name: str):
+        self.model = model
+        self.interval = interval
+        self.retention = retention
+        self.name = name
+        # Every id up to the watermark has been handled; ids above it are
+        # handled once each, since they can commit out of order
+        self._watermark = None
+        self._seen = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @abstractmethod
+    def handle(self, row) -> None:
+        """Act on one new row of the table."""
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # Only rows added from now on concern this process
+        with engine.connect() as conn:
+            self._watermark = conn.execute(select(func.max(self.model.id))).scalar() or 0
+        self._seen.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def poll(self) -> int:
+        """Handle the rows added since the last poll; return how many."""
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(self.model.__table__).where(self.model.id > self._watermark).order_by(self.model.id)
+            ).all()
+        now = time.monotonic()
+        handled = 0
+        for row in rows:
+            if row.id in self._seen:
+                continue
+            self._seen[row.id] = now
+            self.handle(row)
+            handled += 1
+        for row_id in sorted(self._seen):
+            # Past a gap only once it has stayed open for GAP_TIMEOUT (a rollback)
+            if row_id != self._watermark + 1 and now - self._seen[row_id] < GAP_TIMEOUT:
+                break
+            self._watermark = row_id
+            del self._seen[row_id]
+        return handled
+
+    def prune(self):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        with engine.begin() as conn:
+            conn.execute(delete(self.model).where(
+                self.model.created_at < cutoff,
+                # Keep the newest row, so ids keep growing even where the
+                # database reuses them once a table is empty
+                self.model.id < select(func.max(self.model.id)).scalar_subquery(),
+            ))
+
+    def _run(self):
+        pruned = float("-inf")
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+                if time.monotonic() - pruned >= PRUNE_INTERVAL:
+                    self.prune()
+                    pruned = time.monotonic()
+            except Exception:
+                logger.exception("Failed to follow %s", self.model.__tablename__)
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
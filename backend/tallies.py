@@ -0,0 +1,101 @@
+from collections import Counter
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import models
+
+
+def upsert_insert(db: Session):
+    # ON CONFLICT upserts are dialect specific in SQLAlchemy
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def _add_counts(db: Session, rows):
+    stmt = upsert_insert(db)(models.OptionTally)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["option_id"],
+        set_={"count": models.OptionTally.count + stmt.excluded["count"]},
+    )
+    db.execute(stmt, rows)
+
+
+def increment_tallies(db: Session, survey_id: int, answers):
+    """Count resolved answers (see submissions.resolve_answers) towards their options.
+
+    Runs inside the caller's transaction so tallies commit together with the
+    answers they count.
+    """
+    deltas = Counter(
+        (answer["question_id"], answer["option_id"]) for answer in answers if answer["option_id"] is not None
+    )
+    if not deltas:
+        return
+    _add_counts(db, [
+        {"option_id": option_id, "survey_id": survey_id, "question_id": question_id, "count": count}
+        for (question_id, option_id), count in deltas.items()
+    ])
+
+
+def _counted_answers():
+    """Group choice answers into (survey_id, question_id, option_id, count) rows."""
+    return (
+        select(
+            func.min(models.Response.survey_id),
+            func.min(models.Answer.question_id),
+            models.Answer.option_id,
+            func.count(),
+        )
+        .join(models.Response, models.Response.id == models.Answer.response_id)
+        .where(models.Answer.option_id.is_not(None), models.Response.survey_id.is_not(None))
+        .group_by(models.Answer.option_id)
+    )
+
+
+def read_tallies(db: Session, survey_id: int):
+    """Return {question_id: {option_id: count}} for a survey."""
+    counts = {}
+    rows = db.execute(
+        select(models.OptionTally.question_id, models.OptionTally.option_id, models.OptionTally.count)
+        .where(models.OptionTally.survey_id == survey_id)
+    )
+    for question_id, option_id, count in rows:
+        counts.setdefault(question_id, {})[option_id] = count
+    return counts
+
+
+def clear_tallies(db: Session, survey_id: int):
+    db.execute(delete(models.OptionTally).where(models.OptionTally.survey_id == survey_id))
+
+
+def rebuild_tallies(db: Session, survey_id=None):
+    """Recompute tallies from the answers table, for one survey or all of them."""
+    stale = delete(models.OptionTally)
+    counted = _counted_answers()
+    if survey_id is not None:
+        stale = stale.where(models.OptionTally.survey_id == survey_id)
+        counted = counted.where(models.Response.survey_id == survey_id)
+    db.execute(stale)
+    db.execute(
+        models.OptionTally.__table__.insert().from_select(
+            ["survey_id", "question_id", "option_id", "count"], counted
+        )
+    )
+
+
+def add_answer_range(db: Session, first_id: int, last_id: int):
+    """Add answers with first_id <= id <= last_id to the tallies.
+
+    Lets a backfill work through a large answers table in short
+    transactions instead of one long rebuild.
+    """
+    counted = _counted_answers().where(models.Answer.id.between(first_id, last_id))
+    rows = [
+        {"survey_id": survey_id, "question_id": question_id, "option_id": option_id, "count": count}
+        for survey_id, question_id, option_id, count in db.execute(counted)
+    ]
+    if rows:
+        _add_counts(db, rows)
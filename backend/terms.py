@@ -0,0 +1,131 @@
+"""Running word and word-pair counts for open-ended questions.
+
+Each open-ended answer is tokenized once, when it is written, and adds one
+to the count of every distinct word and adjacent word pair it contains.
+Analytics then read the top terms of a question from term_counts through
+an index, without re-reading the answers.
+"""
+import re
+from collections import Counter
+
+from sqlalchemy import delete, select, union_all
+from sqlalchemy.orm import Session
+
+import models
+from tallies import upsert_insert
+
+# Top words and word pairs returned per open-ended question
+TOP_TERMS = 20
+# Longer tokens are nearly always pasted URLs, ids or noise
+MAX_TERM_LENGTH = 40
+# Open-ended questions whose top terms are read in one statement
+_QUESTIONS_PER_STATEMENT = 100
+
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+# Word pairs don't span punctuation: "delivery, slow" is not a phrase
+_CLAUSE = re.compile(r"[.,;:!?()\[\]\n]+")
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+herself him himself his how i if in into is it its itself just me more most my myself no nor not now of off on
+once only or other our ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves i'm it's don't didn't isn't wasn't can't
+""".split())
+
+
+def tokenize(text: str):
+    return [word.lower() for word in _WORD.findall(text or "")]
+
+
+def answer_terms(text: str):
+    """Return the distinct (n, term) pairs an answer counts towards.
+
+    Words (n=1) skip stop words; word pairs (n=2) are two different
+    adjacent words in the same clause, neither of them a stop word, so
+    "the delivery was slow" yields "delivery" and "slow" but no pair.
+    """
+    terms = set()
+    for clause in _CLAUSE.split(text or ""):
+        words = [word for word in tokenize(clause) if len(word) <= MAX_TERM_LENGTH]
+        terms.update((1, word) for word in words if word not in STOP_WORDS and len(word) > 1)
+        terms.update(
+            (2, f"{first} {second}")
+            for first, second in zip(words, words[1:])
+            if first != second and first not in STOP_WORDS and second not in STOP_WORDS
+        )
+    return terms
+
+
+def _add_counts(db: Session, counts: Counter):
+    if not counts:
+        return
+    stmt = upsert_insert(db)(models.TermCount)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["question_id", "term"],
+        set_={"count": models.TermCount.count + stmt.excluded["count"]},
+    )
+    db.execute(stmt, [
+        {"survey_id": survey_id, "question_id": question_id, "n": n, "term": term, "count": count}
+        for (survey_id, question_id, n, term), count in counts.items()
+    ])
+
+
+def count_terms(db: Session, survey_id: int, answers):
+    """Count the terms of resolved open-ended answers (see submissions.resolve_answers).
+
+    Runs inside the caller's transaction, like tallies.increment_tallies().
+    """
+    counts = Counter()
+    for answer in answers:
+        if answer["text"] is not None:
+            counts.update((survey_id, answer["question_id"], n, term) for n, term in answer_terms(answer["text"]))
+    _add_counts(db, counts)
+
+
+def add_answer_range(db: Session, first_id: int, last_id: int):
+    """Count the terms of answers with first_id <= id <= last_id, for chunked backfills."""
+    rows = db.execute(
+        select(models.Response.survey_id, models.Answer.question_id, models.Answer.text)
+        .join(models.Response, models.Response.id == models.Answer.response_id)
+        .where(models.Answer.id.between(first_id, last_id), models.Answer.text.is_not(None))
+    )
+    counts = Counter()
+    for survey_id, question_id, text in rows:
+        counts.update((survey_id, question_id, n, term) for n, term in answer_terms(text))
+    _add_counts(db, counts)
+
+
+def clear_terms(db: Session, survey_id: int):
+    db.execute(delete(models.TermCount).where(models.TermCount.survey_id == survey_id))
+
+
+def top_terms(db: Session, question_ids, limit: int = TOP_TERMS):
+    """Return {question_id: {"terms": [...], "bigrams": [...]}}, most frequent first.
+
+    Each question and term size is its own LIMITed index range scan, so
+    the cost follows `limit` rather than the vocabulary; they are combined
+    with UNION ALL to keep it to one statement per _QUESTIONS_PER_STATEMENT
+    questions.
+    """
+    top = {question_id: {"terms": [], "bigrams": []} for question_id in question_ids}
+    question_ids = list(question_ids)
+    for start in range(0, len(question_ids), _QUESTIONS_PER_STATEMENT):
+        arms = []
+        for question_id in question_ids[start:start + _QUESTIONS_PER_STATEMENT]:
+            for n in (1, 2):
+                ranked = (
+                    select(models.TermCount.question_id, models.TermCount.n,
+                           models.TermCount.term, models.TermCount.count)
+                    .where(models.TermCount.question_id == question_id, models.TermCount.n == n)
+                    .order_by(models.TermCount.count.desc(), models.TermCount.term)
+                    .limit(limit)
+                    .subquery()
+                )
+                arms.append(select(ranked))
+        rows = db.execute(union_all(*arms)).all()
+        rows.sort(key=lambda row: (row.question_id, row.n, -row.count, row.term))
+        for question_id, n, term, count in rows:
+            top[question_id]["terms" if n == 1 else "bigrams"].append({"term": term, "count": count})
+    return top
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+# Point the app at a throwaway database so tests never touch sql_app.db
+_test_db_dir = tempfile.mkdtemp(prefix="feedback-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_test_db_dir, 'test.db')}"
+# Cheapest bcrypt cost, tests don't need real password hardening
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import database  # noqa: E402
+test_engine = database.engine
+
+from fastapi.testclient import TestClient  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/api/auth/signup", json={"email": email, "password": "testpassword"})
+    login = client.post("/api/auth/login", data={"username": email, "password": "testpassword"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.fixture
+def survey_factory(client, auth_headers):
+    """Create a survey owned by the auth_headers user and return it.
+
+    Choice questions come first, named Q0, Q1, ..., each offering `options`;
+    open-ended questions follow, named Open 0, Open 1, ...
+    """
+    def create(choice_questions=1, open_questions=0, options=("Yes", "No"), title="Survey"):
+        questions = [
+            {"text": f"Q{i}", "is_open_ended": False, "options": [{"text": text} for text in options]}
+            for i in range(choice_questions)
+        ]
+        questions += [{"text": f"Open {i}", "is_open_ended": True} for i in range(open_questions)]
+        response = client.post("/api/survey/", json={"title": title, "questions": questions}, headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    return create
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    engines = (test_engine, database.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", counter)
+    yield counter
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def assert_constant_queries(query_counter):
+    """Fail when a request's SQL statement count grows with the data it returns (N+1).
+
+    Runs `request` once, calls `grow` to add more rows, runs `request` again
+    and compares the number of statements executed.
+    """
+    def check(request, grow):
+        query_counter.reset()
+        request()
+        before = list(query_counter.statements)
+        grow()
+        query_counter.reset()
+        request()
+        after = list(query_counter.statements)
+        assert len(after) == len(before), (
+            f"statement count grew from {len(before)} to {len(after)}:\n" + "\n".join(after)
+        )
+
+    return check
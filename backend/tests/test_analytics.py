@@ -0,0 +1,134 @@
+OPTIONS = ["Option 0", "Option 1", "Option 2"]
+
+
+def test_analytics_counts_options_and_pages_open_answers(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=1, options=OPTIONS)
+    choice, open_ended = survey["questions"]
+    for answer in ["Option 0", "Option 2", "Option 2"]:
+        client.post(f"/api/responses/{survey['id']}", json=[
+            {"question_id": choice["id"], "answer": answer},
+            {"question_id": open_ended["id"], "answer": f"because {answer}"},
+        ])
+
+    response = client.get(f"/api/survey/{survey['id']}/analytics?answers_limit=2", headers=auth_headers)
+    assert response.status_code == 200
+    choice_stats, open_stats = response.json()["analytics"]
+    assert choice_stats["options"] == {"Option 0": 1, "Option 1": 0, "Option 2": 2}
+    assert open_stats["answers"] == ["because Option 0", "because Option 2"]
+    assert open_stats["answer_count"] == 3
+
+    page = client.get(
+        f"/api/survey/{survey['id']}/analytics/{open_ended['id']}/answers?offset=2&limit=10",
+        headers=auth_headers,
+    ).json()
+    assert page["total"] == 3
+    assert page["answers"] == ["because Option 2"]
+
+
+def test_analytics_query_count_is_independent_of_survey_size(client, auth_headers, survey_factory, query_counter):
+    counts = []
+    for size in (1, 10):
+        survey = survey_factory(choice_questions=size, open_questions=size, options=[f"Option {j}" for j in range(5)])
+        query_counter.reset()
+        client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers)
+        counts.append(query_counter.count)
+    assert counts[0] == counts[1]
+
+
+def test_tallies_follow_submissions_and_rebuild(client, survey_factory):
+    from database import SessionLocal
+    import tallies
+
+    survey = survey_factory(options=OPTIONS)
+    question = survey["questions"][0]
+    for answer in ["Option 1", "Option 1", "Option 0"]:
+        client.post(f"/api/responses/{survey['id']}", json=[{"question_id": question["id"], "answer": answer}])
+
+    db = SessionLocal()
+    try:
+        live = tallies.read_tallies(db, survey["id"])
+        tallies.rebuild_tallies(db, survey["id"])
+        db.commit()
+        options = {option["text"]: option["id"] for option in question["options"]}
+        assert tallies.read_tallies(db, survey["id"]) == live == {
+            question["id"]: {options["Option 1"]: 2, options["Option 0"]: 1}
+        }
+    finally:
+        db.close()
+
+
+def test_open_ended_top_terms_are_counted_on_submission(client, auth_headers, survey_factory):
+    survey = survey_factory(choice_questions=0, open_questions=2)
+    why, other = survey["questions"]
+    for answer in ["Slow delivery, slow slow support", "The delivery was slow", "Great support!", "slow delivery"]:
+        client.post(f"/api/responses/{survey['id']}", json=[
+            {"question_id": why["id"], "answer": answer},
+            {"question_id": other["id"], "answer": "fine"},
+        ])
+
+    why_stats, other_stats = client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers).json()["analytics"]
+    # Counted once per answer that contains them; stop words are left out
+    assert why_stats["top_terms"] == [
+        {"term": "delivery", "count": 3}, {"term": "slow", "count": 3},
+        {"term": "support", "count": 2}, {"term": "great", "count": 1},
+    ]
+    # Pairs stay within a clause and skip stop words and repeats
+    assert why_stats["top_bigrams"] == [
+        {"term": "slow delivery", "count": 2}, {"term": "great support", "count": 1},
+        {"term": "slow support", "count": 1},
+    ]
+    assert other_stats["top_terms"] == [{"term": "fine", "count": 4}]
+
+    # Removing a question drops its counts
+    edit = {"title": "Analytics", "questions": [{"id": other["id"], "text": other["text"], "is_open_ended": True}]}
+    assert client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).status_code == 200
+    from database import SessionLocal
+    import terms
+    with SessionLocal() as db:
+        assert terms.top_terms(db, [why["id"]]) == {why["id"]: {"terms": [], "bigrams": []}}
+
+
+def test_timeseries_counts_submissions_per_bucket(client, auth_headers, survey_factory):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import update
+    from database import SessionLocal
+    import models
+    import rollups
+
+    survey = survey_factory(open_questions=1, options=OPTIONS[:2])
+    choice, open_ended = survey["questions"]
+    for answer in ["Option 0", "Option 1", "Option 1"]:
+        client.post(f"/api/responses/{survey['id']}", json=[
+            {"question_id": choice["id"], "answer": answer},
+            {"question_id": open_ended["id"], "answer": "why not"},
+        ])
+    client.post(f"/api/responses/{survey['id']}", json=[{"question_id": choice["id"], "answer": "Option 0"}])
+
+    url = f"/api/survey/{survey['id']}/analytics/timeseries"
+    hourly = client.get(f"{url}?granularity=hour", headers=auth_headers).json()
+    assert len(hourly["buckets"]) == 48
+    assert hourly["responses"][-1] == 4 and sum(hourly["responses"]) == 4
+    choice_series, open_series = hourly["questions"]
+    assert {text: values[-1] for text, values in choice_series["options"].items()} == {"Option 0": 2, "Option 1": 2}
+    assert open_series["answers"][-1] == 3
+
+    # Move two submissions back three days and recount them the way the migration does
+    today = rollups.bucket_start(datetime.now(timezone.utc), "day")
+    with SessionLocal() as db:
+        ids = [r["id"] for r in client.get(f"/api/responses/{survey['id']}", headers=auth_headers).json()]
+        db.execute(
+            update(models.Response).where(models.Response.id.in_(ids[:2]))
+            .values(created_at=today - timedelta(days=3) + timedelta(hours=5))
+        )
+        rollups.clear_rollups(db, survey["id"])
+        rollups.add_response_range(db, min(ids), max(ids))
+        db.commit()
+    start = (today - timedelta(days=4)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    daily = client.get(f"{url}?granularity=day&start={start}", headers=auth_headers).json()
+    assert daily["buckets"][0] == (today - timedelta(days=4)).isoformat()
+    assert daily["responses"] == [0, 2, 0, 0, 2]
+    assert daily["questions"][0]["options"] == {"Option 0": [0, 1, 0, 0, 1], "Option 1": [0, 1, 0, 0, 1]}
+
+    assert client.get(f"{url}?granularity=minute", headers=auth_headers).status_code == 422
+    assert client.get(f"{url}?granularity=hour&start=2000-01-01T00:00:00Z", headers=auth_headers).status_code == 400
+    assert client.get(f"{url}?start=2100-01-01T00:00:00Z", headers=auth_headers).status_code == 400
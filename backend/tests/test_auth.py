@@ -0,0 +1,47 @@
+import auth
+import models
+from database import SessionLocal
+
+
+def test_repeat_requests_reuse_the_cached_principal(client, auth_headers, query_counter):
+    client.get("/api/surveys", headers=auth_headers)
+    query_counter.reset()
+    client.get("/api/surveys", headers=auth_headers)
+    assert not [s for s in query_counter.statements if "FROM users" in s]
+
+
+def test_user_changes_invalidate_cached_principals(client, auth_headers):
+    assert client.get("/api/surveys", headers=auth_headers).status_code == 200
+    token = auth_headers["Authorization"].split()[1]
+    principal = auth.principal_cache.get(token)
+    assert principal is not None
+
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, principal.id)
+        user.is_active = False
+        db.commit()
+    finally:
+        db.close()
+
+    assert auth.principal_cache.get(token) is None
+    assert client.get("/api/surveys", headers=auth_headers).status_code == 400
+
+
+def test_invalid_token_is_rejected(client):
+    response = client.get("/api/surveys", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_password_hashing_sheds_load_when_saturated(client, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(auth, "_password_slots", threading.BoundedSemaphore(1))
+    auth._password_slots.acquire()
+    response = client.post("/api/auth/signup", json={"email": "busy@example.com", "password": "secret"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(auth.PASSWORD_HASH_RETRY_AFTER)
+
+
+def test_bcrypt_cost_factor_is_configurable():
+    assert auth.get_password_hash("secret").startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
@@ -0,0 +1,135 @@
+from sqlalchemy import insert, select
+
+import cache_sync
+import models
+from cache import TTLCache, shared_survey_cache, survey_questions_cache
+from database import SessionLocal, engine
+
+
+def share(client, headers):
+    survey = client.post("/api/survey/", json={
+        "title": "Cached",
+        "questions": [{"text": "Q", "is_open_ended": False, "options": [{"text": "A"}]}],
+    }, headers=headers).json()
+    token = client.post(f"/api/survey/{survey['id']}/share", headers=headers).json()["share_token"]
+    return survey, token
+
+
+def test_warm_shared_survey_hits_skip_the_database(client, auth_headers, query_counter):
+    survey, token = share(client, auth_headers)
+    cold = client.get(f"/api/surveys/shared/{token}")
+    assert cold.status_code == 200
+
+    hits = shared_survey_cache.hits
+    query_counter.reset()
+    warm = client.get(f"/api/survey/shared/{token}")
+    assert warm.json() == cold.json()
+    assert query_counter.count == 0
+    assert shared_survey_cache.hits == hits + 1
+
+
+def test_shared_survey_cache_is_invalidated_on_changes(client, auth_headers):
+    survey, token = share(client, auth_headers)
+    assert client.get(f"/api/surveys/shared/{token}").status_code == 200
+
+    client.patch(f"/api/surveys/{survey['id']}/status?is_active=false", headers=auth_headers)
+    assert client.get(f"/api/surveys/shared/{token}").status_code == 404
+
+    client.put(f"/api/surveys/{survey['id']}", json={"title": "Renamed", "questions": []}, headers=auth_headers)
+    assert client.get(f"/api/survey/shared/{token}").json()["title"] == "Renamed"
+
+    new_token = client.post(f"/api/survey/{survey['id']}/share", headers=auth_headers).json()["share_token"]
+    assert client.get(f"/api/survey/shared/{token}").status_code == 404
+    assert client.get(f"/api/survey/shared/{new_token}").status_code == 200
+
+    client.delete(f"/api/surveys/{survey['id']}", headers=auth_headers)
+    assert client.get(f"/api/survey/shared/{new_token}").status_code == 404
+
+    stats = client.get("/api/cache/stats", headers=auth_headers).json()["shared_survey"]
+    assert stats["hits"] >= 0 and stats["misses"] > 0
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+
+
+def record(invalidation_id, cache, key):
+    # As another worker process would
+    with engine.begin() as conn:
+        conn.execute(insert(models.CacheInvalidation).values(id=invalidation_id, cache=cache, key=key))
+
+
+def test_invalidations_from_other_processes_are_replayed():
+    worker = cache_sync.CacheSyncWorker(interval=60)
+    worker.start()
+    try:
+        first = worker._watermark + 1
+        survey_questions_cache.set(first, {})
+        shared_survey_cache.set("late", (True, b"{}"))
+        shared_survey_cache.set("early", (True, b"{}"))
+
+        record(first, "survey_questions", str(first))
+        # Ids can commit out of order; the one skipped here is replayed once it shows up
+        record(first + 2, "shared_survey", "early")
+        assert worker.poll() == 2
+        assert survey_questions_cache.get(first) is None
+        assert shared_survey_cache.get("early") is None
+        assert shared_survey_cache.get("late") is not None
+
+        record(first + 1, "shared_survey", "late")
+        assert worker.poll() == 1
+        assert shared_survey_cache.get("late") is None
+        assert worker.poll() == 0
+    finally:
+        worker.stop()
+
+
+def test_invalidations_after_a_prune_are_replayed(monkeypatch):
+    monkeypatch.setattr(cache_sync, "CACHE_SYNC", True)
+    cache_sync.invalidate("shared_survey", "before-prune")
+    worker = cache_sync.CacheSyncWorker(interval=60, retention=-1)
+    worker.start()
+    try:
+        worker.prune()
+        with engine.begin() as conn:
+            conn.execute(models.CacheInvalidation.__table__.delete())
+        shared_survey_cache.set("after-prune", (True, b"{}"))
+        with engine.begin() as conn:
+            conn.execute(insert(models.CacheInvalidation).values(cache="shared_survey", key="after-prune"))
+        assert worker.poll() == 1
+        assert shared_survey_cache.get("after-prune") is None
+    finally:
+        worker.stop()
+
+
+def test_invalidations_are_recorded_for_other_processes(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(cache_sync, "CACHE_SYNC", True)
+    survey, token = share(client, auth_headers)
+    client.patch(f"/api/surveys/{survey['id']}/status?is_active=false", headers=auth_headers)
+    client.put(f"/api/surveys/{survey['id']}", json={"title": "Renamed", "questions": []}, headers=auth_headers)
+
+    db = SessionLocal()
+    try:
+        user_id = db.get(models.Survey, survey["id"]).user_id
+        db.get(models.User, user_id).is_active = False
+        db.commit()
+        recorded = db.execute(
+            select(models.CacheInvalidation.cache, models.CacheInvalidation.key)
+            .order_by(models.CacheInvalidation.id.desc()).limit(4)
+        ).all()
+    finally:
+        db.close()
+    assert recorded[::-1] == [
+        ("shared_survey", token), ("shared_survey", token), ("survey_questions", str(survey["id"])),
+        ("principals", str(user_id)),
+    ]
@@ -0,0 +1,60 @@
+def revalidate(client, path, headers, etag):
+    return client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+def test_get_survey_returns_304_until_it_changes(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    path = f"/api/survey/{survey['id']}"
+
+    first = client.get(path, headers=auth_headers)
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+
+    unchanged = revalidate(client, path, auth_headers, etag)
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    client.patch(f"/api/surveys/{survey['id']}/status?is_active=false", headers=auth_headers)
+    changed = revalidate(client, path, auth_headers, etag)
+    assert changed.status_code == 200
+    assert changed.json()["is_active"] is False
+
+
+def test_list_surveys_revalidates(client, auth_headers, survey_factory):
+    survey_factory()
+    for path in ("/api/survey/", "/api/surveys"):
+        etag = client.get(path, headers=auth_headers).headers["etag"]
+        assert revalidate(client, path, auth_headers, etag).status_code == 304
+        survey_factory()
+        assert revalidate(client, path, auth_headers, etag).status_code == 200
+
+
+def test_list_surveys_revalidates_after_quick_status_and_share_changes(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    changes = [
+        lambda: client.patch(f"/api/surveys/{survey['id']}/status?is_active=false", headers=auth_headers),
+        lambda: client.post(f"/api/survey/{survey['id']}/share", headers=auth_headers),
+        lambda: client.patch(f"/api/surveys/{survey['id']}/status?is_active=true", headers=auth_headers),
+    ]
+    for change in changes:
+        # Each change lands well within the second of the previous write
+        etag = client.get("/api/surveys", headers=auth_headers).headers["etag"]
+        change()
+        assert revalidate(client, "/api/surveys", auth_headers, etag).status_code == 200
+
+
+def test_analytics_revalidates_on_new_responses(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    path = f"/api/survey/{survey['id']}/analytics"
+    first = client.get(path, headers=auth_headers)
+    etag = first.headers["etag"]
+    assert revalidate(client, path, auth_headers, etag).status_code == 304
+
+    question = survey["questions"][0]
+    client.post(f"/api/responses/{survey['id']}", json=[{"question_id": question["id"], "answer": "Yes"}])
+    changed = revalidate(client, path, auth_headers, etag)
+    assert changed.status_code == 200
+    assert changed.json()["analytics"][0]["options"]["Yes"] == 1
+
+    since = client.get(path, headers={**auth_headers, "If-Modified-Since": changed.headers["last-modified"]})
+    assert since.status_code == 304
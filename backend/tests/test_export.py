@@ -0,0 +1,37 @@
+import asyncio
+import csv
+from io import StringIO
+
+import exports
+
+
+def test_export_writes_one_row_per_response(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=1)
+    choice, open_ended = survey["questions"]
+    client.post(f"/api/responses/{survey['id']}", json=[
+        {"question_id": choice["id"], "answer": "No"},
+        {"question_id": open_ended["id"], "answer": "it, \"quoted\""},
+    ])
+
+    response = client.get(f"/api/survey/{survey['id']}/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(StringIO(response.text)))
+    assert rows[0] == ["Response ID", "Submitted At", "Q0", "Open 0"]
+    # One row per submission, choice answers spelled out by option text
+    assert [row[2:] for row in rows[1:]] == [["No", "it, \"quoted\""]]
+
+
+def test_export_streams_in_batches(client, survey_factory):
+    survey = survey_factory(open_questions=1)
+    choice = survey["questions"][0]
+    for _ in range(5):
+        client.post(f"/api/responses/{survey['id']}", json=[{"question_id": choice["id"], "answer": "Yes"}])
+
+    async def collect():
+        return [chunk async for chunk in exports.iter_survey_csv(survey["id"], batch_size=2)]
+
+    chunks = asyncio.run(collect())
+    # header, one chunk per batch of ceil(5 / 2), then the last buffered row
+    assert len(chunks) == 5
+    assert sum(chunk.count("\n") for chunk in chunks) == 6
@@ -0,0 +1,73 @@
+import json
+
+from graphql import parse
+from strawberry.extensions import ParserCache
+
+import graphql_extensions
+from graphql_extensions import query_cost, query_hash
+from graphql_schema import schema
+from main import graphql_app
+
+NESTED = "{ surveysPage(first: %d) { items { id questions { id options { id } } } } }"
+
+
+def test_cost_scales_with_page_size_and_nesting():
+    costs = [query_cost(schema._schema, parse(NESTED % first)) for first in (1, 10)]
+    # surveysPage + items + questions + options
+    assert costs == [1 + 1 + 10 + 100, 1 + 10 + 100 + 1000]
+    with_variable = parse("query($n: Int) { getSurveys(first: $n) { id } }")
+    assert query_cost(schema._schema, with_variable, {"n": 5}) == 5
+
+
+def test_expensive_queries_are_refused(client):
+    body = client.post("/graphql", json={"query": NESTED % 1000}).json()
+    assert body["data"] is None
+    assert "exceeds the maximum" in body["errors"][0]["message"]
+    assert "errors" not in client.post("/graphql", json={"query": NESTED % 10}).json()
+
+
+def test_frontend_queries_are_persisted_and_affordable():
+    with open(graphql_extensions.GRAPHQL_PERSISTED_QUERIES) as f:
+        persisted = json.load(f)
+    assert persisted
+    for sha256, query in persisted.items():
+        assert query_hash(query) == sha256
+        assert query_cost(schema._schema, parse(query), {"id": 1}) <= graphql_extensions.GRAPHQL_MAX_COST
+
+
+def test_persisted_query_protocol(client):
+    query = "query Ids { getSurveys(first: 3) { id } }"
+    extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+    missing = client.post("/graphql", json={"extensions": extensions})
+    assert (missing.status_code, missing.text) == (400, "PersistedQueryNotFound")
+    registered = client.post("/graphql", json={"query": query, "extensions": extensions})
+    assert "errors" not in registered.json()
+    by_hash = client.post("/graphql", json={"extensions": extensions})
+    assert by_hash.json() == registered.json()
+    # Also over GET, with extensions as a JSON query parameter
+    assert client.get("/graphql", params={"extensions": json.dumps(extensions)}).json() == registered.json()
+
+    wrong = {"persistedQuery": {"version": 1, "sha256Hash": "0" * 64}}
+    assert client.post("/graphql", json={"query": query, "extensions": wrong}).status_code == 400
+
+
+def test_allow_list_only_mode(client, monkeypatch):
+    monkeypatch.setattr(graphql_app.persisted_queries, "allow_adhoc", False)
+    [(sha256, query)] = list(graphql_app.persisted_queries.known.items())[:1]
+
+    assert client.post("/graphql", json={"query": "{ getSurveys { id } }"}).status_code == 400
+    extensions = {"persistedQuery": {"version": 1, "sha256Hash": sha256}}
+    response = client.post("/graphql", json={"extensions": extensions, "variables": {"id": 1, "after": None}})
+    assert response.status_code == 200
+    assert client.post("/graphql", json={"query": query, "variables": {"id": 1}}).status_code == 200
+
+
+def test_repeated_documents_are_parsed_once(client):
+    [parser_cache] = [extension for extension in schema.extensions if isinstance(extension, ParserCache)]
+    query = {"query": "query Once { getSurveys(first: 1) { id } }"}
+    client.post("/graphql", json=query)
+    before = parser_cache.cached_parse_document.cache_info()
+    client.post("/graphql", json=query)
+    after = parser_cache.cached_parse_document.cache_info()
+    assert (after.hits - before.hits, after.misses - before.misses) == (1, 0)
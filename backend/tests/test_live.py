@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import live
+import pubsub
+from main import app
+
+
+def events(text):
+    parsed = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if line.startswith(("event", "data")))
+        if "event" in lines:
+            parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def submission(question_id=1, option="Yes"):
+    return [{"question_id": question_id, "option_id": 7, "text": None, "answer": option},
+            {"question_id": 2, "option_id": None, "text": "why", "answer": "why"}]
+
+
+def test_bursts_are_coalesced_into_one_event():
+    broker = pubsub.InProcessBroker()
+
+    async def scenario():
+        subscription = broker.subscribe("survey")
+        stream = live.stream(subscription, min_interval=0.2, heartbeat=10, max_seconds=5)
+        assert "event: ready" in await stream.__anext__()
+
+        broker.publish("survey", live.tally_delta([submission()]))
+        first = await stream.__anext__()
+        sent = time.monotonic()
+        # Published from other threads, as the ingestion worker does
+        for option in ("Yes", "No", "No"):
+            await asyncio.to_thread(broker.publish, "survey", live.tally_delta([submission(option=option)]))
+        second = await stream.__anext__()
+        assert time.monotonic() - sent >= 0.15
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert events(first) == [("tallies", {"responses": 1, "options": {"1": {"Yes": 1}}, "answers": {"2": 1}})]
+    assert events(second) == [("tallies", {"responses": 3, "options": {"1": {"Yes": 1, "No": 2}}, "answers": {"2": 3}})]
+    assert broker.subscriber_count("survey") == 0
+
+
+def test_subscriber_that_falls_behind_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(pubsub, "PUBSUB_QUEUE_SIZE", 2)
+    broker = pubsub.InProcessBroker()
+
+    async def scenario():
+        subscription = broker.subscribe("survey")
+        stream = live.stream(subscription, min_interval=0, heartbeat=10, max_seconds=5)
+        await stream.__anext__()
+        for _ in range(5):
+            broker.publish("survey", live.tally_delta([submission()]))
+        await asyncio.sleep(0)
+        text = await stream.__anext__()
+        await stream.aclose()
+        return text
+
+    assert events(asyncio.run(scenario())) == [("resync", {})]
+
+
+def test_stream_endpoint_pushes_submissions(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(live, "SSE_MAX_STREAM_SECONDS", 1.5)
+    monkeypatch.setattr(live, "SSE_MIN_INTERVAL", 0.1)
+    survey = client.post("/api/survey/", headers=auth_headers, json={"title": "Live", "questions": [
+        {"text": "Pick", "is_open_ended": False, "options": [{"text": "Yes"}, {"text": "No"}]},
+    ]}).json()
+    question = survey["questions"][0]
+    token = auth_headers["Authorization"].split()[1]
+    url = f"/api/survey/{survey['id']}/analytics/stream"
+    checked_out = []
+
+    def submit():
+        time.sleep(0.5)
+        TestClient(app).post(f"/api/responses/{survey['id']}", json=[{"question_id": question["id"], "answer": "No"}])
+        # The open stream holds no database connection
+        checked_out.append(database.async_engine.pool.checkedout())
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    response = client.get(f"{url}?access_token={token}")
+    thread.join()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert events(response.text) == [
+        ("ready", {}),
+        ("tallies", {"responses": 1, "options": {str(question["id"]): {"No": 1}}, "answers": {}}),
+    ]
+    assert checked_out == [0]
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=auth_headers).status_code == 200
+
+
+def test_incomplete_brokers_fail_when_constructed():
+    class PublishOnly(pubsub.Broker):
+        def publish(self, channel, message):
+            pass
+
+    with pytest.raises(TypeError):
+        PublishOnly()
+
+
+def test_database_broker_publish_leaves_the_database_to_its_thread(query_counter):
+    broker = pubsub.DatabaseBroker(interval=60)
+    broker.publish("survey", {"responses": 1})
+    assert query_counter.count == 0
+    assert broker.flush() == 1
+
+
+def test_database_broker_reaches_subscribers_in_other_processes():
+    # Two brokers on one database, as in two worker processes
+    publisher, receiver = pubsub.DatabaseBroker(interval=60), pubsub.DatabaseBroker(interval=60)
+    publisher.start()
+    receiver.start()
+
+    async def scenario():
+        subscription = receiver.subscribe("survey")
+        publisher.publish("survey", {"responses": 1})
+        publisher.publish("other", {"responses": 2})
+        assert receiver.follower.poll() == 0
+        # Written in one transaction by the publisher's own follower thread
+        assert publisher.flush() == 2
+        assert await subscription.get(timeout=0.1) is None
+        assert receiver.follower.poll() == 2
+        message = await subscription.get(timeout=1)
+        assert subscription.drain() == []
+        subscription.close()
+        return message
+
+    try:
+        assert asyncio.run(scenario()) == {"responses": 1}
+        # The publisher polls the same rows and delivers to its own subscribers too
+        assert publisher.follower.poll() == 2
+    finally:
+        publisher.stop()
+        receiver.stop()
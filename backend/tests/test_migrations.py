@@ -0,0 +1,138 @@
+from sqlalchemy import create_engine, inspect, text
+
+import migrations
+import models
+import search
+import tallies
+import terms
+from database import SessionLocal
+
+# The schema as the first release created it: no is_active, tallies or indexes
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR UNIQUE, hashed_password VARCHAR,
+                    is_active BOOLEAN, is_superuser BOOLEAN);
+CREATE TABLE surveys (id INTEGER PRIMARY KEY, title VARCHAR, description TEXT,
+                      created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                      user_id INTEGER REFERENCES users (id), share_token VARCHAR UNIQUE);
+CREATE TABLE questions (id INTEGER PRIMARY KEY, text TEXT, is_open_ended BOOLEAN, "order" INTEGER,
+                        survey_id INTEGER REFERENCES surveys (id));
+CREATE TABLE question_options (id INTEGER PRIMARY KEY, text TEXT, question_id INTEGER REFERENCES questions (id));
+CREATE TABLE responses (id INTEGER PRIMARY KEY, survey_id INTEGER REFERENCES surveys (id),
+                        question_id INTEGER REFERENCES questions (id), answer TEXT,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE answers (id INTEGER PRIMARY KEY, response_id INTEGER REFERENCES responses (id),
+                      question_id INTEGER REFERENCES questions (id), text TEXT);
+"""
+
+
+def legacy_engine(path, responses):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA.split(";"):
+            if statement.strip():
+                conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO users (id, email) VALUES (1, 'legacy@example.com')")
+        conn.exec_driver_sql("INSERT INTO surveys (id, title, user_id) VALUES (1, 'Legacy', 1)")
+        conn.exec_driver_sql(
+            "INSERT INTO questions (id, text, is_open_ended, \"order\", survey_id) VALUES (1, 'Pick', 0, 0, 1), (2, 'Why', 1, 1, 1)"
+        )
+        conn.exec_driver_sql("INSERT INTO question_options (id, text, question_id) VALUES (1, 'Yes', 1), (2, 'No', 1)")
+        # Every two rows are one submission: a choice (or a text matching no option) and a comment
+        conn.exec_driver_sql(
+            "INSERT INTO responses (survey_id, question_id, answer) VALUES (?, ?, ?)",
+            [(1, 1 + i % 2, ("Yes", "No", "Maybe")[i % 3]) for i in range(responses)],
+        )
+        # The first release also copied every answer into answers
+        conn.exec_driver_sql(
+            "INSERT INTO answers (response_id, question_id, text) SELECT id, question_id, answer FROM responses"
+        )
+    return engine
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATION_CHUNK_SIZE", 999)
+    engine = legacy_engine(tmp_path / "legacy.db", responses=20_000)
+    with engine.begin() as conn:
+        # Text-keyed tallies, as kept before answers referenced options
+        conn.exec_driver_sql(
+            "CREATE TABLE option_tallies (survey_id INTEGER, question_id INTEGER, option_text TEXT, count INTEGER, "
+            "PRIMARY KEY (survey_id, question_id, option_text))"
+        )
+        conn.exec_driver_sql("INSERT INTO option_tallies VALUES (1, 1, 'Yes', 42)")
+
+    assert migrations.migrate(engine) == [version for version, _, _ in migrations.MIGRATIONS]
+
+    schema = inspect(engine)
+    assert "is_active" in {c["name"] for c in schema.get_columns("surveys")}
+    assert "ix_answers_question_option" in {ix["name"] for ix in schema.get_indexes("answers")}
+    assert "ix_responses_survey_question_answer" not in {ix["name"] for ix in schema.get_indexes("responses")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT is_active FROM surveys")).scalar() == 1
+        # One response per submission, none split across chunks
+        assert conn.execute(text("SELECT count(*) FROM responses")).scalar() == 10_000
+        assert conn.execute(text("SELECT count(*) FROM responses WHERE question_id IS NOT NULL")).scalar() == 0
+        per_response = conn.execute(text("SELECT count(*) FROM answers GROUP BY response_id")).scalars().all()
+        assert set(per_response) == {2}
+        # Choices point at options; text that matches no option is kept
+        choices = dict(conn.execute(text(
+            "SELECT coalesce(option_id, text), count(*) FROM answers WHERE question_id = 1 GROUP BY 1"
+        )).all())
+        assert choices == {1: 3334, 2: 3333, "Maybe": 3333}
+        # Text answers were indexed for search, chunk by chunk
+        for question_id, word in ((1, "maybe"), (2, "no")):
+            assert conn.execute(
+                text(f"SELECT count(*) FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH :match"),
+                {"match": search.match_expression(question_id, word)},
+            ).scalar() == conn.execute(
+                text("SELECT count(*) FROM answers WHERE question_id = :id AND lower(text) = :word"),
+                {"id": question_id, "word": word},
+            ).scalar() > 0
+
+    # Open-ended answers' terms were counted; choices that matched an option have no text
+    with SessionLocal(bind=engine) as db:
+        top = terms.top_terms(db, [1, 2])
+        assert top[1]["terms"] == [{"term": "maybe", "count": 3333}]
+        assert top[2]["terms"] == [
+            {"term": "maybe", "count": 3333}, {"term": "yes", "count": 3333},
+        ]
+
+    # Every submission was counted in its hour and day
+    with engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT granularity, sum(count) FROM response_rollups WHERE question_id = 0 GROUP BY 1 ORDER BY 1"
+        )).all() == [("day", 10_000), ("hour", 10_000)]
+
+    # The chunked tally backfill matches a full rebuild
+    with SessionLocal(bind=engine) as db:
+        backfilled = tallies.read_tallies(db, 1)
+        tallies.rebuild_tallies(db, 1)
+        db.commit()
+        assert backfilled == tallies.read_tallies(db, 1) == {1: {1: 3334, 2: 3333}}
+
+
+def test_legacy_database_without_tallies_is_upgraded(tmp_path):
+    # Released before option tallies existed, so migration 1 creates their table empty
+    engine = legacy_engine(tmp_path / "untallied.db", responses=600)
+    assert migrations.migrate(engine) == [version for version, _, _ in migrations.MIGRATIONS]
+    with SessionLocal(bind=engine) as db:
+        assert tallies.read_tallies(db, 1) == {1: {1: 100, 2: 100}}
+
+
+def test_migrate_is_idempotent_and_respects_target(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrations.migrate(engine, target=2) == [1, 2]
+    assert [version for version, _, _ in migrations.pending_migrations(engine)] == [3, 4, 5, 6, 7, 8, 9, 10]
+    assert migrations.migrate(engine) == [3, 4, 5, 6, 7, 8, 9, 10]
+    assert migrations.migrate(engine) == []
+    # A fresh database gets the full model schema
+    assert set(models.Base.metadata.tables) <= set(inspect(engine).get_table_names())
+
+
+def test_missing_indexes_are_added_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    migrations.migrate(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_surveys_user_created")
+
+    migrations.create_missing_indexes(engine)
+    assert "ix_surveys_user_created" in {ix["name"] for ix in inspect(engine).get_indexes("surveys")}
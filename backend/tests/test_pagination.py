@@ -0,0 +1,79 @@
+import pytest
+
+
+def walk(client, path, headers, limit):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        seen.extend(item["id"] for item in page)
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return seen
+
+
+def test_responses_are_paged_without_gaps_or_duplicates(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    question_id = survey["questions"][0]["id"]
+    # Submitted within the same second, so most rows share created_at
+    payload = [{"question_id": question_id, "answer": "Yes"}]
+    created = [client.post(f"/api/responses/{survey['id']}", json=payload).json()["id"] for _ in range(7)]
+
+    assert walk(client, f"/api/responses/{survey['id']}", auth_headers, limit=3) == created
+
+
+@pytest.mark.parametrize("path", ["/api/survey/", "/api/surveys"])
+def test_surveys_are_paged(client, auth_headers, survey_factory, path):
+    created = [survey_factory()["id"] for _ in range(5)]
+    assert walk(client, path, auth_headers, limit=2) == created
+
+
+def test_survey_pages_have_distinct_etags(client, auth_headers, survey_factory):
+    for _ in range(3):
+        survey_factory()
+    first = client.get("/api/surveys", params={"limit": 2}, headers=auth_headers)
+    second = client.get(
+        "/api/surveys",
+        params={"limit": 2, "cursor": first.headers["x-next-cursor"]},
+        headers={**auth_headers, "If-None-Match": first.headers["etag"]},
+    )
+    assert second.status_code == 200
+    assert len(second.json()) == 1
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    response = client.get(f"/api/responses/{survey['id']}", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert client.get("/api/surveys", params={"limit": 0}, headers=auth_headers).status_code == 422
+
+
+def test_graphql_responses_page(client, survey_factory):
+    survey = survey_factory()
+    question_id = survey["questions"][0]["id"]
+    created = [
+        client.post(f"/api/responses/{survey['id']}", json=[{"question_id": question_id, "answer": "No"}]).json()["id"]
+        for _ in range(5)
+    ]
+    query = """
+        query Page($surveyId: Int!, $after: String) {
+            surveyResponsesPage(surveyId: $surveyId, first: 2, after: $after) {
+                items { id surveyId }
+                nextCursor
+            }
+        }
+    """
+    seen, after = [], None
+    while True:
+        body = client.post("/graphql", json={
+            "query": query, "variables": {"surveyId": survey["id"], "after": after},
+        }).json()
+        page = body["data"]["surveyResponsesPage"]
+        seen.extend(item["id"] for item in page["items"])
+        after = page["nextCursor"]
+        if after is None:
+            break
+    assert seen == created
@@ -0,0 +1,93 @@
+import pytest
+
+import database
+
+
+def survey_payload(questions=2, options=3):
+    return {
+        "title": "N+1",
+        "questions": [
+            {"text": f"Q{i}", "is_open_ended": False, "options": [{"text": f"O{j}"} for j in range(options)]}
+            for i in range(questions)
+        ],
+    }
+
+
+def add_surveys(client, headers, count=5):
+    return [client.post("/api/survey/", json=survey_payload(), headers=headers).json() for _ in range(count)]
+
+
+@pytest.mark.parametrize("path", ["/api/survey/", "/api/surveys"])
+def test_list_surveys_has_no_n_plus_one(client, auth_headers, assert_constant_queries, path):
+    add_surveys(client, auth_headers, 1)
+    assert_constant_queries(
+        lambda: client.get(path, headers=auth_headers),
+        lambda: add_surveys(client, auth_headers),
+    )
+
+
+def test_survey_endpoints_have_no_n_plus_one(client, auth_headers, assert_constant_queries):
+    small = client.post("/api/survey/", json=survey_payload(1, 1), headers=auth_headers).json()
+    large = client.post("/api/survey/", json=survey_payload(10, 5), headers=auth_headers).json()
+    tokens = {}
+    for survey in (small, large):
+        tokens[survey["id"]] = client.post(f"/api/survey/{survey['id']}/share", headers=auth_headers).json()["share_token"]
+
+    requests = [
+        lambda survey: client.get(f"/api/survey/{survey['id']}", headers=auth_headers),
+        lambda survey: client.get(f"/api/survey/shared/{tokens[survey['id']]}"),
+        lambda survey: client.get(f"/api/surveys/shared/{tokens[survey['id']]}"),
+        lambda survey: client.patch(f"/api/surveys/{survey['id']}/status?is_active=true", headers=auth_headers),
+    ]
+    for request in requests:
+        target = small
+
+        def grow():
+            nonlocal target
+            target = large
+
+        assert_constant_queries(lambda: request(target), grow)
+
+
+def test_created_survey_is_serialized_without_lazy_loads(client, auth_headers, query_counter):
+    client.get("/api/surveys", headers=auth_headers)  # warm the principal cache
+    selects = []
+    for questions in (1, 10):
+        query_counter.reset()
+        client.post("/api/survey/", json=survey_payload(questions, 4), headers=auth_headers)
+        selects.append([s for s in query_counter.statements if s.lstrip().upper().startswith("SELECT")])
+    assert len(selects[0]) == len(selects[1])
+
+
+def test_graphql_surveys_have_no_n_plus_one(client, auth_headers, assert_constant_queries):
+    query = {"query": "{ getSurveys { id title questions { id text options { id text } } } }"}
+    add_surveys(client, auth_headers, 1)
+    assert_constant_queries(
+        lambda: client.post("/graphql", json=query),
+        lambda: add_surveys(client, auth_headers),
+    )
+
+
+def test_graphql_nested_fields_are_batched(client, auth_headers, query_counter):
+    surveys = add_surveys(client, auth_headers, 100)
+    survey = surveys[0]
+    for _ in range(20):
+        client.post(f"/api/responses/{survey['id']}", json=[
+            {"question_id": q["id"], "answer": "O1"} for q in survey["questions"]
+        ])
+    query = """
+        query Nested($surveyId: Int!) {
+            surveysPage(first: 100) { items { id title questions { id text options { id text } } } }
+            surveyResponsesPage(surveyId: $surveyId, first: 100) { items { id answers { questionId optionId text } } }
+        }
+    """
+
+    query_counter.reset()
+    body = client.post("/graphql", json={"query": query, "variables": {"surveyId": survey["id"]}}).json()
+    assert "errors" not in body
+    assert len(body["data"]["surveyResponsesPage"]["items"]) == 20
+    # One statement per level: surveys, questions, options, responses, answers and their options
+    assert query_counter.count == 6
+    # The request-scoped session went back to the pool
+    assert database.engine.pool.checkedout() == 0
+    assert database.async_engine.pool.checkedout() == 0
@@ -0,0 +1,128 @@
+"""EXPLAIN QUERY PLAN checks for the statements behind the hot endpoints.
+
+Each test records the SQL an endpoint actually runs and asks SQLite how it
+would execute it, so a dropped index or a rewritten query that can no
+longer use one shows up as a failure rather than a slow page.
+"""
+import pytest
+from sqlalchemy import event
+
+import database
+import tallies
+from cache import shared_survey_cache
+from conftest import test_engine
+
+INDEXED_TABLES = {
+    "users", "surveys", "questions", "question_options", "responses", "answers", "option_tallies", "term_counts",
+    "response_rollups",
+}
+
+
+@pytest.fixture
+def captured():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    engines = (test_engine, database.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plans(statements):
+    with test_engine.connect() as conn:
+        return [
+            (statement, [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)])
+            for statement, parameters in statements
+        ]
+
+
+def assert_uses_indexes(statements, *index_names):
+    plans = query_plans(statements)
+    for statement, details in plans:
+        scans = [
+            detail for detail in details
+            if detail.startswith("SCAN ") and detail.split()[1] in INDEXED_TABLES and "INDEX" not in detail
+        ]
+        assert not scans, f"full table scan {scans} for:\n{statement}"
+    used = " ".join(detail for _, details in plans for detail in details)
+    for name in index_names:
+        assert name in used, f"{name} not used by any of:\n" + "\n".join(s for s, _ in plans)
+
+
+def create_answered_survey(client, survey_factory):
+    survey = survey_factory(open_questions=1)
+    payload = [
+        {"question_id": survey["questions"][0]["id"], "answer": "Yes"},
+        {"question_id": survey["questions"][1]["id"], "answer": "Because"},
+    ]
+    client.post(f"/api/responses/{survey['id']}", json=payload)
+    return survey
+
+
+def test_analytics_queries_use_indexes(client, auth_headers, survey_factory, captured):
+    survey = create_answered_survey(client, survey_factory)
+    open_question = survey["questions"][1]["id"]
+    captured.clear()
+    client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers)
+    client.get(f"/api/survey/{survey['id']}/analytics/{open_question}/answers", headers=auth_headers)
+    with database.SessionLocal() as db:
+        tallies.rebuild_tallies(db, survey["id"])
+        db.rollback()
+    assert_uses_indexes(captured, "ix_answers_question_option", "ix_option_tallies_survey_id", "ix_term_counts_top")
+
+
+def test_shared_survey_lookup_uses_index(client, auth_headers, survey_factory, captured):
+    survey = create_answered_survey(client, survey_factory)
+    token = client.post(f"/api/survey/{survey['id']}/share", headers=auth_headers).json()["share_token"]
+    shared_survey_cache.clear()
+    captured.clear()
+    assert client.get(f"/api/surveys/shared/{token}").status_code == 200
+    assert_uses_indexes(captured, "ix_surveys_share_token", "ix_questions_survey_id", "ix_question_options_question_id")
+
+
+def test_dashboard_queries_use_indexes(client, auth_headers, survey_factory, captured):
+    create_answered_survey(client, survey_factory)
+    captured.clear()
+    client.get("/api/surveys", headers=auth_headers)
+    client.get("/api/survey/", headers=auth_headers)
+    assert_uses_indexes(captured, "ix_surveys_user_created")
+
+
+def test_response_listing_and_export_use_indexes(client, auth_headers, survey_factory, captured):
+    survey = create_answered_survey(client, survey_factory)
+    captured.clear()
+    client.get(f"/api/responses/{survey['id']}", headers=auth_headers)
+    client.get(f"/api/survey/{survey['id']}/export", headers=auth_headers)
+    assert_uses_indexes(captured, "ix_responses_survey_created")
+    # The index also supplies the (created_at, id) order, so no sort step
+    for statement, details in query_plans(captured):
+        if "FROM responses" in statement:
+            assert not any("TEMP B-TREE" in detail for detail in details), statement
+
+
+
+def test_answer_search_runs_the_match_once(client, auth_headers, survey_factory, captured):
+    survey = create_answered_survey(client, survey_factory)
+    open_question = survey["questions"][1]["id"]
+    captured.clear()
+    client.get(f"/api/survey/{survey['id']}/analytics/{open_question}/search?q=because", headers=auth_headers)
+    searches = [(statement, details) for statement, details in query_plans(captured) if "MATCH" in statement]
+    assert len(searches) == 2
+    for statement, details in searches:
+        # The FTS index drives the query and answers are looked up per match,
+        # not scanned through ix_answers_question_option with a MATCH per row
+        assert any(detail.startswith("MATERIALIZE") for detail in details), statement
+        assert any(detail.startswith("SEARCH answers") and "rowid=?" in detail for detail in details), statement
+
+
+def test_timeseries_reads_rollups_by_primary_key(client, auth_headers, survey_factory, captured):
+    survey = create_answered_survey(client, survey_factory)
+    captured.clear()
+    client.get(f"/api/survey/{survey['id']}/analytics/timeseries?granularity=hour", headers=auth_headers)
+    assert_uses_indexes(captured, "sqlite_autoindex_response_rollups_1")
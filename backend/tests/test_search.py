@@ -0,0 +1,73 @@
+from sqlalchemy import text
+
+import database
+import search
+
+
+def submit(client, survey, why, other="nothing", pick="shipping"):
+    choice, open_ended, other_question = survey["questions"]
+    client.post(f"/api/responses/{survey['id']}", json=[
+        {"question_id": choice["id"], "answer": pick},
+        {"question_id": open_ended["id"], "answer": why},
+        {"question_id": other_question["id"], "answer": other},
+    ])
+
+
+def search_url(survey, question, query, **params):
+    params = "".join(f"&{key}={value}" for key, value in params.items())
+    return f"/api/survey/{survey['id']}/analytics/{question['id']}/search?q={query}{params}"
+
+
+def test_search_ranks_and_pages_one_questions_answers(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=2, options=("shipping", "support"))
+    _, why, other = survey["questions"]
+    submit(client, survey, "Shipping was slow", other="slow slow slow")
+    submit(client, survey, "Slow shipping, slow support, slow refunds")
+    submit(client, survey, "Fast and friendly")
+    submit(client, survey, "Shipped quickly")
+
+    results = client.get(search_url(survey, why, "slow"), headers=auth_headers).json()
+    assert results["total"] == 2
+    # More occurrences in a shorter answer rank first; the choice answer
+    # "shipping" and the other question's answers are not searched
+    assert [a["text"] for a in results["answers"]] == ["Slow shipping, slow support, slow refunds", "Shipping was slow"]
+
+    page = client.get(search_url(survey, why, "slow", offset=1, limit=1), headers=auth_headers).json()
+    assert (page["total"], page["answers"]) == (2, results["answers"][1:])
+    assert client.get(search_url(survey, why, "slow shipping"), headers=auth_headers).json()["total"] == 2
+    # No stemming, but a trailing * matches prefixes
+    assert client.get(search_url(survey, why, "ship*"), headers=auth_headers).json()["total"] == 3
+    assert client.get(search_url(survey, other, "slow"), headers=auth_headers).json()["total"] == 1
+
+
+def test_search_input_is_not_fts_syntax(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=2, options=("shipping", "support"))
+    why = survey["questions"][1]
+    submit(client, survey, 'said "NEAR" OR AND (nothing)')
+
+    response = client.get(search_url(survey, why, '"NEAR" OR (nothing'), headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert client.get(search_url(survey, why, "***"), headers=auth_headers).status_code == 400
+
+
+def test_index_follows_edits_and_deletes(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=2, options=("shipping", "support"))
+    choice, why, other = survey["questions"]
+    submit(client, survey, "slow delivery", pick="support")
+
+    # Dropping the "support" option keeps the choice as searchable text
+    edit = {"title": "Search", "questions": [
+        {"id": choice["id"], "text": "Pick", "is_open_ended": False, "options": [{"id": choice["options"][0]["id"], "text": "shipping"}]},
+        {"id": other["id"], "text": "Anything else?", "is_open_ended": True},
+    ]}
+    assert client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).status_code == 200
+    assert client.get(search_url(survey, choice, "support"), headers=auth_headers).json()["total"] == 1
+    # Removing the question removed its answers from the index as well
+    assert client.get(search_url(survey, why, "slow"), headers=auth_headers).json()["total"] == 0
+    with database.engine.connect() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {search.FTS_TABLE} ({search.FTS_TABLE}) VALUES ('integrity-check')")
+        assert conn.execute(
+            text(f"SELECT count(*) FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH :match"),
+            {"match": search.match_expression(why["id"], "slow")},
+        ).scalar() == 0
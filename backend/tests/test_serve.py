@@ -0,0 +1,16 @@
+import os
+
+import migrations
+import serve
+
+
+def test_serve_migrates_once_then_starts_workers(monkeypatch):
+    calls = []
+    environ = {}
+    monkeypatch.setattr(os, "environ", environ)
+    monkeypatch.setattr(migrations, "migrate", lambda **kwargs: calls.append("migrate") or [])
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: calls.append((app, kwargs)))
+
+    serve.main(["--workers", "4", "--port", "9000"])
+    assert calls == ["migrate", ("main:app", {"host": "0.0.0.0", "port": 9000, "workers": 4})]
+    assert environ == {"MIGRATE_ON_STARTUP": "false", "CACHE_SYNC": "true", "PUBSUB_BACKEND": "database"}
@@ -0,0 +1,202 @@
+def test_submit_creates_one_response_per_submission(client, auth_headers, survey_factory):
+    survey = survey_factory(choice_questions=2)
+    payload = [{"question_id": q["id"], "answer": "Yes"} for q in survey["questions"]]
+
+    response = client.post(f"/api/responses/{survey['id']}", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["survey_id"] == survey["id"] and body["id"] and body["created_at"]
+    assert [(a["question_id"], a["answer"]) for a in body["answers"]] == [(p["question_id"], p["answer"]) for p in payload]
+    # Choice answers are stored by option id
+    yes_ids = [next(o["id"] for o in q["options"] if o["text"] == "Yes") for q in survey["questions"]]
+    assert [a["option_id"] for a in body["answers"]] == yes_ids
+
+    listed = client.get(f"/api/responses/{survey['id']}", headers=auth_headers).json()
+    assert listed == [body]
+
+
+def test_submit_rejects_foreign_question_and_unknown_option(client, survey_factory):
+    survey = survey_factory()
+    response = client.post(f"/api/responses/{survey['id']}", json=[{"question_id": 999999, "answer": "Yes"}])
+    assert response.status_code == 400
+    question_id = survey["questions"][0]["id"]
+    response = client.post(f"/api/responses/{survey['id']}", json=[{"question_id": question_id, "answer": "Maybe"}])
+    assert response.status_code == 400
+    assert client.post("/api/responses/999999", json=[]).status_code == 404
+
+
+def test_submit_rechecks_options_a_stale_cache_still_lists(client, auth_headers, survey_factory):
+    from sqlalchemy import delete, insert
+
+    from database import SessionLocal
+    import models
+
+    survey = survey_factory()
+    question = survey["questions"][0]
+    no = next(o["id"] for o in question["options"] if o["text"] == "No")
+    url = f"/api/responses/{survey['id']}"
+    assert client.post(url, json=[{"question_id": question["id"], "answer": "Yes"}]).status_code == 200
+
+    # Another worker removes the option; this one's cached question map still has it
+    db = SessionLocal()
+    try:
+        db.execute(delete(models.QuestionOption).where(models.QuestionOption.id == no))
+        db.commit()
+        response = client.post(url, json=[{"question_id": question["id"], "answer": "No"}])
+        assert response.status_code == 400
+        assert db.query(models.Answer).filter(models.Answer.option_id == no).count() == 0
+        # The entry is dropped, so the next attempt sees the current options
+        assert client.post(url, json=[{"question_id": question["id"], "answer": "No"}]).json()["detail"] == (
+            f"'No' is not an option of question {question['id']}"
+        )
+
+        # Answers left pointing at a missing option by earlier races still list
+        response_id = client.post(url, json=[{"question_id": question["id"], "answer": "Yes"}]).json()["id"]
+        db.execute(insert(models.Answer).values(response_id=response_id, question_id=question["id"], option_id=no))
+        db.commit()
+    finally:
+        db.close()
+    listed = client.get(url, headers=auth_headers)
+    assert listed.status_code == 200
+    assert [a["answer"] for a in listed.json()[-1]["answers"]] == ["Yes", ""]
+
+
+def test_submit_query_count_is_independent_of_answer_count(client, survey_factory, query_counter):
+    counts = []
+    for size in (2, 50):
+        survey = survey_factory(choice_questions=size)
+        payload = [{"question_id": q["id"], "answer": "No"} for q in survey["questions"]]
+        query_counter.reset()
+        client.post(f"/api/responses/{survey['id']}", json=payload)
+        counts.append(query_counter.count)
+    assert counts[0] == counts[1]
+
+
+def test_queued_submissions_are_ingested_in_batches(client, auth_headers, survey_factory, monkeypatch):
+    import ingestion
+    from database import SessionLocal
+    import models
+
+    monkeypatch.setattr(ingestion, "INGESTION_MODE", "queue")
+    survey = survey_factory()
+    question = survey["questions"][0]
+    for answer in ("Yes", "Yes", "No"):
+        response = client.post(f"/api/responses/{survey['id']}", json=[{"question_id": question["id"], "answer": answer}])
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+
+    db = SessionLocal()
+    try:
+        assert db.query(models.Response).filter(models.Response.survey_id == survey["id"]).count() == 0
+        assert ingestion.flush_pending(batch_size=2) == 2
+        ingestion.IngestionWorker(batch_size=2).stop()
+        assert db.query(models.PendingSubmission).count() == 0
+        assert db.query(models.Response).filter(models.Response.survey_id == survey["id"]).count() == 3
+    finally:
+        db.close()
+
+    analytics = client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers).json()
+    assert analytics["analytics"][0]["options"] == {"Yes": 2, "No": 1}
+
+
+def test_concurrent_flushes_ingest_each_queued_submission_once(client, survey_factory, monkeypatch):
+    # Every worker process of serve.py runs its own ingestion worker
+    import threading
+
+    import ingestion
+    from database import SessionLocal
+    import models
+
+    monkeypatch.setattr(ingestion, "INGESTION_MODE", "queue")
+    survey = survey_factory()
+    question = survey["questions"][0]
+    for _ in range(40):
+        client.post(f"/api/responses/{survey['id']}", json=[{"question_id": question["id"], "answer": "Yes"}])
+
+    flushed, errors = [], []
+
+    def flush():
+        try:
+            while (count := ingestion.flush_pending(batch_size=3)):
+                flushed.append(count)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=flush) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sum(flushed) == 40
+    db = SessionLocal()
+    try:
+        assert db.query(models.Response).filter(models.Response.survey_id == survey["id"]).count() == 40
+    finally:
+        db.close()
+
+
+SUBMIT_BATCH = """
+    mutation Sync($surveyId: Int!, $submissions: [SubmissionInput!]!) {
+        submitResponses(surveyId: $surveyId, submissions: $submissions) {
+            id surveyId submittedAt answers { questionId optionId text }
+        }
+    }
+"""
+
+
+def submit_batch(client, survey, batch):
+    variables = {
+        "surveyId": survey["id"],
+        "submissions": [
+            {"answers": [{"questionId": q["id"], "answer": answer} for q, answer in zip(survey["questions"], answers)]}
+            for answers in batch
+        ],
+    }
+    return client.post("/graphql", json={"query": SUBMIT_BATCH, "variables": variables}).json()
+
+
+def test_graphql_batch_submission(client, auth_headers, survey_factory):
+    survey = survey_factory(choice_questions=2)
+    body = submit_batch(client, survey, [("Yes", "No"), ("No", "No"), ("Yes", "Yes")])
+    submitted = body["data"]["submitResponses"]
+    assert [[a["text"] for a in r["answers"]] for r in submitted] == [["Yes", "No"], ["No", "No"], ["Yes", "Yes"]]
+    assert all(r["submittedAt"] and r["surveyId"] == survey["id"] for r in submitted)
+
+    listed = client.get(f"/api/responses/{survey['id']}", headers=auth_headers).json()
+    assert [r["id"] for r in listed] == [int(r["id"]) for r in submitted]
+    analytics = client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers).json()
+    assert analytics["analytics"][0]["options"] == {"Yes": 2, "No": 1}
+
+
+def test_graphql_batch_is_all_or_nothing(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    body = submit_batch(client, survey, [("Yes",), ("Maybe",)])
+    assert body["data"] is None and "not an option" in body["errors"][0]["message"]
+    assert client.get(f"/api/responses/{survey['id']}", headers=auth_headers).json() == []
+
+
+def test_graphql_batch_statements_are_independent_of_batch_size(client, survey_factory, query_counter):
+    survey = survey_factory(choice_questions=3)
+    submit_batch(client, survey, [("Yes", "No", "Yes")])  # warm the question cache
+    counts = []
+    for size in (2, 150):
+        query_counter.reset()
+        body = submit_batch(client, survey, [("Yes", "No", "Yes")] * size)
+        assert len(body["data"]["submitResponses"]) == size
+        counts.append(query_counter.count)
+    assert counts[0] == counts[1]
+    # No statement spent on looking up the survey's questions
+    assert not any("FROM surveys" in statement for statement in query_counter.statements)
+
+
+def test_cached_questions_follow_survey_edits(client, auth_headers, survey_factory):
+    survey = survey_factory()
+    assert "errors" not in submit_batch(client, survey, [("No",)])
+    question = survey["questions"][0]
+    edit = {"title": survey["title"], "questions": [
+        {"id": question["id"], "text": question["text"], "is_open_ended": False, "options": [{"text": "Yes"}]},
+    ]}
+    client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers)
+    assert "errors" in submit_batch(client, survey, [("No",)])
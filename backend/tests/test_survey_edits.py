@@ -0,0 +1,118 @@
+def as_edit(survey):
+    # What an editor sends back: the survey it loaded, ids included
+    return {
+        "title": survey["title"],
+        "description": survey["description"],
+        "updated_at": survey["updated_at"],
+        "questions": [
+            {"id": q["id"], "text": q["text"], "is_open_ended": q["is_open_ended"],
+             "options": [{"id": o["id"], "text": o["text"]} for o in q["options"]]}
+            for q in survey["questions"]
+        ],
+    }
+
+
+def test_edit_keeps_ids_answers_and_tallies(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=1)
+    choice, open_ended = survey["questions"]
+    client.post(f"/api/responses/{survey['id']}", json=[
+        {"question_id": choice["id"], "answer": "Yes"},
+        {"question_id": open_ended["id"], "answer": "because"},
+    ])
+
+    edit = as_edit(survey)
+    edit["questions"][0]["text"] = "Q0, reworded"
+    edit["questions"][0]["options"][0]["text"] = "Yes!"
+    edit["questions"][0]["options"].append({"text": "Maybe"})
+    edit["questions"].append({"text": "New", "is_open_ended": False, "options": [{"text": "A"}]})
+    response = client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers)
+    assert response.status_code == 200
+    edited = response.json()
+
+    assert [q["id"] for q in edited["questions"][:2]] == [choice["id"], open_ended["id"]]
+    assert [q["order"] for q in edited["questions"]] == [1, 2, 3]
+    options = edited["questions"][0]["options"]
+    assert [o["id"] for o in options[:2]] == [o["id"] for o in choice["options"]]
+    assert [o["text"] for o in options] == ["Yes!", "No", "Maybe"]
+
+    stats = client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers).json()["analytics"]
+    assert stats[0]["options"] == {"Yes!": 1, "No": 0, "Maybe": 0}
+    assert stats[1]["answers"] == ["because"]
+
+
+def test_removed_options_keep_answers_and_removed_questions_drop_them(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=1)
+    choice, open_ended = survey["questions"]
+    client.post(f"/api/responses/{survey['id']}", json=[
+        {"question_id": choice["id"], "answer": "No"},
+        {"question_id": open_ended["id"], "answer": "because"},
+    ])
+
+    edit = as_edit(survey)
+    edit["questions"] = edit["questions"][:1]
+    edit["questions"][0]["options"] = edit["questions"][0]["options"][:1]
+    assert client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).status_code == 200
+
+    [submission] = client.get(f"/api/responses/{survey['id']}", headers=auth_headers).json()
+    assert [(a["question_id"], a["option_id"], a["answer"]) for a in submission["answers"]] == [
+        (choice["id"], None, "No"),
+    ]
+    stats = client.get(f"/api/survey/{survey['id']}/analytics", headers=auth_headers).json()["analytics"]
+    assert [q["options"] for q in stats] == [{"Yes": 0}]
+
+
+def test_questions_without_ids_are_matched_by_position(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=1)
+    edit = {"title": "Renamed", "questions": [{"text": "First", "is_open_ended": False, "options": [{"text": "Y"}]}]}
+    edited = client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).json()
+    [question] = edited["questions"]
+    assert question["id"] == survey["questions"][0]["id"]
+    assert [(o["id"], o["text"]) for o in question["options"]] == [(survey["questions"][0]["options"][0]["id"], "Y")]
+
+
+def test_stale_edit_is_rejected(client, auth_headers, survey_factory):
+    survey = survey_factory(open_questions=1)
+    first = as_edit(survey)
+    first["title"] = "First"
+    response = client.put(f"/api/surveys/{survey['id']}", json=first, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["updated_at"] != survey["updated_at"]
+
+    # A second editor still holding the original survey
+    second = as_edit(survey)
+    second["title"] = "Second"
+    assert client.put(f"/api/surveys/{survey['id']}", json=second, headers=auth_headers).status_code == 409
+    assert client.get(f"/api/survey/{survey['id']}", headers=auth_headers).json()["title"] == "First"
+
+    # Reloading first, or not asking for the check, lets the edit through
+    second["updated_at"] = response.json()["updated_at"]
+    assert client.put(f"/api/surveys/{survey['id']}", json=second, headers=auth_headers).status_code == 200
+    del second["updated_at"]
+    assert client.put(f"/api/surveys/{survey['id']}", json=second, headers=auth_headers).status_code == 200
+
+
+def test_unknown_ids_are_rejected(client, auth_headers, survey_factory):
+    survey, other = survey_factory(open_questions=1), survey_factory(open_questions=1)
+    edit = as_edit(survey)
+    edit["questions"][0]["id"] = other["questions"][0]["id"]
+    assert client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).status_code == 400
+    edit = as_edit(survey)
+    edit["questions"][0]["options"][0]["id"] = other["questions"][0]["options"][0]["id"]
+    assert client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).status_code == 400
+    assert client.get(f"/api/survey/{survey['id']}", headers=auth_headers).json()["questions"] == survey["questions"]
+
+
+def test_edit_query_count_is_independent_of_survey_size(client, auth_headers, survey_factory, query_counter):
+    counts = []
+    for size in (2, 40):
+        survey = survey_factory(choice_questions=size, open_questions=1)
+        edit = as_edit(survey)
+        for question in edit["questions"][:-1]:
+            question["text"] += " (edited)"
+            question["options"][1]["text"] = "Nope"
+            question["options"].append({"text": "Maybe"})
+        edit["questions"].append({"text": "Added", "is_open_ended": False, "options": [{"text": "A"}, {"text": "B"}]})
+        query_counter.reset()
+        assert client.put(f"/api/surveys/{survey['id']}", json=edit, headers=auth_headers).status_code == 200
+        counts.append(query_counter.count)
+    assert counts[0] == counts[1]
@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { surveys } from '@/lib/api';
-import { QuestionCreate, SurveyCreate } from '@/types';
+import { QuestionCreate, SurveyCreate, SurveyUpdate } from '@/types';
 import { Survey } from '@/lib/graphql';
 
 interface CreateSurveyModalProps {
@@ -16,10 +16,12 @@ export default function CreateSurveyModal({ isOpen, onClose, survey }: CreateSur
   const queryClient = useQueryClient();
   const [title, setTitle] = useState('');
   const [description, setDescription] = useState('');
+  // Existing questions and options keep their ids so edits don't detach collected answers
   const [questions, setQuestions] = useState<Array<{
+    id?: number;
     text: string;
     isOpenEnded: boolean;
-    options: Array<{ text: string }>;
+    options: Array<{ id?: number; text: string }>;
   }>>([{ text: '', isOpenEnded: true, options: [] }]);
 
   useEffect(() => {
@@ -28,9 +30,10 @@ export default function CreateSurveyModal({ isOpen, onClose, survey }: CreateSur
       setDescription(survey.description || '');
       setQuestions(
         survey.questions.map(q => ({
+          id: q.id,
           text: q.text,
           isOpenEnded: q.isOpenEnded,
-          options: q.options.map(o => ({ text: o.text }))
+          options: q.options.map(o => ({ id: o.id, text: o.text }))
         }))
       );
     } else {
@@ -52,7 +55,7 @@ export default function CreateSurveyModal({ isOpen, onClose, survey }: CreateSur
   });
 
   const updateSurveyMutation = useMutation({
-    mutationFn: (data: SurveyCreate) => surveys.update(survey!.id, data),
+    mutationFn: (data: SurveyUpdate) => surveys.update(survey!.id, data),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['surveys'] });
       onClose();
@@ -101,15 +104,16 @@ export default function CreateSurveyModal({ isOpen, onClose, survey }: CreateSur
       title,
       description,
       questions: questions.map((q, index) => ({
+        id: q.id,
         text: q.text,
         is_open_ended: q.isOpenEnded,
         order: index + 1,
-        options: q.options.map(opt => ({ text: opt.text })),
+        options: q.options.map(opt => ({ id: opt.id, text: opt.text })),
       })),
     };
 
     if (survey) {
-      updateSurveyMutation.mutate(surveyData);
+      updateSurveyMutation.mutate({ ...surveyData, updated_at: survey.updatedAt });
     } else {
       createSurveyMutation.mutate(surveyData);
     }
@@ -223,6 +227,10 @@ export default function CreateSurveyModal({ isOpen, onClose, survey }: CreateSur
             </button>
           </div>
 
+          {updateSurveyMutation.isError && (
+            <p className="text-sm text-red-600">{updateSurveyMutation.error.message}</p>
+          )}
+
           <div className="flex justify-end space-x-4">
             <button
               type="button"
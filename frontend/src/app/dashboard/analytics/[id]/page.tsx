@@ -1,14 +1,18 @@
 "use client";
 
 import { useParams } from "next/navigation";
-import { useQuery } from "@tanstack/react-query";
+import { useEffect, useState } from "react";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { surveys } from "@/lib/api";
-import { Bar } from "react-chartjs-2";
+import { TallyDelta } from "@/types";
+import { Bar, Line } from "react-chartjs-2";
 import {
   Chart as ChartJS,
   CategoryScale,
   LinearScale,
   BarElement,
+  LineElement,
+  PointElement,
   Title,
   Tooltip,
   Legend,
@@ -16,7 +20,86 @@ import {
 import Link from "next/link";
 import { FaChartBar, FaAlignLeft } from "react-icons/fa";
 
-ChartJS.register(CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend);
+ChartJS.register(CategoryScale, LinearScale, BarElement, LineElement, PointElement, Title, Tooltip, Legend);
+
+function applyDelta(data: any, delta: TallyDelta) {
+  return {
+    ...data,
+    analytics: data.analytics.map((q: any) => {
+      const key = String(q.question_id);
+      if (q.type === "multiple_choice" && delta.options[key]) {
+        const options = { ...q.options };
+        for (const [text, count] of Object.entries(delta.options[key])) {
+          options[text] = (options[text] ?? 0) + count;
+        }
+        return { ...q, options };
+      }
+      if (q.type === "open_ended" && delta.answers[key]) {
+        return { ...q, answer_count: (q.answer_count ?? q.answers.length) + delta.answers[key] };
+      }
+      return q;
+    }),
+  };
+}
+
+// Open-ended answers: the first page from the analytics payload, or full-text
+// search results once something is typed
+function OpenEndedAnswers({ surveyId, question }: { surveyId: number; question: any }) {
+  const [query, setQuery] = useState("");
+  const search = query.trim();
+  const { data: results, isFetching } = useQuery({
+    queryKey: ["answer-search", surveyId, question.question_id, search],
+    queryFn: () => surveys.searchAnswers(surveyId, question.question_id, search),
+    enabled: search.length > 0,
+  });
+  const answers: string[] = search && results ? results.answers.map((a) => a.text) : question.answers;
+
+  return (
+    <div>
+      <div className="flex items-center justify-between mb-2 gap-4">
+        <h3 className="text-lg font-medium text-gray-700">Responses:</h3>
+        <input
+          type="search"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          placeholder="Search answers"
+          className="border border-gray-300 rounded px-2 py-1 text-sm text-gray-900"
+        />
+      </div>
+      {!search && question.top_terms?.length > 0 && (
+        <div className="flex flex-wrap gap-2 mb-3">
+          {[...question.top_terms, ...question.top_bigrams].map((t: { term: string; count: number }) => (
+            <button
+              key={t.term}
+              type="button"
+              onClick={() => setQuery(t.term)}
+              className="text-sm bg-green-50 border border-green-200 text-green-900 rounded-full px-3 py-0.5 hover:bg-green-100"
+            >
+              {t.term} <span className="text-green-700">{t.count}</span>
+            </button>
+          ))}
+        </div>
+      )}
+      {search && results && (
+        <p className="text-sm text-gray-500 mb-2">
+          {results.total} matching {results.total === 1 ? "answer" : "answers"}
+          {results.total > results.answers.length && `, best ${results.answers.length} shown`}
+        </p>
+      )}
+      {answers.length === 0 ? (
+        <p className="text-gray-500 italic">{search ? (isFetching ? "Searching..." : "No matching answers.") : "No responses yet."}</p>
+      ) : (
+        <ul className="list-disc pl-6 space-y-1">
+          {answers.map((a: string, idx: number) => (
+            <li key={idx} className="text-gray-900 bg-gray-50 rounded px-2 py-1 mb-1 transition-colors duration-150 hover:bg-blue-50">
+              {a}
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+}
 
 export default function AnalyticsPage() {
   const { id } = useParams();
@@ -25,6 +108,27 @@ export default function AnalyticsPage() {
     queryFn: () => surveys.getAnalytics(Number(id)),
   });
 
+  // Live updates: apply tally deltas to the cached analytics, reload on (re)connect
+  const queryClient = useQueryClient();
+  useEffect(() => {
+    const source = surveys.subscribeAnalytics(Number(id));
+    const reload = () => queryClient.invalidateQueries({ queryKey: ["analytics", id] });
+    source.addEventListener("ready", reload);
+    source.addEventListener("resync", reload);
+    source.addEventListener("tallies", (event) => {
+      const delta: TallyDelta = JSON.parse((event as MessageEvent).data);
+      queryClient.setQueryData(["analytics", id], (current: any) => current && applyDelta(current, delta));
+      queryClient.invalidateQueries({ queryKey: ["timeseries", id] });
+    });
+    return () => source.close();
+  }, [id, queryClient]);
+
+  const [granularity, setGranularity] = useState<"hour" | "day">("day");
+  const { data: trend } = useQuery({
+    queryKey: ["timeseries", id, granularity],
+    queryFn: () => surveys.getTimeseries(Number(id), granularity),
+  });
+
   // Calculate summary stats
   let totalResponses = 0;
   if (data && data.analytics.length > 0) {
@@ -32,7 +136,7 @@ export default function AnalyticsPage() {
       if (q.type === "multiple_choice") {
         totalResponses += Object.values(q.options as Record<string, number>).reduce((a, b) => a + b, 0);
       } else if (q.type === "open_ended") {
-        totalResponses += q.answers.length;
+        totalResponses += q.answer_count ?? q.answers.length;
       }
     });
   }
@@ -55,6 +159,35 @@ export default function AnalyticsPage() {
             <span className="text-sm text-green-900">Questions</span>
           </div>
         </div>
+        {/* Submissions over time */}
+        {trend && (
+          <div className="mb-8 bg-white rounded-lg shadow p-6">
+            <div className="flex justify-between items-center mb-4">
+              <h2 className="text-xl font-semibold text-gray-900">Responses over time</h2>
+              <select
+                value={granularity}
+                onChange={(e) => setGranularity(e.target.value as "hour" | "day")}
+                className="border border-gray-300 rounded px-2 py-1 text-sm text-gray-900"
+              >
+                <option value="day">Last 30 days</option>
+                <option value="hour">Last 48 hours</option>
+              </select>
+            </div>
+            <Line
+              data={{
+                labels: trend.buckets.map((b) =>
+                  granularity === "day" ? new Date(b).toLocaleDateString() : new Date(b).toLocaleString([], { weekday: "short", hour: "2-digit" })
+                ),
+                datasets: [{ label: "Responses", data: trend.responses, borderColor: "#2563eb", backgroundColor: "#2563eb", tension: 0.3 }],
+              }}
+              options={{
+                responsive: true,
+                plugins: { legend: { display: false } },
+                scales: { y: { beginAtZero: true, ticks: { precision: 0 } } },
+              }}
+            />
+          </div>
+        )}
         {/* Divider */}
         <hr className="mb-8 border-gray-200" />
         {isLoading ? (
@@ -110,20 +243,7 @@ export default function AnalyticsPage() {
                   }}
                 />
               ) : (
-                <div>
-                  <h3 className="text-lg font-medium text-gray-700 mb-2">Responses:</h3>
-                  {q.answers.length === 0 ? (
-                    <p className="text-gray-500 italic">No responses yet.</p>
-                  ) : (
-                    <ul className="list-disc pl-6 space-y-1">
-                      {q.answers.map((a: string, idx: number) => (
-                        <li key={idx} className="text-gray-900 bg-gray-50 rounded px-2 py-1 mb-1 transition-colors duration-150 hover:bg-blue-50">
-                          {a}
-                        </li>
-                      ))}
-                    </ul>
-                  )}
-                </div>
+                <OpenEndedAnswers surveyId={Number(id)} question={q} />
               )}
               {idx < data.analytics.length - 1 && <hr className="mt-8 mb-2 border-gray-200" />}
             </div>
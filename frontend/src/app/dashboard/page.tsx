@@ -2,10 +2,10 @@
 
 import { useState } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery } from '@tanstack/react-query';
 import Link from 'next/link';
 import CreateSurveyModal from './CreateSurveyModal';
-import { graphqlClient, GET_SURVEYS, Survey, GetSurveysResponse } from '@/lib/graphql';
+import { persistedRequest, GET_SURVEYS, Survey, GetSurveysResponse } from '@/lib/graphql';
 import { useQueryClient } from '@tanstack/react-query';
 import { surveys as surveysApi } from '@/lib/api';
 import { API_URL } from '@/config';
@@ -17,13 +17,17 @@ export default function Dashboard() {
   const [deletingSurveyId, setDeletingSurveyId] = useState<number | null>(null);
   const queryClient = useQueryClient();
 
-  const { data: surveys, isLoading } = useQuery<Survey[]>({
+  // One page of surveys at a time; more are loaded on request
+  const { data, isLoading, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['surveys'],
-    queryFn: async () => {
-      const { getSurveys } = await graphqlClient.request<GetSurveysResponse>(GET_SURVEYS);
-      return getSurveys;
+    queryFn: async ({ pageParam }) => {
+      const { surveysPage }: GetSurveysResponse = await persistedRequest<GetSurveysResponse>(GET_SURVEYS, { after: pageParam });
+      return surveysPage;
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
   });
+  const surveys: Survey[] | undefined = data?.pages.flatMap((page) => page.items);
 
   const handleShare = async (surveyId: number) => {
     try {
@@ -231,6 +235,18 @@ export default function Dashboard() {
               </div>
             ))}
           </div>
+
+          {hasNextPage && (
+            <div className="mt-6 text-center">
+              <button
+                onClick={() => fetchNextPage()}
+                disabled={isFetchingNextPage}
+                className="px-4 py-2 text-sm font-medium rounded-md text-indigo-600 border border-indigo-600 hover:bg-indigo-50 disabled:opacity-50"
+              >
+                {isFetchingNextPage ? 'Loading...' : 'Load more surveys'}
+              </button>
+            </div>
+          )}
         </div>
       </main>
 
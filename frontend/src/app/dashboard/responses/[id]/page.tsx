@@ -2,9 +2,9 @@
 
 import { useState } from 'react';
 import { useParams, useRouter } from 'next/navigation';
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery } from '@tanstack/react-query';
 import { surveys } from '@/lib/api';
-import { Survey, Response } from '@/types';
+import { Survey, ResponseAnswer } from '@/types';
 
 export default function SurveyResponsesPage() {
   const { id } = useParams();
@@ -16,10 +16,20 @@ export default function SurveyResponsesPage() {
     queryFn: () => surveys.get(Number(id)),
   });
 
-  const { data: responses, isLoading: isLoadingResponses } = useQuery<Response[]>({
+  // One page of submissions at a time; more are loaded on request
+  const {
+    data,
+    isLoading: isLoadingResponses,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['responses', id],
-    queryFn: () => surveys.getResponses(Number(id)),
+    queryFn: ({ pageParam }) => surveys.getResponses(Number(id), pageParam),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
   });
+  const responses: ResponseAnswer[] | undefined = data?.pages.flatMap((page) => page.items);
 
   if (isLoadingSurvey || isLoadingResponses) {
     return (
@@ -107,7 +117,7 @@ export default function SurveyResponsesPage() {
                           {question.text}
                         </h3>
                         <p className="text-sm text-gray-500 mb-4">
-                          {questionResponses.length} response{questionResponses.length !== 1 ? 's' : ''}
+                          {questionResponses.length}{hasNextPage ? '+' : ''} response{questionResponses.length !== 1 ? 's' : ''}
                         </p>
                         <div className="space-y-4">
                           {questionResponses.map((response) => (
@@ -126,6 +136,18 @@ export default function SurveyResponsesPage() {
                     );
                   })}
               </div>
+
+              {hasNextPage && (
+                <div className="mt-6 text-center">
+                  <button
+                    onClick={() => fetchNextPage()}
+                    disabled={isFetchingNextPage}
+                    className="px-4 py-2 text-sm font-medium rounded-md text-indigo-600 border border-indigo-600 hover:bg-indigo-50 disabled:opacity-50"
+                  >
+                    {isFetchingNextPage ? 'Loading...' : 'Load more responses'}
+                  </button>
+                </div>
+              )}
             </div>
           </div>
         </div>
@@ -1,10 +1,10 @@
 'use client';
 
 import { useState } from 'react';
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery } from '@tanstack/react-query';
 import { surveys } from '@/lib/api';
 import { useParams } from 'next/navigation';
-import { Survey, Response, Question } from '@/types';
+import { Survey, ResponseAnswer, Question } from '@/types';
 import { motion, AnimatePresence } from 'framer-motion';
 
 export default function SurveyResponses() {
@@ -16,10 +16,20 @@ export default function SurveyResponses() {
     queryFn: () => surveys.get(parseInt(id as string)),
   });
 
-  const { data: responses, isLoading: isLoadingResponses } = useQuery({
+  // One page of submissions at a time; more are loaded on request
+  const {
+    data,
+    isLoading: isLoadingResponses,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['responses', id],
-    queryFn: () => surveys.getResponses(parseInt(id as string)),
+    queryFn: ({ pageParam }) => surveys.getResponses(parseInt(id as string), pageParam),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
   });
+  const responses: ResponseAnswer[] | undefined = data?.pages.flatMap((page) => page.items);
 
   if (isLoading || isLoadingResponses) {
     return (
@@ -120,7 +130,7 @@ export default function SurveyResponses() {
                     : 'All Responses'}
                 </h2>
                 <span className="text-sm text-gray-600">
-                  {filteredResponses.length} response{filteredResponses.length !== 1 ? 's' : ''}
+                  {filteredResponses.length}{hasNextPage ? '+' : ''} response{filteredResponses.length !== 1 ? 's' : ''}
                 </span>
               </div>
 
@@ -152,6 +162,18 @@ export default function SurveyResponses() {
                   ))}
                 </motion.div>
               </AnimatePresence>
+
+              {hasNextPage && (
+                <div className="mt-6 text-center">
+                  <button
+                    onClick={() => fetchNextPage()}
+                    disabled={isFetchingNextPage}
+                    className="px-4 py-2 text-sm font-medium rounded-md text-indigo-600 border border-indigo-600 hover:bg-indigo-50 disabled:opacity-50"
+                  >
+                    {isFetchingNextPage ? 'Loading...' : 'Load more responses'}
+                  </button>
+                </div>
+              )}
             </div>
           </motion.div>
         </div>
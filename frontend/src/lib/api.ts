@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { AuthResponse, LoginFormData, SignupFormData, Survey, Response, SurveyCreate } from '@/types';
+import { AnswerSearchResults, AuthResponse, Timeseries, LoginFormData, Page, SignupFormData, Survey, Response, ResponseAnswer, SurveyCreate, SurveyUpdate } from '@/types';
 import { API_URL as baseURL } from '@/config';
 const API_URL = `${baseURL}/api`;
 
@@ -40,6 +40,12 @@ export const auth = {
   },
 };
 
+// List endpoints are paged; X-Next-Cursor is set while more pages follow
+const getPage = async <T>(url: string, cursor?: string): Promise<Page<T>> => {
+  const response = await api.get<T[]>(url, { params: cursor ? { cursor } : {} });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+};
+
 export const surveys = {
   create: async (data: SurveyCreate): Promise<Survey> => {
     const response = await api.post<Survey>('/survey/', data);
@@ -56,18 +62,22 @@ export const surveys = {
     return response.data;
   },
 
-  list: async (): Promise<Survey[]> => {
-    const response = await api.get<Survey[]>('/survey/');
-    return response.data;
+  list: async (cursor?: string): Promise<Page<Survey>> => {
+    return getPage<Survey>('/survey/', cursor);
   },
 
-  getResponses: async (surveyId: number): Promise<Response[]> => {
-    const response = await api.get<Response[]>(`/responses/${surveyId}`);
-    return response.data;
+  getResponses: async (surveyId: number, cursor?: string): Promise<Page<ResponseAnswer>> => {
+    const page = await getPage<Response>(`/responses/${surveyId}`, cursor);
+    return {
+      items: page.items.flatMap((submission) =>
+        submission.answers.map((answer) => ({ ...answer, response_id: submission.id, created_at: submission.created_at }))
+      ),
+      nextCursor: page.nextCursor,
+    };
   },
 
-  submitResponses: async (surveyId: number, responses: { question_id: number; answer: string }[]): Promise<Response[]> => {
-    const response = await api.post<Response[]>(`/responses/${surveyId}`, responses);
+  submitResponses: async (surveyId: number, responses: { question_id: number; answer: string }[]): Promise<Response> => {
+    const response = await api.post<Response>(`/responses/${surveyId}`, responses);
     return response.data;
   },
 
@@ -88,7 +98,7 @@ export const surveys = {
     return res.json();
   },
 
-  update: async (surveyId: number, data: SurveyCreate): Promise<Survey> => {
+  update: async (surveyId: number, data: SurveyUpdate): Promise<Survey> => {
     const token = localStorage.getItem('token');
     const res = await fetch(`${API_URL}/surveys/${surveyId}`, {
       method: 'PUT',
@@ -98,6 +108,7 @@ export const surveys = {
       },
       body: JSON.stringify(data),
     });
+    if (res.status === 409) throw new Error('This survey was changed elsewhere. Reload it and try again.');
     if (!res.ok) throw new Error('Failed to update survey');
     return res.json();
   },
@@ -113,6 +124,35 @@ export const surveys = {
     return res.json();
   },
 
+  getTimeseries: async (surveyId: number, granularity: 'hour' | 'day' = 'day'): Promise<Timeseries> => {
+    const token = localStorage.getItem('token');
+    const res = await fetch(`${API_URL}/survey/${surveyId}/analytics/timeseries?granularity=${granularity}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+    if (!res.ok) throw new Error('Failed to fetch response trend');
+    return res.json();
+  },
+
+  // Server-Sent Events of tally deltas; EventSource can't send headers, so the token goes in the URL
+  subscribeAnalytics: (surveyId: number): EventSource => {
+    const token = localStorage.getItem('token') ?? '';
+    return new EventSource(`${API_URL}/survey/${surveyId}/analytics/stream?access_token=${encodeURIComponent(token)}`);
+  },
+
+  searchAnswers: async (surveyId: number, questionId: number, query: string, offset = 0): Promise<AnswerSearchResults> => {
+    const token = localStorage.getItem('token');
+    const params = new URLSearchParams({ q: query, offset: String(offset) });
+    const res = await fetch(`${API_URL}/survey/${surveyId}/analytics/${questionId}/search?${params}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+    if (!res.ok) throw new Error('Failed to search answers');
+    return res.json();
+  },
+
   deleteSurvey: async (surveyId: number): Promise<void> => {
     const token = localStorage.getItem('token');
     const res = await fetch(`${API_URL}/surveys/${surveyId}`, {
@@ -26,6 +26,43 @@ if (typeof window !== 'undefined') {
   }
 }
 
+const sha256 = async (text: string): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
+const queryHashes = new Map<string, Promise<string>>();
+
+// Send only the query's hash (Apollo's persisted query protocol). The queries
+// below are on the server's allow-list (backend/persist_queries.py), so they
+// skip parsing and validation there; anything else is sent in full once and
+// registered when the server allows ad-hoc queries.
+export async function persistedRequest<T>(query: string, variables?: Record<string, unknown>): Promise<T> {
+  if (!queryHashes.has(query)) {
+    queryHashes.set(query, sha256(query));
+  }
+  const extensions = { persistedQuery: { version: 1, sha256Hash: await queryHashes.get(query) } };
+  const token = typeof window !== 'undefined' ? localStorage.getItem('token') : null;
+  const post = (body: object) =>
+    fetch(GRAPHQL_URL, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(body),
+    });
+
+  let res = await post({ variables, extensions });
+  if (res.status === 400 && (await res.clone().text()) === 'PersistedQueryNotFound') {
+    res = await post({ query, variables, extensions });
+  }
+  if (!res.ok) throw new Error(`GraphQL request failed: ${await res.text()}`);
+  const { data, errors } = await res.json();
+  if (errors?.length) throw new Error(errors[0].message);
+  return data as T;
+}
+
 export interface QuestionOption {
   id: number;
   text: string;
@@ -43,11 +80,15 @@ export interface Survey {
   title: string;
   description: string | null;
   isActive: boolean;
+  updatedAt: string | null;
   questions: Question[];
 }
 
 export interface GetSurveysResponse {
-  getSurveys: Survey[];
+  surveysPage: {
+    items: Survey[];
+    nextCursor: string | null;
+  };
 }
 
 export interface GetSurveyResponse {
@@ -55,19 +96,23 @@ export interface GetSurveyResponse {
 }
 
 export const GET_SURVEYS = `
-  query GetSurveys {
-    getSurveys {
-      id
-      title
-      description
-      isActive
-      questions {
+  query GetSurveys($after: String) {
+    surveysPage(after: $after) {
+      nextCursor
+      items {
         id
-        text
-        isOpenEnded
-        options {
+        title
+        description
+        isActive
+        updatedAt
+        questions {
           id
           text
+          isOpenEnded
+          options {
+            id
+            text
+          }
         }
       }
     }
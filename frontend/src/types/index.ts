@@ -36,12 +36,18 @@ export interface Question {
 }
 
 export interface QuestionCreate {
+  id?: number;
   text: string;
   is_open_ended: boolean;
   order: number;
   options: QuestionOption[];
 }
 
+export interface SurveyUpdate extends SurveyCreate {
+  // The updated_at the edit is based on; the server answers 409 if the survey changed since
+  updated_at?: string | null;
+}
+
 export interface Survey {
   id: number;
   title: string;
@@ -60,10 +66,59 @@ export interface SurveyCreate {
   questions: QuestionCreate[];
 }
 
-export interface Response {
+export interface Answer {
   id: number;
-  survey_id: number;
   question_id: number;
+  option_id: number | null;
   answer: string;
+}
+
+export interface Response {
+  id: number;
+  survey_id: number;
   created_at: string;
-} 
\ No newline at end of file
+  answers: Answer[];
+}
+
+// One page of a list endpoint; pass nextCursor back to get the following page
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// One answer of a submission, as the responses pages list them
+export interface ResponseAnswer extends Answer {
+  response_id: number;
+  created_at: string;
+} 
+
+// A `tallies` event of /analytics/stream, to add to the loaded analytics
+export interface TallyDelta {
+  responses: number;
+  options: Record<string, Record<string, number>>;
+  answers: Record<string, number>;
+}
+
+// Per-bucket counts from /analytics/timeseries; every series lines up with `buckets`
+export interface Timeseries {
+  survey_id: number;
+  granularity: 'hour' | 'day';
+  start: string;
+  end: string;
+  buckets: string[];
+  responses: number[];
+  questions: (
+    | { question_id: number; question_text: string; type: 'multiple_choice'; options: Record<string, number[]> }
+    | { question_id: number; question_text: string; type: 'open_ended'; answers: number[] }
+  )[];
+}
+
+// A page of full-text search results over one open-ended question's answers
+export interface AnswerSearchResults {
+  question_id: number;
+  query: string;
+  total: number;
+  offset: number;
+  limit: number;
+  answers: { id: number; response_id: number; text: string }[];
+}